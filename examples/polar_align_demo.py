@@ -2,6 +2,7 @@ import sys
 import os
 import math
 import time
+import logging
 import numpy as np
 
 # Add src to path
@@ -37,7 +38,7 @@ class MockSolver(PlateSolver):
         self.mount = mount_ref
         self.camera = camera_ref
         
-    def solve(self, image_path, search_radius=180):
+    def solve(self, image_path, search_radius=180, hint=None):
         # If we have a camera reference with simulation capability, ask it where it was pointing.
         # This ensures the solution matches the visual star field.
         if self.camera and hasattr(self.camera, 'get_simulation_pointing'):
@@ -55,6 +56,7 @@ class MockSolver(PlateSolver):
         return {'ra': 0, 'dec': 90, 'rotation': 0}
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("=== CoolEq Polar Alignment Demo ===")
     
     # Initialize Simulation Hardware
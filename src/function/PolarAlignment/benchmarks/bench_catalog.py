@@ -0,0 +1,56 @@
+"""
+Cone search benchmark of the star catalog.
+
+Builds a random all-sky catalog of --stars stars, saves it, reopens it
+memory-mapped and times cone searches of --radius degrees at random centres.
+Reports the query latency percentiles and how many rows each query read.
+
+Usage:
+    python benchmarks/bench_catalog.py [--stars 3000000] [--radius 3.0] [--queries 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from catalog import StarCatalog
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stars", type=int, default=3000000)
+    parser.add_argument("--radius", type=float, default=3.0, help="Cone radius in degrees.")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    ra = rng.uniform(0.0, 360.0, args.stars)
+    dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, args.stars)))
+    mag = rng.uniform(2.0, 14.0, args.stars)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.npy")
+        start = time.perf_counter()
+        catalog = StarCatalog.build(ra, dec, mag, path=path)
+        print(f"Built {len(catalog)} stars in {time.perf_counter() - start:.2f} s "
+              f"({os.path.getsize(path) / 2**20:.0f} MiB)")
+
+        centres = zip(rng.uniform(0.0, 360.0, args.queries),
+                      np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, args.queries))))
+        times, found, read = [], [], []
+        for c_ra, c_dec in centres:
+            t = time.perf_counter()
+            stars = catalog.cone_search(c_ra, c_dec, args.radius)
+            times.append((time.perf_counter() - t) * 1000.0)
+            found.append(len(stars))
+            read.append(sum(b - a for a, b in catalog.cone_ranges(c_ra, c_dec, args.radius)))
+        times = np.array(times)
+        print(f"{args.radius:g} deg cone: p50 {np.percentile(times, 50):.3f} ms, p90 {np.percentile(times, 90):.3f} ms, "
+              f"max {times.max():.3f} ms; {np.mean(found):.0f} stars found, {np.mean(read):.0f} rows read per query")
+        del catalog
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
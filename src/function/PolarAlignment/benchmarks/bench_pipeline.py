@@ -0,0 +1,271 @@
+"""
+End-to-end benchmark of the capture -> solve -> fit -> adjust pipeline.
+
+Everything runs against the simulators: StarFieldSimulator renders the frames,
+the native plate solver (or ASTAP, if installed) solves them, the coordinate
+transforms and the axis fit use the package code, and the alignment base is
+moved on a FakeOnStep through the real serial command path.
+
+For each configuration (image size x star density x number of points x solver
+backend) every stage is timed over --repeat runs and reported as latency
+percentiles, followed by one pass under tracemalloc for the peak memory of each
+stage. A warm-up run before each pass is not recorded.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 640x480,1280x960] [--densities 8,30]
+        [--points 3,8] [--backends native] [--repeat 3] [--output results.json]
+        [--compare baseline.json] [--threshold 0.25]
+
+With --compare the results are checked against a saved run; the exit status is
+1 if any stage got slower (p50) or bigger (peak memory) by more than the threshold.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.insert(0, SRC)
+
+from frame import Frame
+from stars import extract_stars
+from simulator import StarFieldSimulator
+from native_solver import NativeSolver
+from solver import PlateSolver
+from axis_fit import AxisEstimator
+from mount import OnStepMount
+from onstep_sim import FakeOnStep
+from aligner import PolarAligner
+
+STAGES = ["index", "capture", "extract", "solve_blind", "solve_hinted", "transform_astropy",
+          "transform_fast", "fit", "mount_query", "adjust"]
+POLE_DISTANCE = 1.5 # Camera offset from the RA axis in degrees
+MIN_VALUE = 0.01 # Baseline values (ms or KiB) below this are noise and not compared
+
+class StageRecorder:
+    """Collects durations (and optionally tracemalloc peaks) per stage."""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.times = {}
+        self.peaks = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+        else:
+            self.times.setdefault(name, []).append(elapsed * 1000.0)
+
+class NullRecorder:
+    """Recorder for warm-up runs."""
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        yield
+
+def run_config(width, height, density, n_points, backend, repeat, cache_dir):
+    """Runs one configuration. Returns {stage: statistics} and the solve failure count."""
+    timed = StageRecorder()
+    failures = run_pipeline(timed, width, height, density, n_points, backend, repeat, cache_dir)
+    tracemalloc.start()
+    try:
+        profiled = StageRecorder(memory=True)
+        run_pipeline(profiled, width, height, density, n_points, backend, 1, cache_dir)
+    finally:
+        tracemalloc.stop()
+
+    stages = {}
+    for name in STAGES:
+        if name not in timed.times:
+            continue
+        t = np.array(timed.times[name])
+        stages[name] = {
+            'n': int(t.size),
+            'mean_ms': float(t.mean()),
+            'p50_ms': float(np.percentile(t, 50)),
+            'p90_ms': float(np.percentile(t, 90)),
+            'p99_ms': float(np.percentile(t, 99)),
+            'max_ms': float(t.max()),
+            'peak_kib': profiled.peaks.get(name, 0) / 1024.0,
+        }
+    return stages, failures
+
+def run_pipeline(recorder, width, height, density, n_points, backend, repeat, cache_dir):
+    fov = 3.0
+    axis_ra, axis_dec = 0.0, 89.6
+    sim = StarFieldSimulator(width=width, height=height, fov_deg=fov, star_density=density, seed=11)
+    with recorder.stage("index"):
+        engine = NativeSolver(*sim.stars_near(axis_ra, axis_dec, POLE_DISTANCE + fov + 1.0), fov_deg=fov)
+    solver = PlateSolver(backend=backend, native_solver=engine if backend == "native" else None,
+                         fallback=False, cache_size=0)
+    astropy_aligner = PolarAligner(None, solver, None, cache_dir=cache_dir)
+    fast_aligner = PolarAligner(None, solver, None, cache_dir=cache_dir, transform_backend="fast")
+
+    failures = 0
+    with FakeOnStep() as fake:
+        mount = OnStepMount(port=fake.port)
+        mount.connect()
+        try:
+            # The first run fills caches (node astrometry, frame buffers) and is not recorded
+            for run in range(repeat + 1):
+                rec = recorder if run > 0 else NullRecorder()
+                points = []
+                for k in range(n_points):
+                    ra, dec = _pointing(axis_ra, axis_dec, POLE_DISTANCE, 360.0 * k / max(n_points, 3))
+                    roll = 10.0 + 360.0 * k / max(n_points, 3)
+                    with rec.stage("capture"):
+                        frame = Frame(sim.render(ra, dec, roll), timestamp=time.time())
+                    with rec.stage("extract"):
+                        extract_stars(frame)
+                    with rec.stage("solve_blind"):
+                        sol = solver.solve(frame)
+                    with rec.stage("solve_hinted"):
+                        hinted = solver.solve(frame, search_radius=2.0, hint={'ra': ra + 0.2, 'dec': dec - 0.1})
+                    sol = sol or hinted
+                    if sol is None:
+                        failures += 1
+                        continue
+                    points.append((sol['ra'], sol['dec'], frame.timestamp))
+                if len(points) < 3:
+                    continue
+                ra_arr, dec_arr, ts = np.array(points).T
+                with rec.stage("transform_astropy"):
+                    astropy_aligner._icrs_to_altaz(ra_arr, dec_arr, ts)
+                with rec.stage("transform_fast"):
+                    alt, az = fast_aligner._icrs_to_altaz(ra_arr, dec_arr, ts)
+                with rec.stage("fit"):
+                    estimator = AxisEstimator()
+                    for a, z in zip(alt, az):
+                        estimator.add(a, z)
+                    estimator.axis_altaz()
+                with rec.stage("mount_query"):
+                    mount.get_position()
+                with rec.stage("adjust"):
+                    mount.move_base(25, -25).result(timeout=10.0)
+        finally:
+            mount.disconnect()
+    return failures
+
+def _pointing(axis_ra, axis_dec, radius, angle):
+    """RA/Dec of a point at radius (deg) from the axis, at position angle angle (deg)."""
+    a0, d0 = math.radians(axis_ra), math.radians(axis_dec)
+    r, t = math.radians(radius), math.radians(angle)
+    dec = math.asin(math.sin(d0) * math.cos(r) + math.cos(d0) * math.sin(r) * math.cos(t))
+    ra = a0 + math.atan2(math.sin(t) * math.sin(r) * math.cos(d0), math.cos(r) - math.sin(d0) * math.sin(dec))
+    return math.degrees(ra) % 360.0, math.degrees(dec)
+
+def config_key(config):
+    return f"{config['width']}x{config['height']}/d{config['density']:g}/n{config['points']}/{config['backend']}"
+
+def compare(results, baseline, threshold):
+    """
+    Compares results to a baseline run.
+
+    Returns:
+        list: (config key, stage, metric, baseline value, new value) of every regression.
+    """
+    old = {config_key(r['config']): r['stages'] for r in baseline['results']}
+    regressions = []
+    for r in results['results']:
+        key = config_key(r['config'])
+        if key not in old:
+            continue
+        for stage, stats in r['stages'].items():
+            before = old[key].get(stage)
+            if before is None:
+                continue
+            for metric in ('p50_ms', 'peak_kib'):
+                if before[metric] > MIN_VALUE and stats[metric] > before[metric] * (1.0 + threshold):
+                    regressions.append((key, stage, metric, before[metric], stats[metric]))
+    return regressions
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def _sizes(text):
+    return [tuple(int(v) for v in s.split('x')) for s in text.split(',')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_sizes, default=_sizes("640x480,1280x960"), help="Image sizes, WxH,...")
+    parser.add_argument("--densities", default="8,30", help="Star densities per square degree.")
+    parser.add_argument("--points", default="3,8", help="Numbers of measurement points.")
+    parser.add_argument("--backends", default="native", help="Solver backends (native, astap).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per configuration.")
+    parser.add_argument("--cache-dir", default=os.path.join(SRC, "../../../../cache"), help="IERS cache directory.")
+    parser.add_argument("--output", default=None, help="Write the results as JSON.")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown.")
+    args = parser.parse_args(argv)
+
+    backends = args.backends.split(',')
+    if "astap" in backends and shutil.which("astap") is None:
+        print("ASTAP not installed, skipping the astap backend.")
+        backends.remove("astap")
+    densities = [float(d) for d in args.densities.split(',')]
+    point_counts = [int(n) for n in args.points.split(',')]
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'node': platform.node(),
+            'commit': _git_commit(),
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+    for (width, height), density, n_points, backend in itertools.product(args.sizes, densities, point_counts, backends):
+        config = {'width': width, 'height': height, 'density': density, 'points': n_points, 'backend': backend}
+        stages, failures = run_config(width, height, density, n_points, backend, args.repeat,
+                                      os.path.abspath(args.cache_dir))
+        results['results'].append({'config': config, 'stages': stages, 'solve_failures': failures})
+
+        print(f"\n{config_key(config)}  (solve failures: {failures})")
+        print(f"  {'stage':<18} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'peak KiB':>10}")
+        for stage, s in stages.items():
+            print(f"  {stage:<18} {s['p50_ms']:>9.2f} {s['p90_ms']:>9.2f} {s['p99_ms']:>9.2f} "
+                  f"{s['max_ms']:>9.2f} {s['peak_kib']:>10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} ({baseline['meta'].get('commit')}, "
+              f"{baseline['meta'].get('timestamp')}), threshold {args.threshold:.0%}:")
+        for key, stage, metric, before, after in regressions:
+            print(f"  REGRESSION {key} {stage} {metric}: {before:.2f} -> {after:.2f}")
+        if regressions:
+            return 1
+        print("  no regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Startup benchmark for the polar alignment package.
+
+Measures, each in a fresh interpreter:
+- the import time of every module in src/ (and the heavy third-party packages
+  for reference),
+- the wall time of complete CLI commands, from process start to exit.
+
+Usage:
+    python benchmarks/startup.py [--repeat N] [--json results.json] [--check]
+
+With --check the exit status is 1 if the mount-only command exceeds its budget.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+# Every module of the package; __init__ and __main__ are entry points, not modules
+MODULES = sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(SRC, "*.py"))
+                 if not os.path.basename(p).startswith("__"))
+THIRD_PARTY = ["numpy", "serial", "cv2", "requests", "astropy.units", "astropy.coordinates"]
+
+COMMANDS = {
+    "mount position (mock)": ["mount", "position", "--mock"],
+    "--help": ["--help"],
+}
+MOUNT_BUDGET_MS = 200.0
+
+def import_time_ms(module, repeat):
+    """Best-of-repeat import time of a module in a fresh interpreter, in ms."""
+    code = ("import sys, time; sys.path.insert(0, %r); t = time.perf_counter(); import %s; "
+            "print((time.perf_counter() - t) * 1000.0)" % (SRC, module))
+    best = float('inf')
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        best = min(best, float(out.stdout.strip().splitlines()[-1]))
+    return best
+
+def command_time_ms(args, repeat):
+    """Best-of-repeat wall time of a CLI command, including interpreter startup, in ms."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SRC] + args, capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000.0)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, the fastest is kept.")
+    parser.add_argument("--json", default=None, help="Write the results to this file.")
+    parser.add_argument("--check", action="store_true", help="Fail if the mount command is over budget.")
+    args = parser.parse_args(argv)
+
+    results = {'python': sys.version.split()[0], 'imports': {}, 'third_party': {}, 'commands': {}}
+    baseline = import_time_ms("sys", args.repeat)
+
+    print(f"{'module':<22} {'import ms':>10}")
+    for name in MODULES:
+        results['imports'][name] = ms = import_time_ms(name, args.repeat) - baseline
+        print(f"{name:<22} {ms:>10.1f}")
+    print()
+    for name in THIRD_PARTY:
+        results['third_party'][name] = ms = import_time_ms(name, args.repeat) - baseline
+        print(f"{name:<22} {ms:>10.1f}")
+    print()
+    print(f"{'command':<22} {'wall ms':>10}")
+    for label, cmd in COMMANDS.items():
+        results['commands'][label] = ms = command_time_ms(cmd, args.repeat)
+        print(f"{label:<22} {ms:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    mount_ms = results['commands']["mount position (mock)"]
+    if mount_ms > MOUNT_BUDGET_MS:
+        print(f"\nMount command took {mount_ms:.0f} ms, budget is {MOUNT_BUDGET_MS:.0f} ms")
+        if args.check:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Modules import each other by plain name, as in the tests
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
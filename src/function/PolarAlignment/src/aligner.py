@@ -1,22 +1,92 @@
 import numpy as np
 import time
-from astropy.coordinates import SkyCoord, EarthLocation, AltAz
-from astropy.time import Time
-import astropy.units as u
-from iers_manager import setup_iers
+import asyncio
+import contextlib
+from concurrent.futures import Future
+from axis_fit import AxisEstimator, _altaz_to_vec
+from stars import extract_stars
+from tracking import StarTracker, pixel_to_radec
+from settle import SettleDetector
+import math
 import os
+import logging
+import tracing
+
+logger = logging.getLogger(__name__)
 
 class PolarAligner:
     """
     Automated Polar Alignment Controller.
     """
-    def __init__(self, camera, solver, mount, location=None, cache_dir="../../../../cache"):
+    def __init__(self, camera, solver, mount, location=None, cache_dir="../../../../cache",
+                 hint_radius=5.0, ra_step=30.0, max_points=3, target_uncertainty=None,
+                 point_sigma=10.0, pixel_scale=None, live_max_stars=30, settle_time=1.0,
+                 settle_threshold=8.0, settle_timeout=10.0, transform_backend="astropy"):
+        """
+        Args:
+            camera: Frame source (GuideCamera).
+            solver: Plate solver (PlateSolver).
+            mount: Mount interface (OnStepMount).
+            location (EarthLocation, optional): Observer location.
+            cache_dir (str): IERS cache directory, relative to this file if not absolute.
+            hint_radius (float): Search radius in degrees for solves hinted by the
+                predicted pointing after an RA rotation.
+            ra_step (float): RA rotation between measurements in degrees.
+            max_points (int): Maximum number of accepted measurements.
+            target_uncertainty (float, optional): Stop as soon as the axis uncertainty
+                (1 sigma, arcsec) drops below this value. Without it exactly
+                max_points measurements are taken.
+            point_sigma (float): Expected error of a solved position in arcsec.
+            pixel_scale (float, optional): Camera pixel scale in arcsec/pixel, used in
+                live mode when the solver does not report one.
+            live_max_stars (int): Brightest stars tracked per frame in live mode.
+            settle_time (float): Fixed wait after each RA rotation, used when settling
+                is not measured, in seconds.
+            settle_threshold (float, optional): The mount counts as settled once the field
+                moves less than this between frames, in arcsec. Converted with the solved
+                (or configured) pixel scale, and raised to 3x the measured centroid noise,
+                see SettleDetector. None always uses settle_time.
+            settle_timeout (float): Longest wait for the mount to settle, in seconds.
+            transform_backend (str): ICRS to Alt/Az conversion, "astropy" (SkyCoord
+                frames) or "fast" (fast_transform.FastAltAz, about 30x faster per call,
+                within 0.01 arcsec of astropy).
+            
+        Raises:
+            ValueError: If transform_backend is unknown.
+        """
+        # Astropy takes about a second to import, it is only loaded once an aligner is built
+        from astropy.coordinates import EarthLocation
+        import astropy.units as u
+        from iers_manager import setup_iers
         self.camera = camera
         self.solver = solver
         self.mount = mount
         # Default location: Beijing (Example)
-        self.location = location if location else EarthLocation(lat=39.9*u.deg, lon=116.4*u.deg, height=50*u.m)
-        self.points = []
+        self.location = location if location is not None else EarthLocation(lat=39.9*u.deg, lon=116.4*u.deg, height=50*u.m)
+        self.points = [] # Accepted measurements (ra, dec, capture time)
+        self.hint_radius = hint_radius
+        self.ra_step = ra_step
+        self.max_points = max(3, max_points)
+        self.target_uncertainty = target_uncertainty
+        self.point_sigma = point_sigma
+        self.axis_estimator = None
+        self.pixel_scale = pixel_scale
+        self.live_max_stars = live_max_stars
+        self.live_status = None
+        self.settle_time = settle_time
+        self.settle_detector = SettleDetector(settle_threshold, settle_timeout) if settle_threshold is not None else None
+        self.settle_log = []
+        self.timings = []
+        self.timing_report = None
+        self.adjustment = None # Result of the last base correction, 'finished' is when to re-measure
+        self._last_vec = None
+        self._solved_scale = None
+        self._reference = None # (camera vector, axis vector) in Alt/Az at the end of the measurement
+        if transform_backend not in ("astropy", "fast"):
+            raise ValueError(f"Unknown transform backend '{transform_backend}'")
+        self.transform_backend = transform_backend
+        self._fast_altaz = None
+        self._altaz_frame = None # (location, capture times, AltAz frame) of the last astropy transform
         
         # Initialize IERS
         # Resolve cache dir relative to this file if it's a relative path
@@ -26,38 +96,307 @@ class PolarAligner:
         setup_iers(cache_dir) 
         
     def run_alignment(self):
-        print("Starting Polar Alignment Routine...")
+        with tracing.span('alignment', pipelined=False, max_points=self.max_points):
+            logger.info("Starting Polar Alignment Routine...")
         
-        # 1. Measurement Phase
-        self.points = []
-        angles = [0, 30, 30] # Rotate 0, then +30, then +30
+            # 1. Measurement Phase
+            # Points stream into the axis estimator as they are solved. Failed or
+            # rejected solves cost one extra frame, up to twice the point budget.
+            self.points = []
+            estimator = self.axis_estimator = AxisEstimator(point_sigma_arcsec=self.point_sigma)
         
-        for angle in angles:
-            if angle != 0:
-                print(f"Rotating RA by {angle} degrees...")
-                self.mount.slew_ra_relative(angle)
-                time.sleep(1) # Wait for vibration
+            last_sol = None
+            rotated = 0.0 # RA rotation commanded since the last solution
+            for attempt in range(2 * self.max_points):
+                if attempt > 0:
+                    logger.info("Rotating RA by %s degrees...", self.ra_step)
+                    with tracing.span('slew', degrees=self.ra_step):
+                        self.mount.slew_ra_relative(self.ra_step)
+                    rotated += self.ra_step
+                    frame = self._settle() # Wait for vibration
+                else:
+                    frame = None
                 
-            print("Capturing and Solving...")
-            img = self.camera.capture_frame()
-            sol = self.solver.solve(img)
+                logger.info("Capturing and Solving...")
+                if frame is None:
+                    frame = self.camera.capture_frame()
+                hint = self._predict_pointing(last_sol, rotated) if last_sol else None
+                sol = self._solve(frame, hint)
             
-            if not sol:
-                print("Solving failed. Aborting.")
-                return False
+                if not sol:
+                    logger.warning("Solving failed. Skipping frame.")
+                    continue
                 
-            print(f"  Solved: RA={sol['ra']:.4f}, Dec={sol['dec']:.4f}")
-            self.points.append((sol['ra'], sol['dec']))
+                last_sol = sol
+                rotated = 0.0
+                self._add_point(estimator, sol, frame)
+                if self._measurement_done(estimator):
+                    break
+        
+            if estimator.count < 3:
+                logger.error("Not enough solved points. Aborting.")
+                return False
+            
+            # 2. Calculation Phase
+            steps_alt, steps_az = self._compute_correction(estimator)
+        
+            # 3. Adjustment Phase
+            try:
+                with tracing.span('move', alt_steps=int(steps_alt), az_steps=int(steps_az)):
+                    self.adjustment = self._move_base(steps_alt, steps_az).result()
+            except TimeoutError as e:
+                logger.error("Adjustment failed: %s", e)
+                return False
+        
+            logger.info("Adjustment Complete.")
+            return True
+
+    async def run_alignment_async(self):
+        """
+        Pipelined version of run_alignment.
+        Slewing, settling and capturing run in order on the mount/camera side, while
+        each frame is plate solved in the background. The next RA rotation starts as
+        soon as a frame is captured, so the total time is close to the slew and settle
+        time plus one solve.
+        
+        Camera, mount and solver calls are awaited through _call_async: objects may
+        provide '<method>_async' coroutines, otherwise the blocking method runs in a
+        worker thread.
+        
+        Per-phase spans are recorded in self.timings, and self.timing_report holds
+        the per-phase totals and the critical path.
+        
+        Returns:
+            bool: True if the alignment completed.
+        """
+        with tracing.span('alignment', pipelined=True, max_points=self.max_points):
+            logger.info("Starting Polar Alignment Routine (pipelined)...")
+            self.points = []
+            self.timings = []
+            estimator = self.axis_estimator = AxisEstimator(point_sigma_arcsec=self.point_sigma)
+            start = time.perf_counter()
+            solved = {'sol': None, 'rotation': 0.0} # last solution and the total rotation at its capture
+            pending = [] # solve tasks not yet finished, in capture order
+        
+            async def solve_point(frame, rotation, previous, capture_span):
+                # Solves run in capture order: each one is hinted by the previous solution
+                deps = [capture_span]
+                if previous is not None:
+                    deps.append(await previous)
+                if self._measurement_done(estimator):
+                    return deps[-1]
+                hint = None
+                if solved['sol'] is not None:
+                    hint = self._predict_pointing(solved['sol'], rotation - solved['rotation'])
+                async with self._span('solve', deps) as span:
+                    sol = await self._solve_async(frame, hint)
+                if not sol:
+                    logger.warning("Solving failed. Skipping frame.")
+                    return span
+                solved['sol'], solved['rotation'] = sol, rotation
+                self._add_point(estimator, sol, frame)
+                return span
+        
+            rotation = 0.0
+            last_span = None
+            for attempt in range(2 * self.max_points):
+                # Frames still being solved may complete the measurement, wait for them before slewing further
+                while pending and estimator.count + len(pending) >= self.max_points:
+                    await pending.pop(0)
+                if self._measurement_done(estimator):
+                    break
+                if attempt > 0:
+                    logger.info("Rotating RA by %s degrees...", self.ra_step)
+                    async with self._span('slew', [last_span]) as last_span:
+                        with tracing.span('slew', degrees=self.ra_step):
+                            await self._call_async(self.mount, 'slew_ra_relative', self.ra_step)
+                    rotation += self.ra_step
+                    async with self._span('settle', [last_span]) as last_span:
+                        frame = await asyncio.to_thread(self._settle)
+                else:
+                    frame = None
             
-        # 2. Calculation Phase
-        center_alt, center_az = self._calculate_rotation_center()
-        print(f"Mechanical Axis calculated at: Alt={center_alt.to_value(u.deg):.4f}, Az={center_az.to_value(u.deg):.4f}")
+                if frame is None:
+                    async with self._span('capture', [last_span]) as last_span:
+                        frame = await self._call_async(self.camera, 'capture_frame')
+                previous = pending[-1] if pending else None
+                pending.append(asyncio.ensure_future(solve_point(frame, rotation, previous, last_span)))
+            for task in pending:
+                await task
+        
+            self.timing_report = self._timing_report(time.perf_counter() - start)
+            logger.info("Measurement took %.2f s, critical path: %s", self.timing_report['wall'],
+                        " -> ".join(f"{phase}({d:.2f}s)" for phase, d in self.timing_report['critical_path']))
+        
+            if estimator.count < 3:
+                logger.error("Not enough solved points. Aborting.")
+                return False
+        
+            steps_alt, steps_az = self._compute_correction(estimator)
+            try:
+                with tracing.span('move', alt_steps=int(steps_alt), az_steps=int(steps_az)):
+                    self.adjustment = await asyncio.wrap_future(self._move_base(steps_alt, steps_az))
+            except TimeoutError as e:
+                logger.error("Adjustment failed: %s", e)
+                return False
+            logger.info("Adjustment Complete.")
+            return True
+
+    def _move_base(self, steps_alt, steps_az):
+        """
+        Starts the alignment base correction on both axes.
+
+        Returns:
+            Future: Resolves once both axes have stopped (see OnStepMount.move_base).
+            Mounts without move_base get the two moves sent back to back and an
+            already finished future.
+        """
+        move_base = getattr(self.mount, 'move_base', None)
+        if move_base is not None:
+            return move_base(steps_alt, steps_az)
+        self.mount.move_alt_steps(steps_alt)
+        self.mount.move_az_steps(steps_az)
+        future = Future()
+        future.set_result({'alt': steps_alt, 'az': steps_az, 'elapsed': None, 'finished': time.time()})
+        return future
+
+    def _settle(self):
+        """
+        Waits for the mount to settle after a slew.
+        Settling is measured on the frame stream unless settle_threshold is None,
+        in which case the fixed settle_time is used. The threshold is converted with
+        the pixel scale of the last solution (or pixel_scale); before either is
+        known the detector's pixel threshold applies.
+        Every settle is recorded in self.settle_log.
+        If the mount publishes telemetry, a goto still in progress is waited out first.
+        
+        Returns:
+            Frame: The first steady frame, ready to be solved, or None after a fixed wait.
+        """
+        with tracing.span('settle') as span:
+            telemetry = getattr(self.mount, 'telemetry', None)
+            if telemetry is not None and telemetry.is_running:
+                deadline = time.monotonic() + getattr(self.mount, 'slew_timeout', 120.0)
+                state = telemetry.latest()
+                while (state is None or state.slewing) and time.monotonic() < deadline:
+                    try:
+                        state = telemetry.wait_for_update(state.seq if state is not None else None)
+                    except TimeoutError:
+                        break
+            if self.settle_detector is None:
+                span.set(method='fixed', settled=None)
+                time.sleep(self.settle_time)
+                self.settle_log.append({'settled': None, 'elapsed': self.settle_time, 'jitter': []})
+                return None
+            result = self.settle_detector.wait(self.camera.capture_frame, self.pixel_scale or self._solved_scale)
+            frame = result.pop('frame')
+            self.settle_log.append(result)
+            span.set(method='measured', settled=result['settled'], frames=len(result['jitter']))
+            if result['settled']:
+                logger.info("  Settled in %.2f s", result['elapsed'])
+            else:
+                logger.warning("  Mount did not settle within %.1f s. Capturing anyway.", self.settle_detector.timeout)
+            return frame
+
+    async def _call_async(self, obj, method, *args, **kwargs):
+        """Awaits obj.<method>_async if it exists, otherwise runs obj.<method> in a worker thread."""
+        native = getattr(obj, method + '_async', None)
+        if native is not None:
+            return await native(*args, **kwargs)
+        return await asyncio.to_thread(getattr(obj, method), *args, **kwargs)
+
+    async def _solve_async(self, frame, hint=None):
+        """Async counterpart of _solve."""
+        if hint is None:
+            return await self._call_async(self.solver, 'solve', frame)
+        sol = await self._call_async(self.solver, 'solve', frame, search_radius=self.hint_radius, hint=hint)
+        if sol is None:
+            logger.info("Hinted solve failed. Retrying blind.")
+            tracing.count('solve.retry_blind')
+            sol = await self._call_async(self.solver, 'solve', frame)
+        return sol
+
+    @contextlib.asynccontextmanager
+    async def _span(self, phase, deps):
+        """
+        Records the duration of a pipeline phase.
+        Spans are dicts {'phase', 'start', 'end', 'deps'}; deps are the spans this one waited for.
+        """
+        span = {'phase': phase, 'start': time.perf_counter(), 'end': None, 'deps': [d for d in deps if d is not None]}
+        try:
+            yield span
+        finally:
+            span['end'] = time.perf_counter()
+            self.timings.append(span)
+
+    def _timing_report(self, wall):
+        """
+        Summarises the recorded spans.
+        The critical path is found by walking back from the last span to finish,
+        always through the dependency that finished last.
+        
+        Returns:
+            dict: {'wall': seconds, 'phases': {phase: total seconds}, 'critical_path': [(phase, seconds), ...]}
+        """
+        phases = {}
+        for span in self.timings:
+            phases[span['phase']] = phases.get(span['phase'], 0.0) + span['end'] - span['start']
+        path = []
+        span = max(self.timings, key=lambda s: s['end']) if self.timings else None
+        while span is not None:
+            path.append((span['phase'], span['end'] - span['start']))
+            span = max(span['deps'], key=lambda s: s['end']) if span['deps'] else None
+        return {'wall': wall, 'phases': phases, 'critical_path': path[::-1]}
+
+    def _add_point(self, estimator, sol, frame):
+        """Stores a solved point and feeds it to the axis estimator. Returns True if it was accepted."""
+        logger.info("  Solved: RA=%.4f, Dec=%.4f", sol['ra'], sol['dec'])
+        if sol.get('scale'):
+            self._solved_scale = sol['scale']
+        # Convert at the capture time: each point has its own epoch. The new point goes
+        # through one batched transform together with the accepted ones, at nearly the cost of one.
+        timestamp = getattr(frame, 'timestamp', time.time())
+        ra, dec, timestamps = np.array(self.points + [(sol['ra'], sol['dec'], timestamp)], dtype=float).T
+        alt, az = self._icrs_to_altaz(ra, dec, timestamps)
+        alt, az = alt[-1], az[-1]
+        with tracing.span('fit') as span:
+            accepted = estimator.add(alt, az)
+            span.set(accepted=accepted, points=estimator.count)
+        if not accepted:
+            logger.info("  Point rejected as outlier.")
+            return False
+        self.points.append((sol['ra'], sol['dec'], timestamp))
+        # Remember where the camera pointed relative to the axis, so live mode can follow both
+        self._last_vec = _altaz_to_vec(alt, az)
+        if estimator.count >= 3:
+            logger.info("  Axis uncertainty: %.1f arcsec (%d points)", estimator.uncertainty_arcsec(), estimator.count)
+        return True
+
+    def _measurement_done(self, estimator):
+        """True once enough points are accepted or the axis is known well enough."""
+        if estimator.count >= self.max_points:
+            return True
+        return self.target_uncertainty is not None and estimator.uncertainty_arcsec() <= self.target_uncertainty
+
+    def _compute_correction(self, estimator):
+        """
+        Computes the alignment error of the fitted axis.
+        
+        Returns:
+            tuple: (steps_alt, steps_az) for the alignment base motors.
+        """
+        import astropy.units as u
+        self._reference = (self._last_vec, estimator.axis)
+        center_alt, center_az = estimator.axis_altaz()
+        center_alt = center_alt * u.deg
+        center_az = center_az * u.deg
+        logger.info("Mechanical Axis calculated at: Alt=%.4f, Az=%.4f", center_alt.to_value(u.deg), center_az.to_value(u.deg))
         
         # Target: NCP (Az=0, Alt=Lat)
         target_alt = self.location.lat
         target_az = 0.0 * u.deg
         
-        print(f"Target (NCP): Alt={target_alt.to_value(u.deg):.4f}, Az={target_az.to_value(u.deg):.4f}")
+        logger.info("Target (NCP): Alt=%.4f, Az=%.4f", target_alt.to_value(u.deg), target_az.to_value(u.deg))
         
         error_alt = target_alt - center_alt
         error_az = target_az - center_az
@@ -70,92 +409,208 @@ class PolarAligner:
             error_az_val += 360
         error_az = error_az_val * u.deg
         
-        print(f"Error: dAlt={error_alt.to_value(u.deg):.4f} deg, dAz={error_az.to_value(u.deg):.4f} deg")
+        logger.info("Error: dAlt=%.4f deg, dAz=%.4f deg", error_alt.to_value(u.deg), error_az.to_value(u.deg))
         
-        # 3. Adjustment Phase
         # Convert degrees to steps
         # Assuming mount.steps_per_degree_alt/az are available
         steps_alt = error_alt.to_value(u.deg) * self.mount.steps_per_degree_alt
         steps_az = error_az.to_value(u.deg) * self.mount.steps_per_degree_az
         
-        print(f"Adjusting: AltSteps={int(steps_alt)}, AzSteps={int(steps_az)}")
-        
-        self.mount.move_alt_steps(steps_alt)
-        self.mount.move_az_steps(steps_az)
-        
-        print("Adjustment Complete.")
-        return True
+        logger.info("Adjusting: AltSteps=%d, AzSteps=%d", int(steps_alt), int(steps_az))
+        return steps_alt, steps_az
 
-    def _calculate_rotation_center(self):
+    def run_live(self, callback=None, max_frames=None, stop_event=None, mount_tracking=False):
         """
-        Fits a circle to the 3 observed points (in Alt/Az) to find the center.
-        """
-        # Convert RA/Dec to Alt/Az for the current time
-        # We assume the 3 points were taken relatively quickly, so we use a single timestamp 
-        # for the conversion of all 3 to "freeze" the sky?
-        # NO. The mount rotated. The sky moved slightly. 
-        # But we want the MECHANICAL axis. 
-        # The Mechanical axis is fixed to the GROUND (Alt/Az).
-        # So we should convert each observation to Alt/Az using its specific timestamp.
-        # This removes the sky rotation (Earth rotation).
+        Live alignment feedback while the alignment base is adjusted by hand or by motors.
+        The camera pointing is anchored on one full plate solve and then followed by
+        tracking the detected stars from frame to frame, so the error is updated at
+        camera frame rate. The plate solver only runs again when tracking is lost.
+        The RA axis must not move after run_alignment.
         
-        now = Time.now()
-        # For simulation, we assume points are taken now
+        Each camera pointing is compared with the pointing at the end of the measurement.
+        The base rotation (Alt and Az adjustment) that explains the difference is applied
+        to the measured axis, which gives the current alignment error.
         
-        alt_az_points = []
-        for ra, dec in self.points:
-            coord = SkyCoord(ra=ra*u.deg, dec=dec*u.deg, frame='icrs')
-            aa = coord.transform_to(AltAz(obstime=now, location=self.location))
-            alt_az_points.append(aa)
-            
-        # Convert to cartesian for plane fitting
-        # x = cos(alt)cos(az)
-        # y = cos(alt)sin(az)
-        # z = sin(alt)
-        
-        vecs = []
-        for p in alt_az_points:
-            alt_rad = p.alt.rad
-            az_rad = p.az.rad
-            x = np.cos(alt_rad) * np.cos(az_rad)
-            y = np.cos(alt_rad) * np.sin(az_rad)
-            z = np.sin(alt_rad)
-            vecs.append(np.array([x, y, z]))
+        Args:
+            callback (callable, optional): Called with the status dict of every frame.
+            max_frames (int, optional): Stop after this many frames.
+            stop_event (threading.Event, optional): Stop when set.
+            mount_tracking (bool): Whether the RA axis tracks at sidereal rate. Tracked
+                pointings are converted to Alt/Az at the anchor time, untracked ones at
+                the frame time.
+                
+        Returns:
+            dict: The last status: {'timestamp', 'ra', 'dec', 'axis_alt', 'axis_az',
+            'dalt', 'daz', 'matches', 'resolved', 'tracked'}. Angles in degrees.
             
-        # Fit plane: P1, P2, P3
-        # Normal n = (P2-P1) x (P3-P1)
-        v1 = vecs[0]
-        v2 = vecs[1]
-        v3 = vecs[2]
-        
-        normal = np.cross(v2 - v1, v3 - v1)
-        norm_mag = np.linalg.norm(normal)
-        
-        if norm_mag < 1e-6:
-            # Collinear points (should not happen with 30deg rotation)
-            # Fallback: Just return the average position
-            avg_vec = (v1 + v2 + v3) / 3.0
-            normal = avg_vec / np.linalg.norm(avg_vec)
-        else:
-            normal = normal / norm_mag
+        Raises:
+            RuntimeError: If run_alignment has not measured the axis yet.
+        """
+        if self._reference is None:
+            raise RuntimeError("Live mode needs a measured axis. Run run_alignment first.")
+        v_ref, axis_ref = self._reference
+        tracker = StarTracker()
+        anchor = None
+        anchor_ts = None
+        frames = 0
+        status = None
+        
+        while max_frames is None or frames < max_frames:
+            if stop_event is not None and stop_event.is_set():
+                break
+            frames += 1
+            frame = self.camera.capture_frame()
+            timestamp = getattr(frame, 'timestamp', time.time())
+            height, width = frame.shape[:2]
+            with tracing.span('track', anchored=anchor is not None) as span:
+                stars = extract_stars(frame, max_stars=self.live_max_stars)
+                matches = tracker.track(stars) if anchor is not None else 0
+                span.set(stars=len(stars), matches=matches)
+            resolved = False
+            if not matches:
+                # Tracking lost (or not started): anchor on a full solve
+                hint = {'ra': status['ra'], 'dec': status['dec']} if status and status['tracked'] else None
+                sol = self._solve(frame, hint)
+                if sol is None or not (sol.get('scale') or self.pixel_scale):
+                    status = {'timestamp': timestamp, 'tracked': False, 'resolved': False}
+                    self._publish(status, callback)
+                    continue
+                anchor = dict(sol)
+                anchor.setdefault('scale', self.pixel_scale)
+                anchor_ts = timestamp
+                tracker.reset(stars)
+                matches = len(stars)
+                resolved = True
+                
+            x, y = tracker.to_anchor(width / 2.0, height / 2.0)
+            ra, dec = pixel_to_radec(anchor, x, y, width, height)
+            alt, az = self._icrs_to_altaz([ra], [dec], [anchor_ts if mount_tracking else timestamp])
+            rotation = self._base_rotation(v_ref, _altaz_to_vec(alt[0], az[0]), axis_ref)
+            axis = rotation @ axis_ref
+            axis_alt = math.degrees(math.asin(np.clip(axis[2], -1.0, 1.0)))
+            axis_az = math.degrees(math.atan2(axis[1], axis[0])) % 360.0
             
-        # Check direction: Should point roughly North (Az=0) and Up (Alt>0)
-        # Az=0 means x>0 (since Az=0 is North? Wait, convention)
-        # Astropy AltAz: Az is measured East of North? 0=N, 90=E.
-        # x = cos(alt)cos(az). If Az=0, x=cos(alt)>0.
-        # If normal.x < 0, flip it.
-        if normal[0] < 0: 
-            normal = -normal
+            status = {
+                'timestamp': timestamp,
+                'ra': ra,
+                'dec': dec,
+                'axis_alt': axis_alt,
+                'axis_az': axis_az,
+                'dalt': self.location.lat.deg - axis_alt,
+                'daz': (-axis_az + 180.0) % 360.0 - 180.0,
+                'matches': matches,
+                'resolved': resolved,
+                'tracked': True,
+            }
+            self._publish(status, callback)
+        return status
+
+    def _publish(self, status, callback):
+        self.live_status = status
+        if callback is not None:
+            callback(status)
+
+    def _base_rotation(self, v_from, v_to, axis):
+        """
+        Finds the alignment base rotation that moves a camera vector from v_from to v_to.
+        The base turns in Az about the zenith and in Alt about the horizontal axis
+        perpendicular to the polar axis. Solved with a few Gauss-Newton steps.
+        
+        Args:
+            v_from, v_to (np.ndarray): Camera unit vectors in Alt/Az (x=North, y=East, z=Up).
+            axis (np.ndarray): Polar axis unit vector, sets the direction of the Alt pivot.
             
-        # Convert normal back to Alt/Az
-        # z = sin(alt) => alt = arcsin(z)
-        # y/x = tan(az) => az = arctan2(y, x)
+        Returns:
+            np.ndarray: 3x3 rotation matrix.
+        """
+        az = math.atan2(axis[1], axis[0])
+        pivot = np.array([math.sin(az), -math.cos(az), 0.0])
+        zenith = np.array([0.0, 0.0, 1.0])
+        def base(p):
+            return _rotation_matrix(zenith, p[1]) @ _rotation_matrix(pivot, p[0])
         
-        center_alt_rad = np.arcsin(normal[2])
-        center_az_rad = np.arctan2(normal[1], normal[0])
+        p = np.zeros(2)
+        step = 1e-7
+        for _ in range(8):
+            current = base(p) @ v_from
+            jac = np.column_stack([(base(p + step * np.eye(2)[k]) @ v_from - current) / step for k in range(2)])
+            dp = np.linalg.lstsq(jac, v_to - current, rcond=None)[0]
+            p += dp
+            if np.abs(dp).max() < 1e-12:
+                break
+        return base(p)
+
+    def _predict_pointing(self, sol, ra_rotation):
+        """
+        Predicts where the camera points after rotating the RA axis from a solved position.
+        The RA axis is assumed to be close to the celestial pole, so the pointing moves
+        along its declination circle and the field rolls by the same angle.
         
-        # Handle Az wrapping
-        if center_az_rad < 0:
-            center_az_rad += 2 * np.pi
+        Args:
+            sol (dict): Previous solution with 'ra', 'dec' and optionally 'rotation'.
+            ra_rotation (float): Commanded RA rotation since that solution, in degrees.
             
-        return (center_alt_rad * 180 / np.pi) * u.deg, (center_az_rad * 180 / np.pi) * u.deg
+        Returns:
+            dict: Hint {'ra', 'dec', 'rotation'} in degrees.
+        """
+        hint = {
+            'ra': (sol['ra'] + ra_rotation) % 360.0,
+            'dec': sol['dec'],
+        }
+        if sol.get('rotation') is not None:
+            hint['rotation'] = (sol['rotation'] + ra_rotation) % 360.0
+        return hint
+
+    def _solve(self, frame, hint=None):
+        """Solves a frame near the hinted pointing, retrying blind if the hinted solve fails."""
+        if hint is None:
+            return self.solver.solve(frame)
+        sol = self.solver.solve(frame, search_radius=self.hint_radius, hint=hint)
+        if sol is None:
+            logger.info("Hinted solve failed. Retrying blind.")
+            tracing.count('solve.retry_blind')
+            sol = self.solver.solve(frame)
+        return sol
+
+    def _icrs_to_altaz(self, ra, dec, timestamps):
+        """
+        Converts ICRS positions to Alt/Az, each at its own capture time.
+        All points go through a single vectorized transform. The time-dependent
+        astrometry parameters are interpolated over 5 minute nodes instead of
+        being computed per point, which keeps the cost nearly flat in the
+        number of points (errors are far below a milliarcsecond). The AltAz
+        frame is cached and only rebuilt when the location or the capture
+        times change, so live mode re-converting at its anchor time skips it.
+        
+        Args:
+            ra, dec (array-like): ICRS coordinates in degrees.
+            timestamps (array-like): Unix capture times, one per point.
+            
+        Returns:
+            tuple: (alt, az) arrays in degrees.
+        """
+        with tracing.span('transform', backend=self.transform_backend, points=np.size(ra)):
+            if self.transform_backend == "fast":
+                if self._fast_altaz is None:
+                    from fast_transform import FastAltAz
+                    self._fast_altaz = FastAltAz.from_location(self.location)
+                return self._fast_altaz.transform(ra, dec, timestamps)
+            from astropy.coordinates import SkyCoord, AltAz
+            from astropy.coordinates.erfa_astrom import erfa_astrom, ErfaAstromInterpolator
+            from astropy.time import Time
+            import astropy.units as u
+            coords = SkyCoord(ra=np.asarray(ra, dtype=float)*u.deg, dec=np.asarray(dec, dtype=float)*u.deg, frame='icrs')
+            timestamps = np.array(timestamps, dtype=float)
+            cached = self._altaz_frame
+            if cached is None or cached[0] is not self.location or not np.array_equal(cached[1], timestamps):
+                frame = AltAz(obstime=Time(timestamps, format='unix'), location=self.location)
+                cached = self._altaz_frame = (self.location, timestamps, frame)
+            with erfa_astrom.set(ErfaAstromInterpolator(300 * u.s)):
+                aa = coords.transform_to(cached[2])
+            return aa.alt.to_value(u.deg), aa.az.to_value(u.deg)
+
+def _rotation_matrix(axis, angle):
+    """Right-handed rotation by angle (radians) about a unit axis (Rodrigues)."""
+    x, y, z = axis
+    k = np.array([[0.0, -z, y], [z, 0.0, -x], [-y, x, 0.0]])
+    return np.eye(3) + math.sin(angle) * k + (1.0 - math.cos(angle)) * (k @ k)
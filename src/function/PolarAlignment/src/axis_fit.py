@@ -0,0 +1,209 @@
+import math
+import itertools
+import numpy as np
+
+class AxisEstimator:
+    """
+    Streaming estimate of the mount's mechanical rotation axis.
+    While the RA axis turns, the camera's pointing traces a circle on the
+    sphere. That circle lies in a plane n . v = d, and the plane normal n is
+    the rotation axis. Each measurement updates weighted sums of v and v v^T,
+    so the least-squares plane, its normal and the normal's covariance are
+    updated in O(1) per point.
+
+    Bad solves are handled robustly. Points with a large residual are
+    down-weighted (Huber) or rejected. Repeated rejections trigger a RANSAC
+    re-seed over a small buffer of recent points, in case an early point
+    was the bad one.
+    """
+
+    def __init__(self, point_sigma_arcsec=10.0, huber_k=2.0, reject_sigma=8.0,
+                 reseed_after=2, buffer_size=16, min_sagitta_sigma=2.0):
+        """
+        Args:
+            point_sigma_arcsec (float): Expected measurement noise of a solved position.
+            huber_k (float): Residuals beyond huber_k sigma are down-weighted.
+            reject_sigma (float): Residuals beyond reject_sigma sigma are rejected.
+            reseed_after (int): Consecutive rejections that trigger a RANSAC re-seed.
+            buffer_size (int): Recent points kept for re-seeding.
+            min_sagitta_sigma (float): The plane is undetermined until the swept arc
+                bends away from its chord by more than this many point sigmas; until
+                then the axis falls back to the mean pointing with infinite uncertainty.
+        """
+        self.sigma = math.radians(point_sigma_arcsec / 3600.0)
+        self.huber_k = huber_k
+        self.reject_sigma = reject_sigma
+        self.reseed_after = reseed_after
+        self.buffer_size = buffer_size
+        self.min_sagitta = min_sagitta_sigma * self.sigma
+        self.rejected = 0
+        self._consecutive_rejects = 0
+        self._buffer = []
+        self._reset()
+
+    def _reset(self):
+        self._w = 0.0
+        self._s1 = np.zeros(3)
+        self._s2 = np.zeros((3, 3))
+        self._n = 0
+
+    @property
+    def count(self):
+        """Number of accepted points."""
+        return self._n
+
+    def add(self, alt_deg, az_deg):
+        """
+        Adds a measured pointing.
+
+        Args:
+            alt_deg, az_deg (float): Pointing in Alt/Az degrees.
+
+        Returns:
+            bool: True if the point was accepted, False if rejected as an outlier.
+        """
+        v = _altaz_to_vec(alt_deg, az_deg)
+        self._buffer.append(v)
+        if len(self._buffer) > self.buffer_size:
+            self._buffer.pop(0)
+
+        weight = 1.0
+        if self._n >= 3 and not self._fit()[4]:
+            r = abs(self.residual(v))
+            scale = self._noise()
+            if r > self.reject_sigma * scale:
+                self.rejected += 1
+                self._consecutive_rejects += 1
+                if self._consecutive_rejects >= self.reseed_after:
+                    self._reseed()
+                return False
+            if r > self.huber_k * scale:
+                weight = self.huber_k * scale / r
+
+        self._consecutive_rejects = 0
+        self._accumulate(v, weight)
+        if self._n >= 5 and self._noise() > 0.5 * self.reject_sigma * self.sigma:
+            # Residuals far above the expected noise: an early point is probably bad
+            self._reseed()
+        return True
+
+    def _accumulate(self, v, weight):
+        self._w += weight
+        self._s1 += weight * v
+        self._s2 += weight * np.outer(v, v)
+        self._n += 1
+
+    def _fit(self):
+        """Returns (normal, d, scatter eigenvalues, eigenvectors, degenerate) of the current plane fit."""
+        mean = self._s1 / self._w
+        scatter = self._s2 - self._w * np.outer(mean, mean)
+        evals, evecs = np.linalg.eigh(scatter)
+        # evals[2] is the spread along the chord swept so far, evals[1] the spread
+        # across it (the arc's sagitta). Only a sagitta well above the point noise
+        # pins down the plane; short arcs close to the axis are nearly straight.
+        degenerate = evals[1] < self._w * self.min_sagitta ** 2
+        if degenerate:
+            # Points coincide or lie on a line: the plane is undetermined.
+            # The camera is then looking (nearly) along the axis, or has not turned far enough.
+            normal = mean / np.linalg.norm(mean)
+        else:
+            normal = evecs[:, 0]
+        # Convention: axis points North (x > 0)
+        if normal[0] < 0:
+            normal = -normal
+        return normal, float(normal @ mean), evals, evecs, degenerate
+
+    def residual(self, v):
+        """Angular distance of a unit vector from the fitted circle, in radians."""
+        normal, d = self._fit()[:2]
+        return float(normal @ v - d) / _sin_radius(d)
+
+    def _noise(self):
+        """Noise level: prior sigma, or the fit residual scatter if larger."""
+        dof = self._n - 3
+        if dof > 0:
+            # The smallest scatter eigenvalue is the weighted sum of squared residuals
+            _, _, evals, _, degenerate = self._fit()
+            if not degenerate:
+                ss_res = max(evals[0], 0.0) * self._n / self._w
+                return max(self.sigma, math.sqrt(ss_res / dof) / _sin_radius(self._fit()[1]))
+        return self.sigma
+
+    @property
+    def axis(self):
+        """Current axis as a unit vector (x=North, y=East, z=Up), or None before the first point."""
+        if self._n == 0:
+            return None
+        return self._fit()[0]
+
+    def axis_altaz(self):
+        """
+        Returns:
+            tuple: (alt, az) of the axis in degrees, az in [0, 360).
+        """
+        normal = self.axis
+        alt = math.degrees(math.asin(max(-1.0, min(1.0, normal[2]))))
+        az = math.degrees(math.atan2(normal[1], normal[0])) % 360.0
+        return alt, az
+
+    def covariance(self):
+        """
+        Covariance of the axis direction in radians^2 (3x3, in the tangent plane of the axis).
+        Infinite until three points are available and while the plane is undetermined
+        (the mean pointing fallback says nothing about where the axis really is).
+        """
+        if self._n < 3:
+            return np.full((3, 3), np.inf)
+        normal, d, evals, evecs, degenerate = self._fit()
+        if degenerate:
+            return np.full((3, 3), np.inf)
+        noise2 = self._noise() ** 2
+        # An angular error moves a point off the plane by sin(radius) as much
+        noise2 *= _sin_radius(d) ** 2
+        cov = np.zeros((3, 3))
+        for j in (1, 2):
+            if evals[j] <= 0:
+                return np.full((3, 3), np.inf)
+            cov += noise2 / evals[j] * np.outer(evecs[:, j], evecs[:, j])
+        return cov
+
+    def uncertainty_arcsec(self):
+        """1-sigma uncertainty of the axis direction along its worst axis, in arcseconds."""
+        cov = self.covariance()
+        if not np.all(np.isfinite(cov)):
+            return math.inf
+        return math.degrees(math.sqrt(max(np.linalg.eigvalsh(cov)[-1], 0.0))) * 3600.0
+
+    def _reseed(self):
+        """Refits from the largest consistent subset of buffered points (RANSAC over all triples)."""
+        points = np.array(self._buffer)
+        if len(points) < 3:
+            return
+        idx = np.array(list(itertools.combinations(range(len(points)), 3)))
+        p0, p1, p2 = points[idx[:, 0]], points[idx[:, 1]], points[idx[:, 2]]
+        normals = np.cross(p1 - p0, p2 - p0)
+        norms = np.linalg.norm(normals, axis=1)
+        valid = norms > 1e-12
+        if not np.any(valid):
+            return
+        normals = normals[valid] / norms[valid, None]
+        offsets = np.einsum('ij,ij->i', normals, p0[valid])
+        gate = self.reject_sigma * self.sigma * np.sqrt(np.maximum(1.0 - offsets ** 2, 1e-12))
+        inliers = np.abs(points @ normals.T - offsets) < gate  # (points, triples)
+        best = inliers[:, np.argmax(inliers.sum(axis=0))]
+        if best.sum() < 3:
+            return
+        self._reset()
+        for v in points[best]:
+            self._accumulate(v, 1.0)
+        self._buffer = list(points[best])
+        self._consecutive_rejects = 0
+
+def _sin_radius(d):
+    """Sine of the angular radius of the circle cut by the plane n . v = d."""
+    return math.sqrt(max(1.0 - d * d, 1e-12))
+
+def _altaz_to_vec(alt_deg, az_deg):
+    alt = math.radians(alt_deg)
+    az = math.radians(az_deg)
+    return np.array([math.cos(alt) * math.cos(az), math.cos(alt) * math.sin(az), math.sin(alt)])
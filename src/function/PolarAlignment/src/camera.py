@@ -1,10 +1,141 @@
-import cv2
 import os
 import time
+import threading
+import collections
+import atexit
+import logging
+import weakref
 import numpy as np
-import math
-from astropy.coordinates import SkyCoord
-from astropy import units as u
+import tracing
+from frame import Frame
+from simulator import StarFieldSimulator
+
+logger = logging.getLogger(__name__)
+
+
+# Sessions still running at interpreter exit are stopped before native code is torn down
+_live_sessions = weakref.WeakSet()
+
+@atexit.register
+def _close_live_sessions():
+    for session in list(_live_sessions):
+        session.close()
+
+class CaptureSession:
+    """
+    Long-lived capture session.
+    A background reader thread keeps pulling frames from the device into a
+    bounded ring buffer of timestamped frames, so callers never pay the
+    device open/close cost and can ask for a frame taken after a given time.
+    """
+
+    def __init__(self, read_fn, release_fn=None, buffer_size=8, max_failures=10):
+        """
+        Start the session.
+
+        Args:
+            read_fn (callable): Returns (ok, frame) like cv2.VideoCapture.read.
+            release_fn (callable, optional): Called once when the session closes.
+            buffer_size (int): Number of frames kept in the ring buffer.
+            max_failures (int): Consecutive read failures before the session gives up.
+        """
+        self._read_fn = read_fn
+        self._release_fn = release_fn
+        self._max_failures = max_failures
+        # Entries are (start_time, timestamp, frame). start_time is taken just
+        # before the read call, so a frame is only "after T" if its read began after T.
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._running = True
+        self._error = None
+        self._thread = threading.Thread(target=self._reader_loop, name="CaptureSession", daemon=True)
+        self._thread.start()
+        _live_sessions.add(self)
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def _reader_loop(self):
+        failures = 0
+        while self._running:
+            start = time.time()
+            try:
+                ret, frame = self._read_fn()
+            except Exception as e:
+                ret, frame = False, None
+                self._error = e
+            if not ret or frame is None:
+                failures += 1
+                if failures >= self._max_failures:
+                    if self._error is None:
+                        self._error = RuntimeError("Failed to capture frame from camera")
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            with self._cond:
+                self._buffer.append((start, time.time(), frame))
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def latest(self):
+        """
+        Returns the most recent (timestamp, frame) tuple, or None if the buffer is empty.
+        """
+        with self._cond:
+            if not self._buffer:
+                return None
+            _, ts, frame = self._buffer[-1]
+            return ts, frame
+
+    def next_frame_after(self, t, timeout=5.0):
+        """
+        Returns the first buffered frame whose read started after time t.
+        Blocks until such a frame arrives.
+
+        Args:
+            t (float): Unix timestamp. Frames started at or before t are skipped.
+            timeout (float): Maximum time to wait in seconds.
+
+        Returns:
+            tuple: (timestamp, frame)
+
+        Raises:
+            TimeoutError: If no such frame arrives within timeout.
+            RuntimeError: If the reader thread stopped.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                for start, ts, frame in self._buffer:
+                    if start > t:
+                        return ts, frame
+                if not self._running:
+                    raise RuntimeError(f"Capture session stopped: {self._error}")
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No frame captured after t={t:.3f} within {timeout}s")
+                self._cond.wait(remaining)
+
+    def close(self):
+        """Stops the reader thread and releases the device."""
+        self._running = False
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        if self._release_fn is not None:
+            self._release_fn()
+            self._release_fn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
 class GuideCamera:
     """
@@ -26,13 +157,17 @@ class GuideCamera:
         (220.0, -80.0, 3.0),       # Random brightish star
     ]
 
-    def __init__(self, device_id=0, cache_dir="../../../../cache"):
+    def __init__(self, device_id=0, cache_dir="../../../../cache", catalog=None, frame_cache=None):
         """
         Initialize the camera.
         
         Args:
             device_id (int): The camera device ID (default 0).
             cache_dir (str): Relative path to the cache directory.
+            catalog (StarCatalog | str, optional): Catalog (or catalog file) of the
+                simulated sky. Defaults to the few bright stars in CATALOG.
+            frame_cache (FrameCache, optional): Where saved frames go. Defaults to a
+                FrameCache in <cache_dir>/frames, created on the first save.
         """
         self.device_id = device_id
         # Resolve absolute path for cache
@@ -45,11 +180,22 @@ class GuideCamera:
         self.gain = None
         self.exposure = None
         
+        # Streaming capture session (opened lazily on first capture)
+        self.session = None
+        self._cap = None
+        # Set when gain or exposure changed; the reader thread applies them between reads
+        self._settings_changed = threading.Event()
+        # Bounded store for frames that must go to disk
+        self.frame_cache = frame_cache
+        
         # Simulation State
         self.sim_ra = 0.0
         self.sim_dec = 90.0
         self.sim_roll = 0.0
         self.sim_fov_deg = 3.0 # Approx FOV for typical guide scope
+        self.sim_frame_interval = 0.05 # Simulated frame period in seconds
+        self.catalog = catalog
+        self.simulator = None # Created on first render from the catalog
 
     def set_simulation_pointing(self, ra, dec, roll=0.0):
         """Sets the pointing direction for the camera simulation."""
@@ -64,57 +210,72 @@ class GuideCamera:
     def set_gain(self, value):
         """
         Sets the gain for the camera.
+        An open device picks it up before its next read.
         
         Args:
             value (float): Gain value.
         """
         self.gain = value
-        print(f"Camera gain set to {self.gain}")
+        logger.info("Camera gain set to %s", self.gain)
+        self._settings_changed.set()
 
     def set_exposure(self, value):
         """
         Sets the exposure value for the camera.
+        An open device picks it up before its next read.
         
         Args:
             value (float): Exposure value.
         """
         self.exposure = value
-        print(f"Camera exposure set to {self.exposure}")
-            
-    def capture_frame(self, filename=None, exposure_time=1.0):
+        logger.info("Camera exposure set to %s", self.exposure)
+        self._settings_changed.set()
+
+    def open_session(self, buffer_size=8):
         """
-        Captures a single frame and saves it to the cache directory.
+        Opens the long-lived capture session if it is not already running.
+        Gain and exposure are applied once here rather than once per frame.
+        Falls back to a simulated star field stream if the device is unavailable.
         
         Args:
-            filename (str, optional): Name of the file to save. If None, generates timestamped name.
-            exposure_time (float): Simulated exposure time (sleep). Real exposure control depends on camera.
+            buffer_size (int): Number of frames kept in the ring buffer.
             
         Returns:
-            str: Absolute path to the saved image file.
-            
-        Raises:
-            RuntimeError: If camera cannot be opened or frame capture fails.
+            CaptureSession: The running session.
         """
-        if filename is None:
-            filename = f"capture_{int(time.time())}.jpg"
+        if self.session is not None and self.session.is_running:
+            return self.session
             
-        filepath = os.path.join(self.cache_dir, filename)
-        
-        # In a real scenario, we would set exposure time using v4l2 or camera props
-        # cap.set(cv2.CAP_PROP_EXPOSURE, ...)
-        
+        import cv2
         cap = cv2.VideoCapture(self.device_id)
         if not cap.isOpened():
-            # Fallback for testing without camera: Generate a noise image with some "stars"
-            print(f"Warning: Camera {self.device_id} not found. Generating dummy star field.")
-            return self._generate_dummy_image(filepath)
+            logger.warning("Camera %s not found. Generating dummy star field.", self.device_id)
+            cap.release()
+            self._cap = None
+            self.session = CaptureSession(self._read_simulated, buffer_size=buffer_size)
+            return self.session
             
-        # Apply settings if provided
+        self._cap = cap
+        self._settings_changed.clear()
+        self._apply_settings(cap)
+        self.session = CaptureSession(lambda: self._read_device(cap), release_fn=cap.release, buffer_size=buffer_size)
+        return self.session
+
+    def close_session(self):
+        """Stops the capture session and releases the device."""
+        if self.session is not None:
+            self.session.close()
+        self.session = None
+        self._cap = None
+
+    def _apply_settings(self, cap):
+        """Applies gain and exposure to an open device."""
+        import cv2
         if self.gain is not None:
             try:
                 cap.set(cv2.CAP_PROP_GAIN, self.gain)
             except Exception as e:
-                print(f"Warning: Failed to set gain: {e}")
+                logger.warning("Failed to set gain: %s", e)
 
         if self.exposure is not None:
             try:
@@ -122,117 +283,87 @@ class GuideCamera:
                 cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25) 
                 cap.set(cv2.CAP_PROP_EXPOSURE, self.exposure)
             except Exception as e:
-                print(f"Warning: Failed to set exposure: {e}")
-            
-        # Warmup / Flush buffer
-        for _ in range(5):
-            cap.read()
-            
-        ret, frame = cap.read()
-        cap.release()
-        
-        if not ret:
-            raise RuntimeError("Failed to capture frame from camera")
-            
-        # Save as grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        cv2.imwrite(filepath, gray)
-        
-        print(f"Captured frame saved to {filepath}")
-        return filepath
+                logger.warning("Failed to set exposure: %s", e)
 
-    def _generate_dummy_image(self, filepath):
+    def _read_device(self, cap):
         """
-        Generates a star field image based on simulation state.
-        Uses a combination of real catalog stars (NCP/SCP) and procedurally generated stars.
+        Frame source for the device session. Runs on the reader thread, which
+        owns the device: changed settings are applied here, never during a read.
         """
-        height, width = 480, 640
-        img = np.zeros((height, width), dtype=np.uint8)
-        
-        # Add random sensor noise
-        noise = np.random.randint(0, 20, (height, width), dtype=np.uint8)
-        img = cv2.add(img, noise)
-        
-        # Center of the image in Sky Coordinates
-        ra0 = math.radians(self.sim_ra)
-        dec0 = math.radians(self.sim_dec)
-        roll_rad = math.radians(self.sim_roll)
-        
-        # FOV in radians
-        fov_rad = math.radians(self.sim_fov_deg)
-        scale = width / fov_rad  # pixels per radian approx
-        
-        # 1. Project Catalog Stars
-        stars_to_draw = []
-        for (ra, dec, mag) in self.CATALOG:
-            stars_to_draw.append((ra, dec, mag))
-            
-        # 2. Generate Procedural Stars (Consistent for this RA/Dec region)
-        # Use a grid-based approach or just seeded random based on pointing
-        # For simplicity, we seed based on integer degrees of pointing
-        # This gives a consistent field "per degree". For smoother transition we'd need a spatial hash.
-        # But "all over the region" usually implies static shots.
-        seed_val = int(self.sim_ra * 10) ^ int(self.sim_dec * 10)
-        rng = np.random.RandomState(seed_val)
-        
-        num_random = 30
-        # Generate random stars within FOV roughly
-        # This is a hack: we generate them in RA/Dec relative to center
-        for _ in range(num_random):
-            d_ra = rng.uniform(-self.sim_fov_deg, self.sim_fov_deg)
-            d_dec = rng.uniform(-self.sim_fov_deg, self.sim_fov_deg)
-            
-            s_ra = self.sim_ra + d_ra
-            s_dec = self.sim_dec + d_dec
-            s_mag = rng.uniform(5, 10)
-            stars_to_draw.append((s_ra, s_dec, s_mag))
+        if self._settings_changed.is_set():
+            self._settings_changed.clear()
+            self._apply_settings(cap)
+        return cap.read()
+
+    def _read_simulated(self):
+        """Frame source for the simulated session. Mimics cv2.VideoCapture.read."""
+        time.sleep(self.sim_frame_interval)
+        return True, self._render_dummy_frame()
             
-        # Projection Logic (Standard Coordinates / Tangent Plane)
-        # (X, Y) on plane perpendicular to pointing vector
-        sin_dec0 = math.sin(dec0)
-        cos_dec0 = math.cos(dec0)
+    def capture_frame(self, filename=None, exposure_time=1.0):
+        """
+        Captures the next frame taken after this call.
+        Frames come from the streaming capture session, which is opened on first use,
+        and are returned in memory. Nothing is written to disk unless a filename is given.
         
-        for (ra_deg, dec_deg, mag) in stars_to_draw:
-            ra = math.radians(ra_deg)
-            dec = math.radians(dec_deg)
-            
-            sin_dec = math.sin(dec)
-            cos_dec = math.cos(dec)
-            cos_d_ra = math.cos(ra - ra0)
-            sin_d_ra = math.sin(ra - ra0)
-            
-            # Gnomonic projection formulas
-            # denom = sin(dec)*sin(dec0) + cos(dec)*cos(dec0)*cos(ra-ra0)
-            denom = sin_dec * sin_dec0 + cos_dec * cos_dec0 * cos_d_ra
-            
-            if denom <= 0: continue # Behind the camera
-            
-            xi = (cos_dec * sin_d_ra) / denom
-            eta = (sin_dec * cos_dec0 - cos_dec * sin_dec0 * cos_d_ra) / denom
-            
-            # Apply Roll (Rotation of the camera)
-            # x' = x cos(roll) - y sin(roll)
-            # y' = x sin(roll) + y cos(roll)
-            # Note: Astronomy roll convention might vary.
-            cos_roll = math.cos(roll_rad)
-            sin_roll = math.sin(roll_rad)
+        Args:
+            filename (str, optional): Write the frame to the frame cache under this name
+                (FITS or PNG, see save_frame). The write happens on a background thread.
+            exposure_time (float): Expected exposure of the next frame in seconds. It only
+                extends the wait for that frame; the exposure itself is set with set_exposure.
             
-            x_rot = xi * cos_roll - eta * sin_roll
-            y_rot = xi * sin_roll + eta * cos_roll
+        Returns:
+            Frame: The captured grayscale frame with its capture metadata.
             
-            # Convert to pixels (0,0 is center)
-            # In image coords, y is usually down. Sky coords eta is up (North).
-            # So we invert y.
-            px = int(width / 2 + x_rot * scale)
-            py = int(height / 2 - y_rot * scale)
+        Raises:
+            RuntimeError: If frame capture fails.
+            TimeoutError: If no new frame arrives in time.
+        """
+        with tracing.span('capture', exposure=self.exposure, gain=self.gain, device=self.device_id):
+            session = self.open_session()
+            timestamp, data = session.next_frame_after(time.time(), timeout=exposure_time + 5.0)
             
-            if 0 <= px < width and 0 <= py < height:
-                # brightness inversely proportional to magnitude
-                # Mag 2 -> Bright, Mag 10 -> Dim
-                # simple mapping
-                brightness = max(50, min(255, int(255 - (mag - 2) * 20)))
-                radius = max(1, int(4 - mag/3))
-                cv2.circle(img, (px, py), radius, brightness, -1)
+            # Grayscale conversion is the only copy on the capture path
+            if data.ndim == 3:
+                import cv2
+                data = cv2.cvtColor(data, cv2.COLOR_BGR2GRAY)
+            frame = Frame(data, timestamp=timestamp, exposure=self.exposure, gain=self.gain)
+        
+        if filename is not None:
+            self.save_frame(frame, filename)
+        return frame
+
+    def save_frame(self, frame, filename=None):
+        """
+        Queues a frame to be written to the frame cache in a lossless format.
+        The file gets a unique id in front of the name, so frames never overwrite
+        each other; old frames are evicted by the cache.
+        
+        Args:
+            frame (Frame): The frame to write.
+            filename (str, optional): Name (.fits or .png) to label the file with.
+                Without it the frame is written as FITS.
             
-        cv2.imwrite(filepath, img)
-        return filepath
+        Returns:
+            concurrent.futures.Future: Resolves to the absolute path once written.
+        """
+        if self.frame_cache is None:
+            from frame_cache import FrameCache
+            self.frame_cache = FrameCache(os.path.join(self.cache_dir, "frames"))
+        if filename is None:
+            return self.frame_cache.add(frame)
+        name, ext = os.path.splitext(filename)
+        return self.frame_cache.add(frame, ext or ".fits", name=name)
+
+    def _render_dummy_frame(self):
+        """
+        Renders a star field image based on simulation state.
+        Uses a combination of real catalog stars (NCP/SCP) and procedurally generated stars.
+        """
+        if self.simulator is None:
+            catalog = self.catalog if self.catalog is not None else self.CATALOG
+            if isinstance(catalog, str):
+                from catalog import StarCatalog
+                catalog = StarCatalog.from_file(catalog)
+            self.simulator = StarFieldSimulator(fov_deg=self.sim_fov_deg, catalog=catalog)
+        return self.simulator.render(self.sim_ra, self.sim_dec, self.sim_roll)
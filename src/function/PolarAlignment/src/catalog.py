@@ -0,0 +1,228 @@
+import os
+import math
+import numpy as np
+
+# One row per star. Rows are sorted by declination zone, then RA.
+STAR_DTYPE = np.dtype([
+    ('ra', '<f8'),        # Degrees, [0, 360)
+    ('dec', '<f8'),       # Degrees
+    ('mag', '<f4'),       # Visual magnitude
+    ('vec', '<f8', (3,)), # Unit vector, for exact cone tests without trigonometry
+])
+
+class StarCatalog:
+    """
+    Star catalog stored as a structured NumPy array, indexed by declination zone
+    and RA bin.
+
+    The sky is cut into zones of zone_deg in declination, each zone into bins of
+    ra_bin_deg in RA, and the rows are sorted by zone and RA. A small offset
+    table ('<file>.idx.npy', zones x (bins + 1)) gives the first row of every
+    bin. A cone search turns the cone into one or two row ranges per zone,
+    reads only those rows, and keeps the ones inside the cone.
+
+    Catalogs opened from disk are memory-mapped: a query touches the pages of
+    the rows it reads, not the whole file.
+    """
+
+    def __init__(self, stars, offsets):
+        """
+        Args:
+            stars (np.ndarray): Rows of STAR_DTYPE, sorted by zone and RA (see build).
+            offsets (np.ndarray): (zones, bins + 1) row offsets.
+        """
+        self.stars = stars
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.zone_deg = 180.0 / self.offsets.shape[0]
+        self.ra_bin_deg = 360.0 / (self.offsets.shape[1] - 1)
+
+    def __len__(self):
+        return len(self.stars)
+
+    @classmethod
+    def build(cls, ra, dec, mag, path=None, zone_deg=0.5, ra_bin_deg=1.0):
+        """
+        Builds a catalog from star positions.
+
+        Args:
+            ra, dec, mag (array-like): Positions in degrees and magnitudes.
+            path (str, optional): Also save the catalog there (see save).
+            zone_deg (float): Declination zone height in degrees.
+            ra_bin_deg (float): RA bin width in degrees.
+
+        Returns:
+            StarCatalog: The catalog, memory-mapped from path if one was given.
+        """
+        ra = np.asarray(ra, dtype=np.float64) % 360.0
+        dec = np.asarray(dec, dtype=np.float64)
+        mag = np.asarray(mag, dtype=np.float64)
+        n_zones = int(round(180.0 / zone_deg))
+        n_bins = int(round(360.0 / ra_bin_deg))
+        zone = _zone_of(dec, n_zones)
+        order = np.lexsort((ra, zone))
+
+        stars = np.empty(len(ra), dtype=STAR_DTYPE)
+        stars['ra'] = ra[order]
+        stars['dec'] = dec[order]
+        stars['mag'] = mag[order]
+        r, d = np.radians(stars['ra']), np.radians(stars['dec'])
+        stars['vec'] = np.column_stack([np.cos(d) * np.cos(r), np.cos(d) * np.sin(r), np.sin(d)])
+
+        # Row offsets of every (zone, bin) start, in the flattened sort order
+        keys = zone[order] * n_bins + np.minimum((stars['ra'] / (360.0 / n_bins)).astype(np.int64), n_bins - 1)
+        starts = np.searchsorted(keys, np.arange(n_zones * n_bins))
+        offsets = np.empty((n_zones, n_bins + 1), dtype=np.int64)
+        offsets[:, :-1] = starts.reshape(n_zones, n_bins)
+        offsets[:, -1] = np.append(offsets[1:, 0], len(stars))
+
+        catalog = cls(stars, offsets)
+        if path is not None:
+            catalog.save(path)
+            return cls.open(path)
+        return catalog
+
+    @classmethod
+    def from_file(cls, source, **kwargs):
+        """
+        Opens a saved catalog, or builds one from a plain catalog file
+        (.npz/.npy fields or .csv columns named ra, dec, mag, as for NativeSolver.from_file).
+        kwargs are passed to build.
+        """
+        if os.path.exists(_index_path(source)) and not kwargs:
+            return cls.open(source)
+        if os.path.splitext(source)[1].lower() == '.csv':
+            data = np.genfromtxt(source, delimiter=',', names=True)
+        else:
+            data = np.load(source)
+        return cls.build(data['ra'], data['dec'], data['mag'], **kwargs)
+
+    @classmethod
+    def from_stars(cls, stars, **kwargs):
+        """Builds an in-memory catalog from (ra, dec, mag) tuples."""
+        table = np.asarray(list(stars), dtype=np.float64).reshape(-1, 3)
+        return cls.build(table[:, 0], table[:, 1], table[:, 2], **kwargs)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-maps a catalog written by save."""
+        return cls(np.load(path, mmap_mode='r'), np.load(_index_path(path)))
+
+    def save(self, path):
+        """Writes the rows to path (.npy) and the offset table next to it, each atomically."""
+        for target, data in ((path, self.stars), (_index_path(path), self.offsets)):
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, np.asarray(data))
+            os.replace(tmp, target)
+
+    def cone_search(self, ra, dec, radius, mag_limit=None, max_stars=None):
+        """
+        Returns the stars within radius of a point.
+
+        Args:
+            ra, dec (float): Centre in degrees.
+            radius (float): Cone radius in degrees.
+            mag_limit (float, optional): Drop stars fainter than this.
+            max_stars (int, optional): Keep only the brightest max_stars.
+
+        Returns:
+            np.ndarray: Rows of STAR_DTYPE, in catalog order (brightest first with max_stars).
+        """
+        rows = self._rows(self.cone_ranges(ra, dec, radius))
+        center = _unit_vector(ra, dec)
+        keep = rows['vec'] @ center >= math.cos(math.radians(min(radius, 180.0)))
+        if mag_limit is not None:
+            keep &= rows['mag'] <= mag_limit
+        rows = rows[keep]
+        if max_stars is not None and len(rows) > max_stars:
+            rows = rows[np.argsort(rows['mag'], kind='stable')[:max_stars]]
+        return rows
+
+    def cone_ranges(self, ra, dec, radius):
+        """
+        Returns the row ranges [(start, stop), ...] that cover a cone.
+        Each declination zone the cone reaches contributes one range, or two
+        when the cone crosses RA 0.
+        """
+        radius = min(radius, 180.0)
+        n_zones, n_bins = self.offsets.shape[0], self.offsets.shape[1] - 1
+        lo_dec, hi_dec = dec - radius, dec + radius
+        z0 = _zone_of(np.array(max(lo_dec, -90.0)), n_zones)
+        z1 = _zone_of(np.array(min(hi_dec, 90.0)), n_zones)
+        # Largest RA offset of any point in the cone; a cone around a pole spans all RAs
+        width = _ra_half_width(radius, dec) if lo_dec > -90.0 and hi_dec < 90.0 else 180.0
+        whole = 2.0 * width >= 360.0 - self.ra_bin_deg
+        ranges = []
+        for z in range(int(z0), int(z1) + 1):
+            zone = self.offsets[z]
+            if whole:
+                ranges.append((zone[0], zone[-1]))
+                continue
+            b0 = math.floor(((ra - width) % 360.0) / self.ra_bin_deg)
+            b1 = math.floor(((ra + width) % 360.0) / self.ra_bin_deg) + 1
+            if b0 < b1:
+                ranges.append((zone[b0], zone[min(b1, n_bins)]))
+            else: # Crosses RA 0
+                ranges.append((zone[b0], zone[-1]))
+                ranges.append((zone[0], zone[min(b1, n_bins)]))
+        return [(int(a), int(b)) for a, b in ranges if b > a]
+
+    def brighter_than(self, mag_limit):
+        """Returns all stars at or brighter than mag_limit (reads the whole catalog)."""
+        return self.stars[np.asarray(self.stars['mag']) <= mag_limit]
+
+    def identify(self, ra, dec, max_sep_arcsec=30.0, mag_limit=None):
+        """
+        Finds the nearest catalog star of each position.
+
+        Args:
+            ra, dec (array-like): Positions in degrees, e.g. detected stars of one frame.
+            max_sep_arcsec (float): Larger separations count as unidentified.
+            mag_limit (float, optional): Only consider stars at or brighter than this.
+
+        Returns:
+            tuple: (rows, sep) - the matched catalog rows (STAR_DTYPE) and separations in
+            arcsec. Unidentified positions have sep = inf and an all-zero row.
+        """
+        ra = np.atleast_1d(np.asarray(ra, dtype=np.float64))
+        dec = np.atleast_1d(np.asarray(dec, dtype=np.float64))
+        vecs = _unit_vector(ra, dec)
+        center = vecs.sum(axis=0)
+        center /= np.linalg.norm(center)
+        c_ra, c_dec = math.degrees(math.atan2(center[1], center[0])) % 360.0, math.degrees(math.asin(center[2]))
+        spread = math.degrees(math.acos(np.clip((vecs @ center).min(), -1.0, 1.0)))
+        candidates = self.cone_search(c_ra, c_dec, spread + max_sep_arcsec / 3600.0, mag_limit=mag_limit)
+
+        rows = np.zeros(len(ra), dtype=STAR_DTYPE)
+        sep = np.full(len(ra), np.inf)
+        if len(candidates):
+            dots = vecs @ candidates['vec'].T
+            best = dots.argmax(axis=1)
+            best_sep = np.degrees(np.arccos(np.clip(dots[np.arange(len(ra)), best], -1.0, 1.0))) * 3600.0
+            found = best_sep <= max_sep_arcsec
+            rows[found] = candidates[best[found]]
+            sep[found] = best_sep[found]
+        return rows, sep
+
+    def _rows(self, ranges):
+        if not ranges:
+            return np.empty(0, dtype=STAR_DTYPE)
+        return np.concatenate([self.stars[a:b] for a, b in ranges])
+
+def _index_path(path):
+    return os.path.splitext(path)[0] + ".idx.npy"
+
+def _zone_of(dec, n_zones):
+    return np.clip(((np.asarray(dec) + 90.0) * n_zones / 180.0).astype(np.int64), 0, n_zones - 1)
+
+def _ra_half_width(radius, dec):
+    """Largest RA offset in degrees of a point in a cone of radius (deg) centred at declination dec (deg)."""
+    cos_dec = math.cos(math.radians(dec))
+    s = math.sin(math.radians(radius))
+    if s >= cos_dec:
+        return 180.0
+    return math.degrees(math.asin(s / cos_dec))
+
+def _unit_vector(ra, dec):
+    ra, dec = np.radians(ra), np.radians(dec)
+    return np.stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)], axis=-1)
@@ -0,0 +1,208 @@
+import argparse
+import logging
+import sys
+
+def build_parser():
+    """Returns the argument parser for all commands."""
+    parser = argparse.ArgumentParser(prog="polaralignment", description="CoolEq polar alignment tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_mount_args(p):
+        p.add_argument("--port", default="/dev/ttyUSB0", help="Serial port of the OnStep controller.")
+        p.add_argument("--baud", type=int, default=9600)
+        p.add_argument("--mock", action="store_true", help="Use the simulated mount.")
+
+    mount = commands.add_parser("mount", help="Mount commands (no camera, solver or Astropy needed).")
+    mount_commands = mount.add_subparsers(dest="action", required=True)
+    p = mount_commands.add_parser("position", help="Print RA/Dec and status.")
+    add_mount_args(p)
+    p = mount_commands.add_parser("slew-ra", help="Rotate the RA axis by a number of degrees.")
+    add_mount_args(p)
+    p.add_argument("degrees", type=float)
+    p = mount_commands.add_parser("move-base", help="Move the alignment base and wait until it stops.")
+    add_mount_args(p)
+    p.add_argument("alt_steps", type=int)
+    p.add_argument("az_steps", type=int)
+    p.add_argument("--timeout", type=float, default=None, help="Per-axis timeout in seconds.")
+
+    align = commands.add_parser("align", help="Run the automated polar alignment.")
+    add_mount_args(align)
+    align.add_argument("--camera", type=int, default=0, help="Camera device id.")
+    align.add_argument("--backend", choices=("astap", "native"), default=None,
+                       help="Plate solver backend (default: astap). The native backend needs --catalog.")
+    align.add_argument("--catalog", default=None, help="Catalog file for the native solver.")
+    align.add_argument("--pool", action="store_true",
+                       help="Race native and ASTAP solve strategies in a process pool, first solution wins. "
+                            "Cannot be combined with --backend or --workers.")
+    align.add_argument("--workers", type=int, default=0,
+                       help="Solve in this many warm worker processes that keep the catalog loaded (0: in-process).")
+    align.add_argument("--ra-step", type=float, default=30.0, help="RA rotation between measurements, degrees.")
+    align.add_argument("--points", type=int, default=3, help="Maximum number of measurements.")
+    align.add_argument("--trace", default=None, metavar="FILE", help="Record per-phase timing spans to FILE.")
+    align.add_argument("--trace-format", choices=("jsonl", "chrome"), default="jsonl",
+                       help="Trace file format: JSON lines or Chrome trace (chrome://tracing, Perfetto).")
+
+    catalog = commands.add_parser("catalog", help="Build or query a star catalog.")
+    catalog_commands = catalog.add_subparsers(dest="action", required=True)
+    p = catalog_commands.add_parser("build", help="Convert a .csv/.npz/.npy catalog (ra, dec, mag) to the indexed format.")
+    p.add_argument("source")
+    p.add_argument("output", help="Output .npy file; the index is written next to it.")
+    p.add_argument("--zone-deg", type=float, default=0.5, help="Declination zone height in degrees.")
+    p = catalog_commands.add_parser("query", help="List the stars in a cone.")
+    p.add_argument("path")
+    p.add_argument("ra", type=float)
+    p.add_argument("dec", type=float)
+    p.add_argument("radius", type=float)
+    p.add_argument("--mag-limit", type=float, default=None)
+    p.add_argument("--max-stars", type=int, default=None)
+
+    simulate = commands.add_parser("simulate", help="Monte Carlo sweep of simulated alignments (no hardware).")
+    simulate.add_argument("--scenarios", type=int, default=1000, help="Number of random scenarios.")
+    simulate.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core).")
+    simulate.add_argument("--seed", type=int, default=0, help="Scenario seed.")
+    simulate.add_argument("--lat", type=float, nargs=2, default=(10.0, 65.0), metavar=("MIN", "MAX"),
+                          help="Latitude range, degrees.")
+    simulate.add_argument("--misalignment", type=float, nargs=2, default=(0.0, 120.0), metavar=("MIN", "MAX"),
+                          help="Range of the axis error, arcmin.")
+    simulate.add_argument("--noise", type=float, nargs=2, default=(0.5, 10.0), metavar=("MIN", "MAX"),
+                          help="Range of the solver noise (1 sigma), arcsec.")
+    simulate.add_argument("--ra-steps", default="15,30,45,60", help="RA steps to draw from, degrees.")
+    simulate.add_argument("--points", default="3,4,5", help="Measurement counts to draw from.")
+    simulate.add_argument("--render", action="store_true", help="Render every frame through the camera simulator.")
+    simulate.add_argument("--group-by", default="ra_step", help="Scenario column of the summary table.")
+    simulate.add_argument("--output", default="montecarlo.npz", help="Results file (.npz columns or .csv).")
+    simulate.add_argument("--cache-dir", default="../../../../cache", help="IERS cache directory.")
+
+    iers = commands.add_parser("iers", help="Load the IERS table and refresh it if outdated.")
+    iers.add_argument("--cache-dir", default=None, help="IERS cache directory.")
+    iers.add_argument("--wait", action="store_true", help="Wait for a background refresh to finish.")
+    return parser
+
+def main(argv=None):
+    """
+    Runs a command. Subsystems are imported by the command that needs them,
+    so mount commands start without loading OpenCV or Astropy.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "align":
+        if args.pool and (args.backend is not None or args.workers > 0):
+            parser.error("--pool races every backend in its own processes; drop --backend and --workers")
+        if args.backend == "native" and args.catalog is None:
+            parser.error("--backend native needs --catalog")
+        args.backend = args.backend or "astap"
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "mount":
+        return _run_mount(args)
+    if args.command == "align":
+        return _run_align(args)
+    if args.command == "catalog":
+        return _run_catalog(args)
+    if args.command == "simulate":
+        return _run_simulate(args)
+    return _run_iers(args)
+
+def _connect(args):
+    from mount import OnStepMount
+    mount = OnStepMount(port=args.port, baud=args.baud, mock=args.mock)
+    mount.connect()
+    return mount
+
+def _run_mount(args):
+    mount = _connect(args)
+    try:
+        if args.action == "position":
+            ra, dec = mount.get_position()
+            print(f"RA {ra:.4f} deg, Dec {dec:.4f} deg")
+        elif args.action == "slew-ra":
+            mount.slew_ra_relative(args.degrees)
+        else:
+            result = mount.move_base(args.alt_steps, args.az_steps, timeout=args.timeout).result()
+            print(f"Base moved: alt {result['alt']} steps, az {result['az']} steps")
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        mount.disconnect()
+    return 0
+
+def _run_align(args):
+    import tracing
+    from camera import GuideCamera
+    from solver import PlateSolver
+    from aligner import PolarAligner
+    tracer = tracing.Tracer(args.trace, args.trace_format) if args.trace else None
+    previous = tracing.set_tracer(tracer)
+    mount = _connect(args)
+    camera = GuideCamera(device_id=args.camera)
+    if args.pool:
+        from solver_pool import SolverPool
+        from native_solver import NativeSolver
+        solver = SolverPool(native_solver=NativeSolver.from_file(args.catalog) if args.catalog else None)
+    elif args.workers > 0:
+        import functools
+        from solver_service import SolverService
+        factory = functools.partial(PlateSolver, backend=args.backend, catalog_path=args.catalog)
+        solver = SolverService(factory, workers=args.workers).start()
+    else:
+        solver = PlateSolver(backend=args.backend, catalog_path=args.catalog)
+    try:
+        aligner = PolarAligner(camera, solver, mount, ra_step=args.ra_step, max_points=args.points)
+        return 0 if aligner.run_alignment() else 1
+    finally:
+        camera.close_session()
+        mount.disconnect()
+        if args.pool or args.workers > 0:
+            solver.close()
+        tracing.set_tracer(previous)
+        if tracer is not None:
+            tracer.close()
+            print(f"Trace written to {args.trace}")
+
+def _run_catalog(args):
+    from catalog import StarCatalog
+    if args.action == "build":
+        catalog = StarCatalog.from_file(args.source, path=args.output, zone_deg=args.zone_deg)
+        print(f"{len(catalog)} stars written to {args.output}")
+        return 0
+    catalog = StarCatalog.open(args.path)
+    stars = catalog.cone_search(args.ra, args.dec, args.radius, mag_limit=args.mag_limit, max_stars=args.max_stars)
+    for star in stars:
+        print(f"{star['ra']:10.5f} {star['dec']:+10.5f} {star['mag']:6.2f}")
+    print(f"{len(stars)} stars")
+    return 0
+
+def _run_simulate(args):
+    import montecarlo
+    scenarios = montecarlo.make_scenarios(
+        args.scenarios, seed=args.seed, lat=args.lat, misalignment=args.misalignment, noise=args.noise,
+        ra_steps=[float(x) for x in args.ra_steps.split(",")], points=[int(x) for x in args.points.split(",")])
+    # Per-point alignment logs of thousands of scenarios are noise
+    for name in ("aligner", "mount"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    results = montecarlo.run_sweep(scenarios, workers=args.workers, cache_dir=args.cache_dir, render=args.render)
+    montecarlo.save_results(results, args.output)
+    print(f"{'':>10} {'runs':>6} {'failed':>6} {'median':>8} {'p95':>8} {'max':>8} {'runtime':>8}")
+    groups = montecarlo.summarize(results, by=args.group_by)
+    groups['all'] = montecarlo.summarize(results)
+    for key, stats in groups.items():
+        print(f"{key!s:>10} {stats['scenarios']:6d} {stats['failed']:6d} {stats['median']:7.1f}\" "
+              f"{stats['p95']:7.1f}\" {stats['max']:7.1f}\" {stats['mean_runtime'] * 1000:6.1f}ms")
+    print(f"Results written to {args.output}")
+    return 0
+
+def _run_iers(args):
+    import os
+    from iers_manager import IERSManager
+    cache_dir = args.cache_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../cache"))
+    manager = IERSManager.instance()
+    table = manager.ensure(cache_dir)
+    if args.wait:
+        manager.wait_for_refresh()
+        table = manager.table
+    print(f"IERS table {manager.source}: MJD {table['MJD'][0].value:.0f} to {table['MJD'][-1].value:.0f}, "
+          f"predictions from MJD {table.meta['predictive_mjd']:.0f}")
+    return 0
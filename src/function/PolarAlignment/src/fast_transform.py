@@ -0,0 +1,140 @@
+import numpy as np
+import erfa
+
+UNIX_EPOCH_JD = 2440587.5
+ARCSEC = np.pi / (180.0 * 3600.0)
+
+class FastAltAz:
+    """
+    Vectorized ICRS to Alt/Az conversion (and back) for one observing site.
+    Uses the IAU 2006/2000A model through ERFA, the same routines astropy calls,
+    but without building coordinate frames: precession-nutation, aberration and
+    light deflection come from star-independent astrometry parameters computed
+    once per time node (and cached), the Earth rotation angle is then updated
+    for each point's own time. UT1-UTC and polar motion are interpolated from the IERS
+    table Astropy uses (see iers_manager).
+
+    Agrees with SkyCoord.transform_to(AltAz) to well below 0.01 arcsec for
+    node_interval up to 10 minutes.
+    """
+
+    def __init__(self, lon_deg, lat_deg, height_m=0.0, pressure_hpa=0.0, temperature_c=0.0,
+                 humidity=0.0, wavelength_um=1.0, node_interval=300.0):
+        """
+        Args:
+            lon_deg, lat_deg (float): Geodetic (WGS84) site longitude and latitude.
+            height_m (float): Site height above the ellipsoid.
+            pressure_hpa (float): Air pressure. 0 disables refraction (the AltAz default).
+            temperature_c (float): Air temperature, used for refraction.
+            humidity (float): Relative humidity 0-1, used for refraction.
+            wavelength_um (float): Observing wavelength in micrometers, used for refraction.
+            node_interval (float): Spacing of the astrometry time nodes in seconds.
+        """
+        self.lon = np.radians(lon_deg)
+        self.lat = np.radians(lat_deg)
+        self.height = float(height_m)
+        self.pressure = float(pressure_hpa)
+        self.temperature = float(temperature_c)
+        self.humidity = float(humidity)
+        self.wavelength = float(wavelength_um)
+        self.node_interval = float(node_interval)
+        self.max_nodes = 256
+        self._eop = None # (IERS table, MJD, UT1-UTC s, PM x rad, PM y rad)
+        self._nodes = {} # node index -> ERFA astrometry parameters
+
+    @classmethod
+    def from_location(cls, location, **kwargs):
+        """Builds the transform for an astropy EarthLocation."""
+        return cls(location.lon.deg, location.lat.deg, location.height.to_value('m'), **kwargs)
+
+    def transform(self, ra, dec, timestamps):
+        """
+        Converts ICRS positions to Alt/Az, each at its own time.
+
+        Args:
+            ra, dec (array-like): ICRS coordinates in degrees.
+            timestamps (array-like): Unix times, one per point (or a single time for all).
+
+        Returns:
+            tuple: (alt, az) arrays in degrees, az from North through East.
+        """
+        ra, dec, timestamps = np.broadcast_arrays(np.asarray(ra, dtype=float), np.asarray(dec, dtype=float),
+                                                  np.asarray(timestamps, dtype=float))
+        astrom = self._astrometry(timestamps)
+        ri, di = erfa.atciqz(np.radians(ra), np.radians(dec), astrom)
+        az, zenith, _, _, _ = erfa.atioq(ri, di, astrom)
+        return 90.0 - np.degrees(zenith), np.degrees(az) % 360.0
+
+    def to_icrs(self, alt, az, timestamps):
+        """
+        Converts Alt/Az positions back to ICRS, each at its own time.
+        The inverse of transform, using the same astrometry parameters. With
+        refraction enabled the round trip is within 0.01 arcsec above 15 degrees
+        altitude (about 0.1 arcsec at 5 degrees).
+
+        Args:
+            alt, az (array-like): Observed altitude and azimuth in degrees.
+            timestamps (array-like): Unix times, one per point (or a single time for all).
+
+        Returns:
+            tuple: (ra, dec) arrays in degrees.
+        """
+        alt, az, timestamps = np.broadcast_arrays(np.asarray(alt, dtype=float), np.asarray(az, dtype=float),
+                                                  np.asarray(timestamps, dtype=float))
+        astrom = self._astrometry(timestamps)
+        ri, di = erfa.atoiq('A', np.radians(az), np.radians(90.0 - alt), astrom)
+        ra, dec = erfa.aticq(ri, di, astrom)
+        return np.degrees(ra) % 360.0, np.degrees(dec)
+
+    def _astrometry(self, timestamps):
+        """Returns the ERFA astrometry parameters at each of the (broadcast) timestamps."""
+        days = np.floor(timestamps / 86400.0)
+        utc1 = UNIX_EPOCH_JD + days
+        utc2 = (timestamps - days * 86400.0) / 86400.0
+        dut1, xp, yp = self._earth_orientation(utc1 + utc2 - 2400000.5)
+
+        # Star-independent parameters per node; precession, nutation and
+        # aberration change by far less than a milliarcsecond within a node
+        nodes, inverse = np.unique(np.round(timestamps / self.node_interval), return_inverse=True)
+        astrom = self._node_astrometry(nodes)[inverse.ravel()].reshape(timestamps.shape)
+        # Earth rotation angle at each point's own UT1
+        return erfa.aper13(utc1, utc2 + dut1 / 86400.0, astrom)
+
+    def _node_astrometry(self, nodes):
+        """Returns the ERFA astrometry parameters for node indices, computing only uncached ones."""
+        missing = [n for n in nodes if n not in self._nodes]
+        if missing:
+            node_t = np.array(missing) * self.node_interval
+            days = np.floor(node_t / 86400.0)
+            dut1, xp, yp = self._earth_orientation(UNIX_EPOCH_JD - 2400000.5 + node_t / 86400.0)
+            astrom, _ = erfa.apco13(UNIX_EPOCH_JD + days, (node_t - days * 86400.0) / 86400.0, dut1,
+                                    self.lon, self.lat, self.height, xp, yp,
+                                    self.pressure, self.temperature, self.humidity, self.wavelength)
+            if len(self._nodes) + len(missing) > self.max_nodes:
+                self._nodes.clear()
+            self._nodes.update(zip(missing, astrom))
+        return np.array([self._nodes[n] for n in nodes], dtype=erfa.dt_eraASTROM)
+
+    def _earth_orientation(self, mjd):
+        """
+        Interpolates UT1-UTC (s) and polar motion (rad) at UTC MJDs.
+        Like astropy, UT1-UTC is not interpolated across leap second jumps.
+        Times outside the table use its first or last entry.
+        """
+        from astropy.utils import iers
+        table = iers.earth_orientation_table.get()
+        if self._eop is None or self._eop[0] is not table:
+            # Contiguous copies: the columns may be strided views of the IERS sidecar
+            self._eop = (table, np.ascontiguousarray(table['MJD'].to_value('d')),
+                         np.ascontiguousarray(table['UT1_UTC'].to_value('s')),
+                         np.ascontiguousarray(table['PM_x'].to_value('arcsec')) * ARCSEC,
+                         np.ascontiguousarray(table['PM_y'].to_value('arcsec')) * ARCSEC)
+            self._nodes = {}
+        _, t, ut1_utc, pm_x, pm_y = self._eop
+        i = np.clip(np.searchsorted(t, mjd, side='right') - 1, 0, len(t) - 2)
+        frac = np.clip((mjd - t[i]) / (t[i + 1] - t[i]), 0.0, 1.0)
+        d_ut1 = ut1_utc[i + 1] - ut1_utc[i]
+        d_ut1 -= np.round(d_ut1)
+        return (ut1_utc[i] + frac * d_ut1,
+                pm_x[i] + frac * (pm_x[i + 1] - pm_x[i]),
+                pm_y[i] + frac * (pm_y[i + 1] - pm_y[i]))
@@ -0,0 +1,108 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+class Frame:
+    """
+    A captured image held in memory together with its capture metadata.
+    Frames are handed from the camera to the solver and aligner without
+    touching the disk. The pixel array is shared, not copied, so it is
+    marked read-only.
+    """
+
+    LOSSLESS_EXTENSIONS = ('.fits', '.fit', '.fts', '.png')
+
+    def __init__(self, data, timestamp=None, exposure=None, gain=None):
+        """
+        Args:
+            data (np.ndarray): 2D grayscale image.
+            timestamp (float, optional): Unix capture time. Defaults to now.
+            exposure (float, optional): Exposure setting used for the capture.
+            gain (float, optional): Gain setting used for the capture.
+        """
+        data = np.asarray(data).view()
+        if data.ndim != 2:
+            raise ValueError(f"Frame data must be a 2D grayscale array, got shape {data.shape}")
+        data.flags.writeable = False
+        self.data = data
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.exposure = exposure
+        self.gain = gain
+        # Set once the frame has been (or is being) written to disk
+        self.path = None
+        self.write_future = None
+        self.cache = None # FrameCache holding the file, if it was written to one
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def save(self, path):
+        """
+        Writes the frame to disk in a lossless format.
+
+        Args:
+            path (str): Destination. The extension selects FITS or PNG.
+
+        Returns:
+            str: Absolute path of the written file.
+
+        Raises:
+            ValueError: If the extension is not a lossless format.
+        """
+        path = os.path.abspath(path)
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in self.LOSSLESS_EXTENSIONS:
+            raise ValueError(f"Unsupported frame format '{ext}', use one of {self.LOSSLESS_EXTENSIONS}")
+
+        # Write to a temporary name first so readers never see a partial file
+        tmp_path = f"{path}.part{ext}"
+        if ext == '.png':
+            import cv2
+            if not cv2.imwrite(tmp_path, self.data):
+                raise RuntimeError(f"Failed to write frame to {path}")
+        else:
+            from astropy.io import fits
+            header = fits.Header()
+            header['DATE-OBS'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(self.timestamp))
+            if self.exposure is not None:
+                header['EXPTIME'] = self.exposure
+            if self.gain is not None:
+                header['GAIN'] = self.gain
+            fits.PrimaryHDU(self.data, header=header).writeto(tmp_path, overwrite=True)
+        os.replace(tmp_path, path)
+
+        self.path = path
+        return path
+
+class FrameWriter:
+    """
+    Writes frames to disk on a background thread, keeping encoding and
+    disk I/O off the capture/solve critical path.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FrameWriter")
+
+    def submit(self, frame, path):
+        """
+        Queues a frame for writing.
+
+        Args:
+            frame (Frame): The frame to write.
+            path (str): Destination path (FITS or PNG).
+
+        Returns:
+            concurrent.futures.Future: Resolves to the written path.
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in Frame.LOSSLESS_EXTENSIONS:
+            raise ValueError(f"Unsupported frame format '{ext}', use one of {Frame.LOSSLESS_EXTENSIONS}")
+        frame.path = os.path.abspath(path)
+        frame.write_future = self._executor.submit(frame.save, path)
+        return frame.write_future
+
+    def close(self, wait=True):
+        """Waits for pending writes and stops the writer thread."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,276 @@
+import os
+import re
+import time
+import logging
+import threading
+import collections
+import contextlib
+from frame import Frame, FrameWriter
+
+logger = logging.getLogger(__name__)
+
+# Files ASTAP writes next to a solved image
+SIDECAR_EXTENSIONS = ('.ini', '.wcs')
+
+# Directory used for ram=True (tmpfs on Linux, including Raspberry Pi OS)
+RAM_ROOT = "/dev/shm"
+
+_NAME = re.compile(r"^frame_(\d{8,})(?:_[^.]*)?(\.\w+)$")
+# Leftovers of an interrupted write (FrameWriter's temporary file) or delete (remove_with_sidecars)
+_PART = re.compile(r"^frame_\d{8,}(?:_[^.]*)?\.\w+\.part\.\w+$")
+_TRASH = re.compile(r"^\.frame_\d{8,}(?:_[^.]*)?\.\w+\.\d+\.del$")
+
+# Temporary files younger than this may still be written by another process sharing the directory
+STALE_AFTER = 60.0
+
+class FrameCache:
+    """
+    Bounded directory of captured frames.
+
+    Every frame gets the next id from a monotonic counter and a file name
+    that is reserved with O_EXCL, so two captures (or two processes sharing
+    the directory) never write to the same file. Files are evicted oldest
+    first once they exceed max_age, and least recently used first while
+    the directory holds more than max_bytes. Frames in use by a solve
+    (see hold) are never evicted. The solver's .ini/.wcs sidecars are
+    removed together with their image.
+
+    With ram=True frames live on tmpfs, so a session of any length writes
+    nothing to the SD card. Otherwise the byte budget bounds how much of
+    the card is rewritten.
+
+    Only files named by the cache (frame_<id>...) are ever deleted, so the
+    directory may be shared with other cache files.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 2**20, max_age=6 * 3600.0, ram=False, writer=None):
+        """
+        Args:
+            directory (str): Cache directory, created if missing.
+            max_bytes (int): Byte budget of all cached frames and their sidecars.
+            max_age (float, optional): Frames older than this are evicted, seconds. None keeps them.
+            ram (bool): Keep the frames in a RAM-backed directory (RAM_ROOT) instead;
+                falls back to directory if there is none.
+            writer (FrameWriter, optional): Background writer to use. Defaults to a new one.
+        """
+        if ram:
+            if os.path.isdir(RAM_ROOT) and os.access(RAM_ROOT, os.W_OK):
+                directory = os.path.join(RAM_ROOT, "polaralignment-" + os.path.basename(os.path.normpath(directory)))
+            else:
+                logger.warning("No RAM-backed directory at %s, caching frames in %s", RAM_ROOT, directory)
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.writer = writer
+        self.evicted = 0
+        self._entries = collections.OrderedDict() # path -> [id, bytes, created]; least recently used first
+        self._pins = collections.Counter()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._adopt()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        """Bytes of all cached frames and their sidecars."""
+        with self._lock:
+            return sum(entry[1] for entry in self._entries.values())
+
+    def paths(self):
+        """Cached frame paths, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def add(self, frame, ext=".fits", name=None):
+        """
+        Writes a frame to the cache on the background writer.
+
+        Args:
+            frame (Frame): The frame to write.
+            ext (str): Lossless file format, see Frame.LOSSLESS_EXTENSIONS.
+            name (str, optional): Label appended to the file name after the id.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the written path (also frame.write_future).
+        """
+        ext = ext.lower()
+        if ext not in Frame.LOSSLESS_EXTENSIONS:
+            raise ValueError(f"Unsupported frame format '{ext}', use one of {Frame.LOSSLESS_EXTENSIONS}")
+        frame_id, path = self._reserve(ext, name)
+        with self._lock:
+            self._entries[path] = [frame_id, 0, time.time()]
+        if self.writer is None:
+            self.writer = FrameWriter()
+        frame.cache = self
+        future = self.writer.submit(frame, path)
+        future.add_done_callback(lambda f: self._written(path, f))
+        return future
+
+    def touch(self, path):
+        """Marks a cached frame as recently used."""
+        with self._lock:
+            if path in self._entries:
+                self._entries.move_to_end(path)
+
+    @contextlib.contextmanager
+    def hold(self, path):
+        """Keeps a frame from being evicted while the block runs (e.g. while ASTAP reads it)."""
+        with self._lock:
+            self._pins[path] += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        try:
+            yield path
+        finally:
+            with self._lock:
+                self._pins[path] -= 1
+                if self._pins[path] <= 0:
+                    del self._pins[path]
+            self.evict()
+
+    def evict(self, now=None):
+        """
+        Removes expired frames, then least recently used ones until the cache fits max_bytes.
+
+        Returns:
+            int: Number of frames removed.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            victims = []
+            total = sum(entry[1] for entry in self._entries.values())
+            for path, (_, size, created) in self._entries.items():
+                if path in self._pins or size == 0: # In use, or still being written
+                    continue
+                if total > self.max_bytes or (self.max_age is not None and now - created > self.max_age):
+                    victims.append(path)
+                    total -= size
+            for path in victims:
+                del self._entries[path]
+        for path in victims:
+            remove_with_sidecars(path)
+        self.evicted += len(victims)
+        if victims:
+            logger.debug("Evicted %d cached frames", len(victims))
+        return len(victims)
+
+    def clear(self):
+        """Removes every cached frame that is not in use."""
+        with self._lock:
+            victims = [p for p, entry in self._entries.items() if p not in self._pins and entry[1] > 0]
+            for path in victims:
+                del self._entries[path]
+        for path in victims:
+            remove_with_sidecars(path)
+
+    def close(self):
+        """Waits for pending writes and stops the writer."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def _reserve(self, ext, name):
+        """Claims the next free id and creates its (empty) file, so no other writer can take the name."""
+        suffix = f"_{re.sub(r'[^A-Za-z0-9-]+', '-', name)}" if name else ""
+        while True:
+            with self._lock:
+                frame_id = self._next_id
+                self._next_id += 1
+            path = os.path.join(self.directory, f"frame_{frame_id:08d}{suffix}{ext}")
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                return frame_id, path
+            except FileExistsError:
+                continue # Taken by another process sharing the directory
+
+    def _written(self, path, future):
+        if future.exception() is not None:
+            logger.warning("Writing cached frame %s failed: %s", path, future.exception())
+            with self._lock:
+                self._entries.pop(path, None)
+            remove_with_sidecars(path)
+            return
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry[1] = max(_file_size(path), 1)
+        self.evict()
+
+    def _adopt(self):
+        """
+        Takes over frames left by earlier sessions, so they count against the budget and get evicted.
+        Temporary files of writes and deletes that were interrupted are removed.
+        """
+        found = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if _TRASH.match(name):
+                _unlink(path)
+                continue
+            if _PART.match(name):
+                try:
+                    if now - os.path.getmtime(path) > STALE_AFTER:
+                        _unlink(path)
+                except OSError:
+                    pass
+                continue
+            match = _NAME.match(name)
+            if match is None or match.group(2).lower() not in Frame.LOSSLESS_EXTENSIONS:
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            found.append((mtime, int(match.group(1)), path))
+        with self._lock:
+            for mtime, frame_id, path in sorted(found):
+                self._entries[path] = [frame_id, max(_file_size(path), 1), mtime]
+                self._next_id = max(self._next_id, frame_id + 1)
+        self.evict()
+
+def sidecar_paths(path):
+    """Returns the paths of the solver sidecars that belong to an image."""
+    base = os.path.splitext(path)[0]
+    return [base + ext for ext in SIDECAR_EXTENSIONS]
+
+def remove_sidecars(path):
+    """Deletes the solver sidecars of an image, keeping the image."""
+    for p in sidecar_paths(path):
+        _unlink(p)
+
+def remove_with_sidecars(path):
+    """
+    Deletes an image and its solver sidecars.
+    The image is first renamed to a hidden name, so it disappears in one
+    step and no solve can start on a half-deleted frame.
+    """
+    trash = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.del")
+    try:
+        os.replace(path, trash)
+    except OSError:
+        trash = None
+    remove_sidecars(path)
+    if trash is not None:
+        _unlink(trash)
+
+def _unlink(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Could not remove %s: %s", path, e)
+
+def _file_size(path):
+    """Size of an image plus its sidecars, 0 if it does not exist."""
+    total = 0
+    for p in [path] + sidecar_paths(path):
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
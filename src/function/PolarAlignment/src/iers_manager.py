@@ -1,62 +1,296 @@
 import os
-import requests
+import glob
+import hashlib
+import json
+import logging
+import threading
 import time
 import shutil
-from astropy.utils import iers
-from astropy import units as u
-import astropy_iers_data
+import numpy as np
 
-def setup_iers(cache_dir, download_if_missing=True, max_age_days=7):
+logger = logging.getLogger(__name__)
+
+IERS_URL = "https://datacenter.iers.org/data/9/finals2000A.all"
+
+# Columns kept in the binary sidecar, with their units. These are all the
+# columns IERS_A needs for UT1-UTC, polar motion and CIP interpolation.
+SIDECAR_COLUMNS = [
+    ('MJD', 'f8', 'd'),
+    ('UT1_UTC', 'f8', 's'),
+    ('PM_x', 'f8', 'arcsec'),
+    ('PM_y', 'f8', 'arcsec'),
+    ('dX_2000A', 'f8', 'marcsec'),
+    ('dY_2000A', 'f8', 'marcsec'),
+    ('UT1Flag', 'U1', None),
+    ('PolPMFlag', 'U1', None),
+    ('NutFlag', 'U1', None),
+]
+
+class IERSManager:
     """
-    Configures Astropy to use a local IERS 'finals2000A.all' file.
-    Downloads the file if it's missing or outdated.
+    Process-wide IERS table cache.
+    The 'finals2000A.all' text table takes seconds to parse on small machines.
+    It is parsed once and the needed columns are written next to it as a binary
+    sidecar ('<file>.<hash>.npy'), keyed by the hash of the source file. Later
+    processes memory-map the sidecar instead of parsing, and within a process
+    the loaded table is reused as long as the source file does not change.
+
+    Downloads never block: an outdated table is served while a background
+    thread fetches the new one and swaps it in.
     """
-    filename = "finals2000A.all"
-    url = "https://datacenter.iers.org/data/9/finals2000A.all"
-    file_path = os.path.join(cache_dir, filename)
-    
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir)
-        
-    should_download = False
-    if not os.path.exists(file_path):
-        should_download = True
-        print(f"IERS file missing: {file_path}")
-    else:
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.table = None
+        self.source = None # Path of the loaded file
+        self.digest = None # Hash of the loaded file
+        self._stat = None # (mtime_ns, size) of the loaded file
+        self.url = IERS_URL
+        self.timeout = 30.0 # Download timeout, seconds (only the background refresh waits on it)
+        self.last_refresh = None
+        self._refresh_thread = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def instance(cls):
+        """Returns the process-wide manager."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def ensure(self, cache_dir, download_if_missing=True, max_age_days=7):
+        """
+        Makes sure Astropy uses a local IERS table, without waiting on the network.
+        The file in cache_dir is loaded right away, even when it is outdated
+        (stale-while-revalidate); a missing file is seeded from the copy bundled
+        with astropy_iers_data. If the file is missing or older than
+        max_age_days, a background refresh is started (see refresh_async).
+
+        Returns:
+            IERS_A: The installed table.
+
+        Raises:
+            RuntimeError: If there is neither a cached nor a bundled IERS file.
+        """
+        file_path = os.path.join(cache_dir, "finals2000A.all")
+        with self._lock:
+            stale = self._seed(cache_dir, file_path, max_age_days)
+            table = self.load(file_path)
+        if stale and download_if_missing:
+            self.refresh_async(file_path)
+        return table
+
+    def load(self, file_path, table=None):
+        """
+        Loads an IERS-A file, from its sidecar when one exists, and installs it.
+
+        Args:
+            file_path (str): Path of the finals2000A.all file.
+            table (IERS_A, optional): The file parsed already, used instead of parsing again.
+
+        Returns:
+            IERS_A: The installed table.
+        """
+        from astropy.utils import iers
+        st = os.stat(file_path)
+        stat = (st.st_mtime_ns, st.st_size)
+        unchanged = self.table is not None and self.source == file_path and self._stat == stat
+        digest = self.digest if unchanged else _file_digest(file_path)
+        if self.table is None or digest != self.digest:
+            sidecar = f"{file_path}.{digest[:16]}.npy"
+            if table is None and os.path.exists(sidecar):
+                table = _table_from_array(np.load(sidecar, mmap_mode='r'))
+            else:
+                if table is None:
+                    logger.info("Loading IERS table from %s...", file_path)
+                    try:
+                        table = iers.IERS_A.open(file_path)
+                    except Exception as e:
+                        logger.error("Error loading IERS table: %s", e)
+                        raise
+                _write_sidecar(table, sidecar, f"{file_path}.*.npy")
+            table.meta['data_path'] = file_path
+            self.table, self.digest = table, digest
+            logger.info("Astropy IERS configuration updated.")
+        if iers.earth_orientation_table.get() is not self.table:
+            iers.earth_orientation_table.set(self.table)
+            iers.conf.auto_download = False
+        self.source, self._stat = file_path, stat
+        return self.table
+
+    def refresh_async(self, file_path):
+        """
+        Starts refresh(file_path) in a daemon thread, unless a refresh is already running.
+
+        Returns:
+            threading.Thread: The running refresh.
+        """
+        with self._lock:
+            if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                self._refresh_thread = threading.Thread(target=self.refresh, args=(file_path,),
+                                                        name="IERSRefresh", daemon=True)
+                self._refresh_thread.start()
+            return self._refresh_thread
+
+    def wait_for_refresh(self, timeout=None):
+        """Waits for a running background refresh. Returns self.last_refresh."""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.last_refresh
+
+    def refresh(self, file_path):
+        """
+        Downloads a new IERS file and swaps it in.
+        The request is conditional (If-None-Match / If-Modified-Since with the
+        validators of the last download). A new file is parsed and checked
+        before it replaces the cached one with an atomic rename; the new table is
+        then installed. Failures keep the current table.
+
+        Returns:
+            str: 'updated', 'not-modified' or 'failed' (also kept in self.last_refresh).
+        """
+        meta_path = file_path + ".http.json"
+        try:
+            with open(meta_path) as f:
+                validators = json.load(f)
+        except (OSError, ValueError):
+            validators = {}
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        tmp = f"{file_path}.{os.getpid()}.download"
+        try:
+            import requests
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                os.utime(file_path) # Still current, restart the age clock
+                status = 'not-modified'
+            else:
+                response.raise_for_status()
+                with open(tmp, 'wb') as f:
+                    f.write(response.content)
+                table = self._validate(tmp)
+                with self._lock:
+                    os.replace(tmp, file_path)
+                    self.load(file_path, table)
+                with open(meta_path, 'w') as f:
+                    json.dump({'etag': response.headers.get('ETag'),
+                               'last_modified': response.headers.get('Last-Modified')}, f)
+                status = 'updated'
+            logger.info("IERS refresh from %s: %s", self.url, status)
+        except Exception as e:
+            logger.warning("IERS refresh from %s failed: %s. Keeping the current table.", self.url, e)
+            status = 'failed'
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.last_refresh = status
+        return status
+
+    def _validate(self, path):
+        """
+        Parses a downloaded file and checks it against the installed table.
+
+        Raises:
+            ValueError: If the file is empty or ends before the installed table.
+        """
+        from astropy.utils import iers
+        table = iers.IERS_A.read(path)
+        if len(table) == 0:
+            raise ValueError("Downloaded IERS table is empty")
+        if self.table is not None and table['MJD'][-1] < self.table['MJD'][-1]:
+            raise ValueError("Downloaded IERS table is older than the cached one")
+        return table
+
+    def _seed(self, cache_dir, file_path, max_age_days):
+        """
+        Makes sure an IERS file exists, copying the bundled one if needed.
+
+        Returns:
+            bool: True if the file should be refreshed (missing or outdated).
+        """
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        if not os.path.exists(file_path):
+            logger.info("IERS file missing: %s", file_path)
+            import astropy_iers_data
+            bundled_path = os.path.join(os.path.dirname(astropy_iers_data.__file__), 'data', 'finals2000A.all')
+            if not os.path.exists(bundled_path):
+                raise RuntimeError("Critical: IERS file missing and no bundled backup found.")
+            logger.info("Using bundled IERS data from %s until a download succeeds", bundled_path)
+            shutil.copy(bundled_path, file_path)
+            # The validators of an earlier download do not describe the bundled copy;
+            # sent along, a 304 would mark the bundled table as current
+            try:
+                os.remove(file_path + ".http.json")
+            except FileNotFoundError:
+                pass
+            return True
+
         # Check age
         mtime = os.path.getmtime(file_path)
         age_days = (time.time() - mtime) / (24 * 3600)
         if age_days > max_age_days:
-            should_download = True
-            print(f"IERS file outdated ({age_days:.1f} days old).")
-            
-    if should_download and download_if_missing:
-        print(f"Downloading IERS data from {url}...")
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
-            print(f"IERS data saved to {file_path}")
-        except Exception as e:
-            print(f"Failed to download IERS data: {e}")
-            
-            # Fallback: Copy from astropy_iers_data if available
-            bundled_path = os.path.join(os.path.dirname(astropy_iers_data.__file__), 'data', 'finals2000A.all')
-            if os.path.exists(bundled_path):
-                print(f"Falling back to bundled IERS data from {bundled_path}")
-                shutil.copy(bundled_path, file_path)
-            else:
-                if not os.path.exists(file_path):
-                    raise RuntimeError("Critical: IERS file missing, download failed, and no bundled backup found.")
-    
-    # Configure Astropy
-    print(f"Loading IERS table from {file_path}...")
+            logger.info("IERS file outdated (%.1f days old). Refreshing in the background.", age_days)
+            return True
+        return False
+
+def setup_iers(cache_dir, download_if_missing=True, max_age_days=7):
+    """
+    Configures Astropy to use a local IERS 'finals2000A.all' file.
+    Refreshes the file in the background if it's missing or outdated.
+    The table is parsed once per file version (see IERSManager), so calling
+    this repeatedly is cheap.
+    """
+    return IERSManager.instance().ensure(cache_dir, download_if_missing, max_age_days)
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _write_sidecar(table, path, pattern):
+    """Saves the sidecar columns atomically and removes sidecars of older file versions."""
+    data = np.empty(len(table), dtype=[(name, dtype) for name, dtype, _ in SIDECAR_COLUMNS])
+    for name, _, unit in SIDECAR_COLUMNS:
+        column = table[name]
+        data[name] = column.to_value(unit) if unit is not None else column
+    tmp = f"{path}.{os.getpid()}.tmp"
     try:
-        iers_table = iers.IERS_A.open(file_path)
-        iers.earth_orientation_table.set(iers_table)
-        iers.conf.auto_download = False
-        print("Astropy IERS configuration updated.")
-    except Exception as e:
-        print(f"Error loading IERS table: {e}")
-        raise
+        with open(tmp, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp, path)
+    except OSError as e:
+        # A read-only cache only costs the next process a parse
+        logger.warning("Could not write IERS sidecar %s: %s", path, e)
+        return
+    for old in glob.glob(pattern):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+def _table_from_array(data):
+    """Builds an IERS_A table on top of the (memory-mapped) sidecar columns."""
+    from astropy.utils import iers
+    from astropy import units as u
+    columns = {}
+    for name, _, unit in SIDECAR_COLUMNS:
+        columns[name] = u.Quantity(data[name], unit, copy=False) if unit is not None else data[name]
+    table = iers.IERS_A(columns, copy=False)
+    # Same as IERS_A.read: flags are sorted B < I < P, the first 'P' starts the predictions
+    p_index = min(np.searchsorted(data['UT1Flag'], 'P'), np.searchsorted(data['PolPMFlag'], 'P'))
+    table.meta['predictive_index'] = p_index
+    table.meta['predictive_mjd'] = float(data['MJD'][p_index])
+    return table
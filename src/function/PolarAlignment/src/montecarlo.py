@@ -0,0 +1,382 @@
+import os
+import math
+import time
+import logging
+import numpy as np
+from camera import GuideCamera
+from frame import Frame
+from mount import OnStepMount
+from axis_fit import _altaz_to_vec
+from solver_pool import default_mp_context
+
+logger = logging.getLogger(__name__)
+
+# One row per scenario
+SCENARIO_DTYPE = np.dtype([
+    ('id', '<i8'),
+    ('lat', '<f8'),        # Site latitude, degrees
+    ('lon', '<f8'),        # Site longitude, degrees
+    ('alt_error', '<f8'),  # Mechanical axis altitude minus the pole's, arcmin
+    ('az_error', '<f8'),   # Mechanical axis azimuth (East positive), arcmin
+    ('noise', '<f8'),      # Solver error, 1 sigma per axis, arcsec
+    ('roll', '<f8'),       # Camera roll on the RA axis, degrees
+    ('offset', '<f8'),     # Camera pointing distance from the RA axis, degrees
+    ('phase', '<f8'),      # Camera position angle around the RA axis, degrees
+    ('ra_step', '<f8'),    # RA rotation between measurements, degrees
+    ('points', '<i4'),     # Measurements taken
+    ('start', '<f8'),      # Unix time of the first capture
+    ('seed', '<i8'),       # Seed of the solver noise
+])
+
+# Scenario columns followed by the outcome
+RESULT_DTYPE = np.dtype(SCENARIO_DTYPE.descr + [
+    ('ok', '?'),                # The alignment finished and moved the base
+    ('fit_alt_error', '<f8'),   # Fitted altitude error, arcmin
+    ('fit_az_error', '<f8'),    # Fitted azimuth error, arcmin
+    ('residual_alt', '<f8'),    # Fitted minus true axis altitude, arcsec
+    ('residual_az', '<f8'),     # Fitted minus true axis azimuth, arcsec on the sky
+    ('residual', '<f8'),        # Angle between fitted and true axis, arcsec
+    ('uncertainty', '<f8'),     # Axis uncertainty reported by the estimator (1 sigma), arcsec
+    ('alt_steps', '<i8'),       # Correction sent to the alignment base
+    ('az_steps', '<i8'),
+    ('solves', '<i4'),          # Plate solves performed
+    ('runtime', '<f8'),         # Wall time of the scenario, seconds
+])
+
+class SimClock:
+    """Simulated time. Slews and exposures advance it instead of sleeping."""
+
+    def __init__(self, start):
+        self.now = float(start)
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+class SimMount(OnStepMount):
+    """
+    In-memory mount whose RA axis points along a given Alt/Az direction.
+    Slews are instant and advance the simulated clock by the time they would take.
+    """
+
+    def __init__(self, clock, axis_alt, axis_az, slew_rate=4.0, settle_time=1.0):
+        """
+        Args:
+            clock (SimClock): Simulated time.
+            axis_alt, axis_az (float): Mechanical RA axis direction in degrees.
+            slew_rate (float): RA slew speed in degrees per second.
+            settle_time (float): Simulated settling time after each slew, seconds.
+        """
+        super().__init__(mock=True)
+        self.clock = clock
+        self.axis = _altaz_to_vec(axis_alt, axis_az)
+        self.slew_rate = slew_rate
+        self.settle_time = settle_time
+        self.ra_angle = 0.0
+        self.alt_moved = 0
+        self.az_moved = 0
+
+    def slew_ra_relative(self, degrees, wait=True):
+        self.ra_angle += degrees
+        self.clock.advance(abs(degrees) / self.slew_rate + self.settle_time)
+
+    def move_alt_steps(self, steps):
+        self.alt_moved += int(steps)
+
+    def move_az_steps(self, steps):
+        self.az_moved += int(steps)
+
+class SimCamera(GuideCamera):
+    """
+    Guide camera on the simulated mount.
+    Each capture places the camera at its true sky position (set_simulation_pointing)
+    for the current RA angle and simulated time. Frames are only rendered with
+    render=True; the default is a 1x1 frame, as SimSolver does not look at pixels.
+    """
+
+    def __init__(self, mount, transform, offset, phase, roll=0.0, exposure=1.0, render=False, **kwargs):
+        """
+        Args:
+            mount (SimMount): The mount carrying the camera.
+            transform (FastAltAz): Alt/Az to ICRS conversion for the site.
+            offset (float): Distance of the camera pointing from the RA axis, degrees.
+            phase (float): Position angle of the pointing around the RA axis at RA angle 0, degrees.
+            roll (float): Camera rotation relative to the RA axis, degrees.
+            exposure (float): Simulated exposure time, seconds.
+            render (bool): Render star field frames through the GuideCamera simulator.
+            kwargs: Passed to GuideCamera.
+        """
+        super().__init__(device_id=-1, **kwargs)
+        from aligner import _rotation_matrix
+        self.mount = mount
+        self.transform = transform
+        self.roll = roll
+        self.exposure_time = exposure
+        self.render = render
+        self._rotation_matrix = _rotation_matrix
+        # Tilt the axis towards the zenith side by offset, then turn it around the axis by phase
+        axis = mount.axis
+        side = np.cross(axis, [0.0, 0.0, 1.0])
+        side /= np.linalg.norm(side)
+        start = _rotation_matrix(side, -math.radians(offset)) @ axis
+        self._start = _rotation_matrix(axis, math.radians(phase)) @ start
+
+    def pointing_altaz(self):
+        """Returns the camera's current (alt, az) in degrees; it follows RA rotations around the mechanical axis."""
+        v = self._rotation_matrix(self.mount.axis, math.radians(self.mount.ra_angle)) @ self._start
+        return math.degrees(math.asin(np.clip(v[2], -1.0, 1.0))), math.degrees(math.atan2(v[1], v[0])) % 360.0
+
+    def capture_frame(self, filename=None, exposure_time=None):
+        timestamp = self.mount.clock.advance(exposure_time or self.exposure_time)
+        alt, az = self.pointing_altaz()
+        ra, dec = self.transform.to_icrs(alt, az, timestamp)
+        self.set_simulation_pointing(float(ra), float(dec), (self.mount.ra_angle + self.roll) % 360.0)
+        data = self._render_dummy_frame() if self.render else np.zeros((1, 1), dtype=np.uint8)
+        frame = Frame(data, timestamp=timestamp, exposure=self.exposure, gain=self.gain)
+        if filename is not None:
+            self.save_frame(frame, filename)
+        return frame
+
+class SimSolver:
+    """Returns the camera's true pointing with Gaussian position noise, like a plate solver would."""
+
+    def __init__(self, camera, noise_arcsec=1.0, seed=None):
+        """
+        Args:
+            camera (SimCamera): The camera whose pointing is 'solved'.
+            noise_arcsec (float): Position error, 1 sigma per axis, arcsec.
+            seed (int, optional): Noise seed.
+        """
+        self.camera = camera
+        self.noise = noise_arcsec
+        self.rng = np.random.default_rng(seed)
+        self.solves = 0
+
+    def solve(self, image, search_radius=180, hint=None):
+        self.solves += 1
+        ra, dec, roll = self.camera.get_simulation_pointing()
+        v = _radec_vec(ra, dec)
+        east = np.cross([0.0, 0.0, 1.0], v)
+        if np.linalg.norm(east) < 1e-12:
+            east = np.array([0.0, 1.0, 0.0])
+        east /= np.linalg.norm(east)
+        north = np.cross(v, east)
+        dx, dy = self.rng.normal(0.0, math.radians(self.noise / 3600.0), 2)
+        v = v + dx * east + dy * north
+        v /= np.linalg.norm(v)
+        return {'ra': math.degrees(math.atan2(v[1], v[0])) % 360.0,
+                'dec': math.degrees(math.asin(v[2])),
+                'rotation': roll, 'matches': 20}
+
+def make_scenarios(n, seed=0, lat=(10.0, 65.0), misalignment=(0.0, 120.0), noise=(0.5, 10.0),
+                   roll=(0.0, 360.0), offset=(0.2, 3.0), ra_steps=(15.0, 30.0, 45.0, 60.0),
+                   points=(3, 4, 5), start=None):
+    """
+    Draws random scenarios.
+
+    Args:
+        n (int): Number of scenarios.
+        seed (int): Random seed; the same seed gives the same scenarios.
+        lat (tuple): Latitude range in degrees (northern hemisphere, the aligner targets the NCP).
+        misalignment (tuple): Range of the total axis error in arcmin; its direction is uniform.
+        noise (tuple): Solver noise range, arcsec (1 sigma).
+        roll (tuple): Camera roll range, degrees.
+        offset (tuple): Range of the camera distance from the RA axis, degrees.
+        ra_steps (sequence): RA step schedule to pick from, degrees.
+        points (sequence): Measurement counts to pick from.
+        start (float, optional): Earliest start time (Unix). Defaults to now;
+            scenarios start within the following day.
+
+    Returns:
+        np.ndarray: Rows of SCENARIO_DTYPE.
+    """
+    rng = np.random.default_rng(seed)
+    scenarios = np.zeros(n, dtype=SCENARIO_DTYPE)
+    scenarios['id'] = np.arange(n)
+    scenarios['lat'] = rng.uniform(*lat, n)
+    scenarios['lon'] = rng.uniform(-180.0, 180.0, n)
+    error = rng.uniform(*misalignment, n)
+    angle = rng.uniform(0.0, 2.0 * np.pi, n)
+    scenarios['alt_error'] = error * np.sin(angle)
+    scenarios['az_error'] = error * np.cos(angle)
+    scenarios['noise'] = rng.uniform(*noise, n)
+    scenarios['roll'] = rng.uniform(*roll, n)
+    scenarios['offset'] = rng.uniform(*offset, n)
+    scenarios['phase'] = rng.uniform(0.0, 360.0, n)
+    scenarios['ra_step'] = rng.choice(np.asarray(ra_steps, dtype=float), n)
+    scenarios['points'] = rng.choice(np.asarray(points, dtype=int), n)
+    scenarios['start'] = (time.time() if start is None else start) + rng.uniform(0.0, 86400.0, n)
+    scenarios['seed'] = rng.integers(0, 2**62, n)
+    return scenarios
+
+def run_scenario(scenario, cache_dir="../../../../cache", render=False):
+    """
+    Runs one alignment on the simulated mount, camera and solver.
+
+    Args:
+        scenario (np.void): A row of SCENARIO_DTYPE.
+        cache_dir (str): IERS cache directory (see PolarAligner).
+        render (bool): Render the star field of every frame (slower; the solver still
+            uses the true pointing).
+
+    Returns:
+        np.void: A row of RESULT_DTYPE.
+    """
+    from astropy.coordinates import EarthLocation
+    import astropy.units as u
+    from aligner import PolarAligner
+    from fast_transform import FastAltAz
+
+    t0 = time.perf_counter()
+    result = np.zeros((), dtype=RESULT_DTYPE)
+    for name in SCENARIO_DTYPE.names:
+        result[name] = scenario[name]
+    result['ok'] = False
+    for name in ('fit_alt_error', 'fit_az_error', 'residual_alt', 'residual_az', 'residual', 'uncertainty'):
+        result[name] = np.nan
+
+    lat = float(scenario['lat'])
+    axis_alt = lat + scenario['alt_error'] / 60.0
+    axis_az = (scenario['az_error'] / 60.0) % 360.0
+    location = EarthLocation(lat=lat * u.deg, lon=float(scenario['lon']) * u.deg, height=0.0 * u.m)
+    clock = SimClock(scenario['start'])
+    mount = SimMount(clock, axis_alt, axis_az)
+    camera = SimCamera(mount, FastAltAz.from_location(location), scenario['offset'], scenario['phase'],
+                       roll=scenario['roll'], render=render)
+    solver = SimSolver(camera, scenario['noise'], seed=int(scenario['seed']))
+    aligner = PolarAligner(camera, solver, mount, location=location, cache_dir=cache_dir,
+                           ra_step=float(scenario['ra_step']), max_points=int(scenario['points']),
+                           point_sigma=max(float(scenario['noise']), 0.1), settle_time=0.0,
+                           settle_threshold=None, transform_backend="fast")
+
+    if aligner.run_alignment():
+        estimator = aligner.axis_estimator
+        fit_alt, fit_az = estimator.axis_altaz()
+        d_az = (fit_az - axis_az + 180.0) % 360.0 - 180.0
+        result['ok'] = True
+        result['fit_alt_error'] = (fit_alt - lat) * 60.0
+        result['fit_az_error'] = ((fit_az + 180.0) % 360.0 - 180.0) * 60.0
+        result['residual_alt'] = (fit_alt - axis_alt) * 3600.0
+        result['residual_az'] = d_az * 3600.0 * math.cos(math.radians(axis_alt))
+        cos_sep = np.clip(estimator.axis @ mount.axis, -1.0, 1.0)
+        result['residual'] = math.degrees(math.acos(cos_sep)) * 3600.0
+        result['uncertainty'] = estimator.uncertainty_arcsec()
+        result['alt_steps'] = mount.alt_moved
+        result['az_steps'] = mount.az_moved
+    result['solves'] = solver.solves
+    result['runtime'] = time.perf_counter() - t0
+    return result[()]
+
+def run_sweep(scenarios, workers=None, chunk_size=64, cache_dir="../../../../cache", render=False, mp_context=None):
+    """
+    Runs scenarios across a process pool.
+
+    Args:
+        scenarios (np.ndarray): Rows of SCENARIO_DTYPE (see make_scenarios).
+        workers (int, optional): Worker processes. Defaults to the number of cores;
+            1 runs everything in this process.
+        chunk_size (int): Scenarios per task; each worker keeps its imports and IERS table between tasks.
+        cache_dir (str): IERS cache directory.
+        render (bool): Render the frames (see run_scenario).
+        mp_context (optional): multiprocessing context, see solver_pool.default_mp_context.
+
+    Returns:
+        np.ndarray: Rows of RESULT_DTYPE, in scenario order.
+    """
+    scenarios = np.asarray(scenarios, dtype=SCENARIO_DTYPE)
+    workers = workers or os.cpu_count() or 1
+    results = np.zeros(len(scenarios), dtype=RESULT_DTYPE)
+    chunks = [(i, scenarios[i:i + chunk_size]) for i in range(0, len(scenarios), chunk_size)]
+    start = time.perf_counter()
+    if workers == 1:
+        for i, chunk in chunks:
+            results[i:i + len(chunk)] = _run_chunk(chunk, cache_dir, render)
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context or default_mp_context(),
+                             initializer=_init_worker) as pool:
+        futures = {pool.submit(_run_chunk, chunk, cache_dir, render): i for i, chunk in chunks}
+        for future in as_completed(futures):
+            chunk_results = future.result()
+            i = futures[future]
+            results[i:i + len(chunk_results)] = chunk_results
+            done += len(chunk_results)
+            logger.info("%d/%d scenarios (%.1f s)", done, len(scenarios), time.perf_counter() - start)
+    return results
+
+def summarize(results, by=None):
+    """
+    Aggregates residual statistics.
+
+    Args:
+        results (np.ndarray): Rows of RESULT_DTYPE.
+        by (str, optional): Scenario column to group by, e.g. 'points' or 'ra_step'.
+
+    Returns:
+        dict: {group value: stats}, or the stats of all results without by. Stats are
+        {'scenarios', 'failed', 'median', 'p95', 'max' (residual, arcsec), 'undetermined'
+        (axis left without an uncertainty bound), 'mean_uncertainty' (arcsec, determined
+        axes only), 'mean_runtime', 'total_runtime' (s)}.
+    """
+    if by is not None:
+        return {key.item(): summarize(results[results[by] == key]) for key in np.unique(results[by])}
+    ok = results[results['ok']]
+    residual = ok['residual']
+    finite = ok['uncertainty'][np.isfinite(ok['uncertainty'])]
+    return {
+        'scenarios': len(results),
+        'failed': int(len(results) - len(ok)),
+        'median': float(np.median(residual)) if len(ok) else float('nan'),
+        'p95': float(np.percentile(residual, 95)) if len(ok) else float('nan'),
+        'max': float(residual.max()) if len(ok) else float('nan'),
+        'undetermined': int(np.count_nonzero(np.isinf(ok['uncertainty']))),
+        'mean_uncertainty': float(finite.mean()) if len(finite) else float('nan'),
+        'mean_runtime': float(results['runtime'].mean()) if len(results) else float('nan'),
+        'total_runtime': float(results['runtime'].sum()),
+    }
+
+def save_results(results, path):
+    """
+    Writes results column by column: one array per field in a .npz, or a .csv with a header row.
+    The write is atomic.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            header = ",".join(results.dtype.names)
+            np.savetxt(f, results, delimiter=",", header=header, comments="", fmt=_csv_formats(results.dtype))
+        else:
+            np.savez(f, **{name: results[name] for name in results.dtype.names})
+    os.replace(tmp, path)
+
+def load_results(path):
+    """Reads a file written by save_results back into rows of RESULT_DTYPE."""
+    if os.path.splitext(path)[1].lower() == '.csv':
+        data = np.genfromtxt(path, delimiter=",", names=True, dtype=None)
+    else:
+        data = np.load(path)
+    results = np.zeros(len(data['id']), dtype=RESULT_DTYPE)
+    for name in RESULT_DTYPE.names:
+        results[name] = data[name]
+    return results
+
+def _csv_formats(dtype):
+    """Integers (ids, seeds) verbatim, floats with enough digits to read back bit-exact."""
+    return ["%.17g" if dtype[name].kind == 'f' else "%d" for name in dtype.names]
+
+def _radec_vec(ra, dec):
+    ra, dec = math.radians(ra), math.radians(dec)
+    return np.array([math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra), math.sin(dec)])
+
+def _init_worker():
+    # Per-point alignment logs of thousands of scenarios are noise
+    for name in ('aligner', 'mount'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+def _run_chunk(scenarios, cache_dir, render):
+    results = np.zeros(len(scenarios), dtype=RESULT_DTYPE)
+    for i, scenario in enumerate(scenarios):
+        results[i] = run_scenario(scenario, cache_dir, render)
+    return results
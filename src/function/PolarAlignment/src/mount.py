@@ -1,5 +1,189 @@
 import serial
 import time
+import logging
+import threading
+import collections
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+def reply_kind(cmd):
+    """
+    Returns the kind of reply OnStep sends for a command.
+
+    Returns:
+        str: 'string' for '#'-terminated replies (queries), 'char' for a single
+        status character without terminator (set commands, goto), or 'none'.
+    """
+    body = cmd.lstrip(':')
+    if body.startswith('G'):
+        return 'string'
+    if body.startswith('F') and len(body) > 2 and body[1].isdigit() and body[2] == 'G':
+        return 'string' # Focuser position query
+    if body.startswith(('S', 'MS')):
+        return 'char'
+    return 'none'
+
+def format_ra(ra_deg):
+    """RA in degrees to LX200 high precision "HH:MM:SS"."""
+    total = int(round((ra_deg % 360.0) / 15.0 * 3600.0)) % (24 * 3600)
+    return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+def format_dec(dec_deg):
+    """Dec in degrees to LX200 high precision "sDD*MM:SS"."""
+    sign = '-' if dec_deg < 0 else '+'
+    total = int(round(abs(dec_deg) * 3600.0))
+    return f"{sign}{total // 3600:02d}*{total // 60 % 60:02d}:{total % 60:02d}"
+
+def parse_ra(text):
+    """Parses "HH:MM:SS" (or "HH:MM.T") to degrees."""
+    return _sexagesimal(text) * 15.0
+
+def parse_dec(text):
+    """Parses "sDD*MM:SS" (or "sDD*MM", with '*', ':' or the degree sign) to degrees."""
+    return _sexagesimal(text)
+
+def _sexagesimal(text):
+    text = text.strip()
+    sign = -1.0 if text.startswith('-') else 1.0
+    for sep in ('*', '\xdf', '\xb0', "'"):
+        text = text.replace(sep, ':')
+    parts = [float(p) for p in text.lstrip('+-').split(':') if p]
+    value = 0.0
+    for k, part in enumerate(parts):
+        value += part / 60.0 ** k
+    return sign * value
+
+class CommandEngine:
+    """
+    Request/response engine for the LX200-style OnStep serial protocol.
+    Commands are written by the calling thread as soon as they are submitted, so
+    several queries can be in flight at once. A reader thread parses the replies
+    and hands them to the outstanding requests in FIFO order (the mount answers
+    commands in the order it receives them). Each request has its own timeout.
+    After a timeout the reply stream can no longer be matched to requests, so all
+    outstanding requests fail and the input buffer is discarded to resync.
+    """
+
+    def __init__(self, ser, default_timeout=1.0, poll_interval=0.02):
+        """
+        Args:
+            ser (serial.Serial): Open serial port.
+            default_timeout (float): Reply timeout in seconds when a command does not give one.
+            poll_interval (float): Read timeout of the reader thread, bounds timeout detection latency.
+        """
+        self.ser = ser
+        self.ser.timeout = poll_interval
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._pending = collections.deque() # (kind, deadline, future, cmd)
+        self._buffer = bytearray()
+        self._running = True
+        self._thread = threading.Thread(target=self._reader_loop, name="OnStepReader", daemon=True)
+        self._thread.start()
+
+    def submit(self, cmd, kind=None, timeout=None):
+        """
+        Sends a command without waiting for its reply.
+
+        Args:
+            cmd (str): Command, e.g. ':GR#'.
+            kind (str, optional): Reply kind ('string', 'char' or 'none'). Derived from the command by default.
+            timeout (float, optional): Reply timeout in seconds.
+
+        Returns:
+            Future: Resolves to the reply text without the '#' terminator,
+            or None for commands without reply.
+
+        Raises:
+            ConnectionError: If the engine is closed.
+        """
+        kind = kind or reply_kind(cmd)
+        future = Future()
+        with self._lock:
+            if not self._running:
+                raise ConnectionError("Command engine is closed")
+            if kind != 'none':
+                # Register before writing so a fast reply always finds its request
+                deadline = time.monotonic() + (timeout if timeout is not None else self.default_timeout)
+                self._pending.append((kind, deadline, future, cmd))
+            self.ser.write(cmd.encode('ascii'))
+        if kind == 'none':
+            future.set_result(None)
+        return future
+
+    def send(self, cmd, kind=None, timeout=None):
+        """
+        Sends a command and waits for its reply.
+
+        Returns:
+            str: Reply without the '#' terminator, or None for commands without reply.
+
+        Raises:
+            TimeoutError: If the mount does not answer in time.
+        """
+        return self.submit(cmd, kind, timeout).result()
+
+    def _reader_loop(self):
+        while self._running:
+            try:
+                data = self.ser.read(max(1, self.ser.in_waiting))
+            except (serial.SerialException, OSError, TypeError) as e:
+                with self._lock:
+                    if self._running:
+                        self._running = False
+                        self._fail_all(ConnectionError(f"Serial read failed: {e}"))
+                break
+            with self._lock:
+                if data:
+                    self._buffer.extend(data)
+                    self._dispatch()
+                self._check_timeouts()
+
+    def _dispatch(self):
+        """Hands complete replies in the buffer to the oldest outstanding requests."""
+        while self._buffer:
+            if not self._pending:
+                # Unsolicited bytes (or late replies after a resync)
+                self._buffer.clear()
+                return
+            kind, _, future, _ = self._pending[0]
+            if kind == 'char':
+                reply = self._buffer[:1]
+                del self._buffer[:1]
+            else:
+                end = self._buffer.find(b'#')
+                if end < 0:
+                    return
+                reply = self._buffer[:end]
+                del self._buffer[:end + 1]
+            self._pending.popleft()
+            future.set_result(reply.decode('ascii', errors='replace'))
+
+    def _check_timeouts(self):
+        if self._pending and self._pending[0][1] < time.monotonic():
+            cmd = self._pending[0][3]
+            self._fail_all(TimeoutError(f"No reply to {cmd} from the mount"))
+            # Replies still on their way would be matched to the wrong requests
+            self._buffer.clear()
+            try:
+                self.ser.reset_input_buffer()
+            except (serial.SerialException, OSError):
+                pass
+
+    def _fail_all(self, exc):
+        while self._pending:
+            future = self._pending.popleft()[2]
+            if not future.done():
+                future.set_exception(exc)
+
+    def close(self):
+        """Stops the reader thread. Outstanding requests fail."""
+        with self._lock:
+            self._running = False
+            self._fail_all(ConnectionError("Command engine closed"))
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
 
 class OnStepMount:
     """
@@ -10,6 +194,18 @@ class OnStepMount:
         self.baud = baud
         self.mock = mock
         self.ser = None
+        self.engine = None
+        self.telemetry = None
+        self.slew_timeout = 120.0
+        # Alignment base motion: focuser 1 drives altitude, focuser 2 azimuth
+        self.base_timeout = 60.0 # Per-axis limit for one correction, seconds
+        self.base_poll_interval = 0.05
+        self.backlash_steps = {1: 0, 2: 0} # Slack taken up when an axis reverses
+        self._base_direction = {1: 0, 2: 0} # Direction of the last move per focuser
+        # Simulated state in mock mode
+        self._mock_ra = 0.0
+        self._mock_dec = 90.0
+        self._mock_focusers = {1: 0, 2: 0}
         
         # Configuration for Alt/Az axes (e.g., Focuser 1 and 2)
         # 1 step = X arcseconds? We need calibration.
@@ -18,53 +214,162 @@ class OnStepMount:
         
     def connect(self):
         if self.mock:
-            print("Connected to Mock Mount.")
+            logger.info("Connected to Mock Mount.")
             return True
             
         try:
-            self.ser = serial.Serial(self.port, self.baud, timeout=2)
+            self.ser = serial.Serial(self.port, self.baud, timeout=0)
             # Flush
-            self.ser.read_all()
-            print(f"Connected to OnStep at {self.port}")
+            self.ser.reset_input_buffer()
+            self.engine = CommandEngine(self.ser)
+            logger.info("Connected to OnStep at %s", self.port)
             return True
         except serial.SerialException as e:
-            print(f"Failed to connect to mount: {e}. Switching to Mock mode.")
+            logger.warning("Failed to connect to mount: %s. Switching to Mock mode.", e)
             self.mock = True
             return True
 
-    def _send_cmd(self, cmd):
+    def disconnect(self):
+        """Stops telemetry and the command engine and closes the serial port."""
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.telemetry = None
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+        if self.ser is not None:
+            self.ser.close()
+            self.ser = None
+
+    def _send_cmd(self, cmd, timeout=None):
+        """
+        Sends a command and waits for its reply.
+
+        Returns:
+            str: Reply without the '#' terminator, None for commands that have no reply.
+
+        Raises:
+            TimeoutError: If the mount does not answer in time.
+        """
         if self.mock:
-            print(f"[Mount Mock] TX: {cmd}")
-            return "0#" # Success
+            logger.debug("[Mount Mock] TX: %s", cmd)
+            return self._mock_reply(cmd)
+        return self.engine.send(cmd, timeout=timeout)
+
+    def _mock_reply(self, cmd):
+        """
+        Answers position, status and focuser queries from the simulated state.
+        Other commands get the reply a real mount sends (see reply_kind), without the '#'.
+        """
+        if cmd == ":GR#":
+            return format_ra(self._mock_ra)
+        if cmd == ":GD#":
+            return format_dec(self._mock_dec)
+        if cmd == ":GU#":
+            return "nN"
+        if len(cmd) > 3 and cmd[1] == 'F' and cmd[2].isdigit():
+            n = int(cmd[2])
+            if cmd[3] == 'G':
+                return str(self._mock_focusers.get(n, 0))
+            if cmd[3] == 'M':
+                self._mock_focusers[n] = self._mock_focusers.get(n, 0) + int(cmd[4:-1])
+        kind = reply_kind(cmd)
+        if kind == 'char':
+            return '0' if cmd.startswith(':MS') else '1' # Goto started, value accepted
+        return None if kind == 'none' else "0"
             
-        self.ser.write(cmd.encode('ascii'))
-        # Most OnStep commands end with # and don't return much unless queried
-        # But we should wait a bit or read response if expected
-        time.sleep(0.1)
-        return "" # We don't strictly read back for blind moves in this demo
-
-    def slew_ra_relative(self, degrees):
-        """
-        Slews RA axis relative to current position.
-        Using :MS# (Slew) commands is complex as it requires target coordinates.
-        For simple rotation, we might use :Mn# (Move North/South/East/West) with duration?
-        Or better: Sync to current, calc target, Goto.
+    def submit_cmd(self, cmd, timeout=None):
+        """
+        Sends a command without waiting, so several queries can be in flight at once.
+
+        Returns:
+            Future: Resolves to the reply (see _send_cmd).
+        """
+        if self.mock:
+            future = Future()
+            future.set_result(self._send_cmd(cmd))
+            return future
+        return self.engine.submit(cmd, timeout=timeout)
+
+    def start_telemetry(self, rate_hz=5.0, focusers=(1, 2)):
+        """
+        Starts background polling of position, status and focusers.
+        get_position and the slew logic then read the cached state instead of
+        querying the mount themselves.
         
-        For simplicity in this PA routine, we assume we can issue a "Move Axis 1 by X degrees" command.
-        OnStep has specific commands for this in some versions, or we just calculate target.
+        Returns:
+            MountTelemetry: The running telemetry (also available as self.telemetry).
+        """
+        from telemetry import MountTelemetry
+        if self.telemetry is None:
+            self.telemetry = MountTelemetry(self, rate_hz=rate_hz, focusers=focusers)
+        return self.telemetry.start()
+
+    def state(self, max_age=None):
+        """
+        Returns the current MountState.
+        Uses the telemetry cache when it is running and fresh enough,
+        otherwise polls the mount once.
         
-        Let's simulate "Slew RA" by just printing in mock.
+        Args:
+            max_age (float, optional): Oldest acceptable cached state in seconds.
+                Defaults to two telemetry periods.
+        """
+        from telemetry import MountTelemetry
+        telemetry = self.telemetry
+        if telemetry is not None and telemetry.is_running:
+            state = telemetry.latest()
+            if max_age is None:
+                max_age = 2.0 * telemetry.interval
+            if state is not None and time.time() - state.timestamp <= max_age:
+                return state
+            return telemetry.wait_for_update(state.seq if state is not None else None)
+        return MountTelemetry(self, focusers=()).poll_once()
+
+    def slew_ra_relative(self, degrees, wait=True):
         """
-        print(f"Slewing RA by {degrees} degrees...")
+        Slews the RA axis relative to its current position.
+        Reads the current RA/Dec, sets the target RA shifted by degrees with
+        :Sr#/:Sd# and starts the goto with :MS#.
+        
+        Args:
+            degrees (float): RA rotation in degrees.
+            wait (bool): Block until the goto has finished.
+            
+        Raises:
+            RuntimeError: If the mount rejects the target or the goto.
+            TimeoutError: If the slew does not finish within slew_timeout.
+        """
+        logger.info("Slewing RA by %s degrees...", degrees)
         if self.mock:
+            self._mock_ra = (self._mock_ra + degrees) % 360.0
             return
             
-        # Real implementation would:
-        # 1. Get current RA/Dec (:GR#, :GD#)
-        # 2. Add degrees to RA
-        # 3. :Sr# :Sd# (Set target)
-        # 4. :MS# (Slew)
-        pass
+        ra, dec = self.get_position()
+        target_ra = (ra + degrees) % 360.0
+        if self._send_cmd(f":Sr{format_ra(target_ra)}#") != '1':
+            raise RuntimeError(f"Mount rejected target RA {target_ra:.4f}")
+        if self._send_cmd(f":Sd{format_dec(dec)}#") != '1':
+            raise RuntimeError(f"Mount rejected target Dec {dec:.4f}")
+        reply = self._send_cmd(":MS#")
+        if reply != '0':
+            raise RuntimeError(f"Goto refused by mount (code {reply})")
+        if wait:
+            self.wait_for_slew()
+
+    def wait_for_slew(self, timeout=None):
+        """
+        Blocks until the mount reports that no goto is in progress.
+        
+        Raises:
+            TimeoutError: If the slew does not finish in time.
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.slew_timeout)
+        while time.monotonic() < deadline:
+            if not self.state(max_age=0.5).slewing:
+                return
+            time.sleep(0.1)
+        raise TimeoutError("Slew did not finish in time")
 
     def move_alt_steps(self, steps):
         """
@@ -84,9 +389,108 @@ class OnStepMount:
         cmd = f":F2M{int(steps)}#"
         self._send_cmd(cmd)
         
+    def move_base(self, alt_steps, az_steps, timeout=None):
+        """
+        Moves both alignment base axes at the same time.
+        Both moves are started before either one is waited on, so a correction
+        takes as long as the slower axis. A watcher thread then polls the focuser
+        positions (from telemetry when it runs, else directly) until each axis
+        has reached its target. An axis that reverses direction gets its
+        backlash_steps added to the move.
+
+        Args:
+            alt_steps (int): Altitude steps (focuser 1).
+            az_steps (int): Azimuth steps (focuser 2).
+            timeout (float or tuple, optional): Per-axis limit in seconds, a single
+                value or (alt, az). Defaults to base_timeout.
+
+        Returns:
+            Future: Resolves to {'alt': steps moved, 'az': steps moved,
+            'elapsed': {'alt': s, 'az': s}, 'finished': Unix time} once both axes
+            have stopped. Fails with TimeoutError if an axis does not arrive in time;
+            that axis is stopped with :F<n>Q#.
+        """
+        if timeout is None:
+            timeout = self.base_timeout
+        timeouts = dict(zip((1, 2), timeout if isinstance(timeout, (tuple, list)) else (timeout, timeout)))
+        moves = {1: self._with_backlash(1, int(alt_steps)), 2: self._with_backlash(2, int(az_steps))}
+        future = Future()
+
+        if self.mock:
+            self.move_alt_steps(moves[1])
+            self.move_az_steps(moves[2])
+            future.set_result({'alt': moves[1], 'az': moves[2], 'elapsed': {'alt': 0.0, 'az': 0.0},
+                               'finished': time.time()})
+            return future
+
+        start, _ = self._base_positions()
+        targets = {n: start[n] + moves[n] for n in (1, 2)}
+        t0 = time.monotonic()
+        self.move_alt_steps(moves[1])
+        self.move_az_steps(moves[2])
+        threading.Thread(target=self._watch_base, args=(future, moves, targets, timeouts, t0),
+                         name="BaseMotion", daemon=True).start()
+        return future
+
+    def _with_backlash(self, focuser, steps):
+        """Adds the backlash take-up to a move that reverses the axis."""
+        if steps == 0:
+            return 0
+        direction = 1 if steps > 0 else -1
+        last = self._base_direction[focuser]
+        self._base_direction[focuser] = direction
+        if last and last != direction:
+            return steps + direction * self.backlash_steps.get(focuser, 0)
+        return steps
+
+    def _base_positions(self, seq=None):
+        """
+        Reads both focuser positions.
+
+        Args:
+            seq (int, optional): Telemetry sequence already seen; waits for a newer snapshot.
+
+        Returns:
+            tuple: ({focuser: steps}, telemetry seq or None)
+        """
+        telemetry = self.telemetry
+        if telemetry is not None and telemetry.is_running and {1, 2} <= set(telemetry.focusers):
+            state = telemetry.wait_for_update(seq)
+            return dict(state.focusers), state.seq
+        futures = {n: self.submit_cmd(f":F{n}G#") for n in (1, 2)}
+        return {n: int(f.result()) for n, f in futures.items()}, None
+
+    def _watch_base(self, future, moves, targets, timeouts, t0):
+        names = {1: 'alt', 2: 'az'}
+        elapsed = {n: 0.0 for n in (1, 2) if moves[n] == 0}
+        positions, seq = {}, None
+        try:
+            while len(elapsed) < 2:
+                try:
+                    positions, seq = self._base_positions(seq)
+                except (TimeoutError, ValueError):
+                    positions = {} # Missed one poll, the deadlines still apply
+                now = time.monotonic()
+                for n in (1, 2):
+                    if n in elapsed:
+                        continue
+                    if positions.get(n) == targets[n]:
+                        elapsed[n] = now - t0
+                    elif now - t0 > timeouts[n]:
+                        self._send_cmd(f":F{n}Q#")
+                        raise TimeoutError(f"Alignment base {names[n]} axis did not reach {targets[n]} "
+                                           f"(at {positions.get(n)}) within {timeouts[n]:.1f} s")
+                if len(elapsed) < 2 and seq is None:
+                    time.sleep(self.base_poll_interval)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        future.set_result({'alt': moves[1], 'az': moves[2],
+                           'elapsed': {names[n]: t for n, t in elapsed.items()}, 'finished': time.time()})
+
     def get_position(self):
         """Returns current (RA, Dec) tuple in degrees."""
         if self.mock:
-            return (0.0, 90.0)
-        # Implement parsing :GR# and :GD#
-        return (0.0, 90.0)
+            return (self._mock_ra, self._mock_dec)
+        state = self.state()
+        return (state.ra, state.dec)
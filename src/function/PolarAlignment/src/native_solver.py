@@ -0,0 +1,389 @@
+import os
+import math
+import itertools
+import numpy as np
+from stars import extract_stars
+
+def radec_to_vec(ra_deg, dec_deg):
+    """Converts RA/Dec in degrees (scalars or arrays) to unit vectors (..., 3)."""
+    ra = np.radians(ra_deg)
+    dec = np.radians(dec_deg)
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+def vec_to_radec(vec):
+    """Converts unit vectors (..., 3) to RA/Dec in degrees. RA is in [0, 360)."""
+    vec = np.asarray(vec)
+    ra = np.degrees(np.arctan2(vec[..., 1], vec[..., 0])) % 360.0
+    dec = np.degrees(np.arcsin(np.clip(vec[..., 2], -1.0, 1.0)))
+    return ra, dec
+
+def tangent_basis(center):
+    """
+    Returns the (east, north) unit vectors of the tangent plane at a unit vector.
+    These are the standard coordinate axes (xi, eta) of the gnomonic projection.
+    """
+    ra, dec = vec_to_radec(center)
+    ra = math.radians(float(ra))
+    dec = math.radians(float(dec))
+    east = np.array([-math.sin(ra), math.cos(ra), 0.0])
+    north = np.array([-math.sin(dec) * math.cos(ra), -math.sin(dec) * math.sin(ra), math.cos(dec)])
+    return east, north
+
+def gnomonic(vecs, center, east, north):
+    """Projects unit vectors onto the tangent plane at center. Returns (N, 2) standard coordinates."""
+    denom = vecs @ center
+    return np.column_stack([(vecs @ east) / denom, (vecs @ north) / denom])
+
+def _describe_triangles(points, tris):
+    """
+    Computes scale/rotation invariant triangle descriptors.
+    Vertices are reordered so that vertex k is opposite the k-th shortest side,
+    which fixes the correspondence between matching triangles.
+
+    Returns:
+        tuple: (ratios (M, 2), ordered vertex indices (M, 3), longest side (M,))
+    """
+    p0, p1, p2 = points[tris[:, 0]], points[tris[:, 1]], points[tris[:, 2]]
+    sides = np.stack([
+        np.linalg.norm(p1 - p2, axis=1),
+        np.linalg.norm(p0 - p2, axis=1),
+        np.linalg.norm(p0 - p1, axis=1),
+    ], axis=1)
+    order = np.argsort(sides, axis=1)
+    sides = np.take_along_axis(sides, order, axis=1)
+    verts = np.take_along_axis(tris, order, axis=1)
+    longest = sides[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = sides[:, :2] / longest[:, None]
+    return ratios, verts, longest
+
+def _fit_similarity(src, dst, mirror=False):
+    """
+    Least-squares similarity transform dst = A * src + B using complex numbers.
+    With mirror=True the source is reflected first (dst = A * conj(src) + B).
+
+    Returns:
+        tuple: (A, B, rms residual)
+    """
+    z = src[:, 0] + 1j * src[:, 1]
+    if mirror:
+        z = np.conj(z)
+    w = dst[:, 0] + 1j * dst[:, 1]
+    zm, wm = z.mean(), w.mean()
+    zc = z - zm
+    denom = np.sum(np.abs(zc) ** 2)
+    if denom == 0:
+        return 0j, wm, np.inf
+    A = np.sum(np.conj(zc) * (w - wm)) / denom
+    B = wm - A * zm
+    rms = math.sqrt(np.mean(np.abs(A * z + B - w) ** 2))
+    return A, B, rms
+
+def _apply_similarity(A, B, xy, mirror=False):
+    z = xy[:, 0] + 1j * xy[:, 1]
+    if mirror:
+        z = np.conj(z)
+    w = A * z + B
+    return np.column_stack([w.real, w.imag])
+
+class NativeSolver:
+    """
+    Pure Python/NumPy plate solver.
+    Detected star triangles are matched against a geometric hash index built
+    from a local star catalog, and candidate matches are verified by
+    projecting the catalog onto the image. No subprocess is involved.
+    """
+
+    def __init__(self, ra, dec, mag, fov_deg=3.0, mag_limit=None, neighbours=6,
+                 pattern_radius_deg=None, max_image_stars=15, max_verify_stars=40,
+                 ratio_tolerance=0.01, scale_tolerance=0.2, match_radius_px=3.0,
+                 min_matches=6, min_match_fraction=0.3, max_hypotheses=2000, rotation_tolerance=15.0):
+        """
+        Builds the triangle index.
+
+        Args:
+            ra, dec, mag (array-like): Catalog positions in degrees and magnitudes.
+            fov_deg (float): Horizontal field of view of the camera in degrees.
+            mag_limit (float, optional): Ignore catalog stars fainter than this.
+            neighbours (int): Brightest neighbours per star used to build triangles.
+            pattern_radius_deg (float, optional): Neighbour search radius. Defaults to 0.4 * fov.
+            max_image_stars (int): Brightest detected stars used to form image triangles.
+            max_verify_stars (int): Detected stars used to verify a candidate match.
+            ratio_tolerance (float): Allowed difference of triangle side ratios.
+            scale_tolerance (float): Allowed relative pixel scale error versus fov_deg.
+            match_radius_px (float): Star match radius during verification, in pixels.
+            min_matches (int): Stars that must match for a solution to be accepted.
+            min_match_fraction (float): Fraction of the detected stars that must match.
+            max_hypotheses (int): Candidate triangle matches verified before giving up.
+            rotation_tolerance (float): Allowed roll error in degrees when a rotation hint is given.
+        """
+        ra = np.asarray(ra, dtype=np.float64)
+        dec = np.asarray(dec, dtype=np.float64)
+        mag = np.asarray(mag, dtype=np.float64)
+        keep = np.isfinite(mag) if mag_limit is None else mag <= mag_limit
+        order = np.argsort(mag[keep], kind='stable')
+        self.ra = ra[keep][order]
+        self.dec = dec[keep][order]
+        self.mag = mag[keep][order]
+        self.vec = radec_to_vec(self.ra, self.dec)
+
+        self.fov_deg = fov_deg
+        self.neighbours = neighbours
+        self.pattern_radius = math.radians(pattern_radius_deg if pattern_radius_deg else 0.4 * fov_deg)
+        self.max_image_stars = max_image_stars
+        self.max_verify_stars = max_verify_stars
+        self.ratio_tolerance = ratio_tolerance
+        self.scale_tolerance = scale_tolerance
+        self.match_radius_px = match_radius_px
+        self.min_matches = min_matches
+        self.min_match_fraction = min_match_fraction
+        self.max_hypotheses = max_hypotheses
+        self.rotation_tolerance = rotation_tolerance
+        self.cancel_event = None # Optional threading/multiprocessing Event; when set, a running solve gives up
+
+        self._build_index()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        Loads a catalog file and builds a solver.
+        Supports .npz/.npy (fields or arrays named ra, dec, mag) and
+        .csv (columns ra,dec,mag with a header line).
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.csv':
+            data = np.genfromtxt(path, delimiter=',', names=True)
+        else:
+            data = np.load(path)
+        return cls(data['ra'], data['dec'], data['mag'], **kwargs)
+
+    @classmethod
+    def from_catalog(cls, catalog, ra, dec, radius, mag_limit=None, **kwargs):
+        """
+        Builds a solver for one region of a StarCatalog.
+        Only the cone around (ra, dec) is read, so the catalog may be far larger than memory.
+
+        Args:
+            catalog (StarCatalog): The shared catalog.
+            ra, dec (float): Region centre in degrees.
+            radius (float): Region radius in degrees. Solves must stay inside it.
+            mag_limit (float, optional): Ignore catalog stars fainter than this.
+        """
+        stars = catalog.cone_search(ra, dec, radius, mag_limit=mag_limit)
+        return cls(stars['ra'], stars['dec'], stars['mag'], **kwargs)
+
+    def _build_index(self):
+        """Forms triangles from each star and its brightest neighbours and sorts them by descriptor."""
+        n = len(self.vec)
+        dec_order = np.argsort(self.dec)
+        dec_sorted = self.dec[dec_order]
+        radius_deg = math.degrees(self.pattern_radius)
+        cos_r = math.cos(self.pattern_radius)
+        lo = np.searchsorted(dec_sorted, self.dec - radius_deg, side='left')
+        hi = np.searchsorted(dec_sorted, self.dec + radius_deg, side='right')
+
+        tris = []
+        for i in range(n):
+            cand = dec_order[lo[i]:hi[i]]
+            nb = cand[(self.vec[cand] @ self.vec[i] > cos_r) & (cand != i)]
+            if len(nb) < 2:
+                continue
+            # Catalog is sorted by magnitude, so the smallest indices are the brightest
+            nb = np.sort(nb)[:self.neighbours]
+            a, b = np.triu_indices(len(nb), 1)
+            tris.append(np.column_stack([np.full(len(a), i), nb[a], nb[b]]))
+
+        if tris:
+            tris = np.unique(np.sort(np.vstack(tris), axis=1), axis=0)
+        else:
+            tris = np.zeros((0, 3), dtype=np.int64)
+
+        ratios, verts, longest = _describe_triangles(self.vec, tris)
+        order = np.argsort(ratios[:, 0])
+        self.index_ratios = ratios[order]
+        self.index_verts = verts[order]
+        self.index_longest = longest[order]
+
+    def solve(self, image, search_radius=180, hint=None):
+        """
+        Solves an image.
+
+        Args:
+            image (Frame | np.ndarray | str): Frame, 2D array or image path.
+            search_radius (float): Search radius around the hint in degrees.
+                Ignored for blind solves (no hint).
+            hint (dict, optional): Predicted {'ra', 'dec'} and optionally 'rotation'
+                in degrees. Only catalog stars within search_radius of the hint
+                are considered, and candidates with the wrong roll are skipped.
+
+        Returns:
+            dict: {'ra', 'dec', 'rotation', 'scale', 'matches', 'parity'}.
+            ra/dec/rotation in degrees, scale in arcsec/pixel.
+            None if no verified solution is found, or if cancel_event was set.
+        """
+        img = self._load(image)
+        h, w = img.shape
+        stars = extract_stars(img, max_stars=self.max_verify_stars)
+        if len(stars) < 4 or len(self.index_ratios) == 0:
+            return None
+
+        # Centred coordinates with y pointing up, matching the sky's north
+        xy = np.column_stack([stars['x'] - w / 2.0, h / 2.0 - stars['y']])
+        expected_scale = math.radians(self.fov_deg) / w if self.fov_deg else None
+
+        n = min(len(xy), self.max_image_stars)
+        img_tris = np.array(list(itertools.combinations(range(n), 3)))
+        ratios, verts, longest = _describe_triangles(xy, img_tris)
+        valid = longest > 0
+        if expected_scale is not None:
+            # Triangles larger than any index pattern cannot match
+            valid &= longest * expected_scale <= 2.0 * self.pattern_radius * (1.0 + self.scale_tolerance)
+        ratios, verts, longest = ratios[valid], verts[valid], longest[valid]
+
+        index_ratios, index_verts, index_longest = self.index_ratios, self.index_verts, self.index_longest
+        region = None
+        if hint is not None and search_radius < 180:
+            # Hinted solve: restrict the index and the verification stars to the search area
+            hint_vec = radec_to_vec(hint['ra'], hint['dec'])
+            half_diag = 0.5 * math.radians(self.fov_deg) * math.hypot(w, h) / w
+            reach = min(math.pi, math.radians(search_radius) + half_diag)
+            region = np.flatnonzero(self.vec @ hint_vec > math.cos(reach))
+            in_region = np.zeros(len(self.vec), dtype=bool)
+            in_region[region] = True
+            sub = in_region[index_verts].all(axis=1)
+            index_ratios, index_verts, index_longest = index_ratios[sub], index_verts[sub], index_longest[sub]
+
+        img_idx, cat_idx = self._candidates(ratios, index_ratios)
+        if len(img_idx) == 0 or self._cancelled():
+            return None
+        err = np.abs(ratios[img_idx] - index_ratios[cat_idx]).sum(axis=1)
+        ok = err < self.ratio_tolerance * 2
+        if expected_scale is not None:
+            scale = index_longest[cat_idx] / longest[img_idx]
+            ok &= np.abs(scale / expected_scale - 1.0) < self.scale_tolerance
+        img_idx, cat_idx, err = img_idx[ok], cat_idx[ok], err[ok]
+        if region is not None and hint.get('rotation') is not None:
+            ok = self._rotation_matches(xy, verts[img_idx], index_verts[cat_idx], hint_vec, hint['rotation'])
+            img_idx, cat_idx, err = img_idx[ok], cat_idx[ok], err[ok]
+        best = np.argsort(err)[:self.max_hypotheses]
+
+        rotation_hint = hint.get('rotation') if region is not None else None
+        for i, k in enumerate(best):
+            if i % 16 == 0 and self._cancelled():
+                return None
+            sol = self._verify(xy, verts[img_idx[k]], index_verts[cat_idx[k]], w, h, region, rotation_hint)
+            if sol is not None:
+                return sol
+        return None
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _load(self, image):
+        if hasattr(image, 'data') and not isinstance(image, np.ndarray):
+            return image.data
+        if isinstance(image, str):
+            if image.lower().endswith(('.fits', '.fit', '.fts')):
+                from astropy.io import fits
+                return np.asarray(fits.getdata(image))
+            import cv2
+            img = cv2.imread(image, cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                raise FileNotFoundError(f"Image not found: {image}")
+            return img
+        return np.asarray(image)
+
+    def _candidates(self, ratios, index_ratios):
+        """Finds index triangles whose ratios are within tolerance (vectorized range lookup)."""
+        tol = self.ratio_tolerance
+        lo = np.searchsorted(index_ratios[:, 0], ratios[:, 0] - tol, side='left')
+        hi = np.searchsorted(index_ratios[:, 0], ratios[:, 0] + tol, side='right')
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        img_idx = np.repeat(np.arange(len(ratios)), counts)
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        cat_idx = np.arange(total) + starts
+        keep = np.abs(index_ratios[cat_idx, 1] - ratios[img_idx, 1]) < tol
+        return img_idx[keep], cat_idx[keep]
+
+    def _rotation_matches(self, xy, img_verts, cat_verts, hint_vec, rotation):
+        """
+        Vectorized roll check for candidate triangles.
+        Uses the tangent plane at the hint, which is accurate enough near the hint.
+        """
+        east, north = tangent_basis(hint_vec)
+        p0 = gnomonic(self.vec[cat_verts[:, 0]], hint_vec, east, north)
+        p1 = gnomonic(self.vec[cat_verts[:, 1]], hint_vec, east, north)
+        d_cat = (p1[:, 0] - p0[:, 0]) + 1j * (p1[:, 1] - p0[:, 1])
+        d_img = (xy[img_verts[:, 1], 0] - xy[img_verts[:, 0], 0]) + 1j * (xy[img_verts[:, 1], 1] - xy[img_verts[:, 0], 1])
+        ok = np.zeros(len(d_cat), dtype=bool)
+        for z in (d_img, np.conj(d_img)):
+            roll = -np.degrees(np.angle(d_cat / z))
+            diff = (roll - rotation + 180.0) % 360.0 - 180.0
+            ok |= np.abs(diff) < self.rotation_tolerance
+        return ok
+
+    def _verify(self, xy, img_verts, cat_verts, width, height, region=None, rotation_hint=None):
+        """Checks a triangle correspondence against all detected stars and refines it."""
+        center = self.vec[cat_verts].sum(axis=0)
+        center /= np.linalg.norm(center)
+        east, north = tangent_basis(center)
+        cat_xy = gnomonic(self.vec[cat_verts], center, east, north)
+
+        fits = [(_fit_similarity(xy[img_verts], cat_xy, mirror), mirror) for mirror in (False, True)]
+        (A, B, rms), mirror = min(fits, key=lambda f: f[0][2])
+        scale = abs(A)
+        if scale == 0 or rms > self.match_radius_px * scale:
+            return None
+
+        # Catalog stars that could fall inside the frame
+        half_diag = 0.5 * math.hypot(width, height) * scale * 1.1
+        if region is None:
+            local = np.flatnonzero(self.vec @ center > math.cos(half_diag))
+        else:
+            local = region[self.vec[region] @ center > math.cos(half_diag)]
+        if len(local) < self.min_matches:
+            return None
+
+        # Move the tangent point to the predicted image centre and refit the triangle there
+        center, east, north = _recentre(center, east, north, B)
+        A, B, _ = _fit_similarity(xy[img_verts], gnomonic(self.vec[cat_verts], center, east, north), mirror)
+
+        # Vectorized verification: nearest catalog star for every detected star
+        local_xy = gnomonic(self.vec[local], center, east, north)
+        sky = _apply_similarity(A, B, xy, mirror)
+        d2 = ((sky[:, None, :] - local_xy[None, :, :]) ** 2).sum(axis=2)
+        nearest = np.argmin(d2, axis=1)
+        matched = d2[np.arange(len(xy)), nearest] < (self.match_radius_px * scale) ** 2
+        if matched.sum() < max(self.min_matches, self.min_match_fraction * len(xy)):
+            return None
+        matched_vec = self.vec[local[nearest[matched]]]
+        A, B, _ = _fit_similarity(xy[matched], gnomonic(matched_vec, center, east, north), mirror)
+
+        # Final re-centre so the rotation is measured in the image centre's basis
+        center, east, north = _recentre(center, east, north, B)
+        A, B, _ = _fit_similarity(xy[matched], gnomonic(matched_vec, center, east, north), mirror)
+
+        ci = B.real * east + B.imag * north + center
+        ra, dec = vec_to_radec(ci / np.linalg.norm(ci))
+        rotation = (-math.degrees(np.angle(A))) % 360.0
+        if rotation_hint is not None and abs((rotation - rotation_hint + 180.0) % 360.0 - 180.0) > self.rotation_tolerance:
+            return None
+        return {
+            'ra': float(ra),
+            'dec': float(dec),
+            'rotation': rotation,
+            'scale': math.degrees(abs(A)) * 3600.0,
+            'matches': int(matched.sum()),
+            'parity': 'mirrored' if mirror else 'normal',
+        }
+
+def _recentre(center, east, north, offset):
+    """Moves the tangent point to the standard coordinates given by a complex offset."""
+    vec = center + offset.real * east + offset.imag * north
+    vec /= np.linalg.norm(vec)
+    east, north = tangent_basis(vec)
+    return vec, east, north
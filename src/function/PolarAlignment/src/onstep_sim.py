@@ -0,0 +1,157 @@
+import os
+import pty
+import tty
+import select
+import threading
+import time
+from mount import format_ra, format_dec, parse_ra, parse_dec
+
+class FakeOnStep:
+    """
+    Pseudo-terminal based OnStep emulator for tests and development without hardware.
+    Open `port` with pyserial (or OnStepMount) like a real serial device. It speaks
+    the subset of the LX200/OnStep protocol used by this package:
+
+    - :GR# / :GD#  RA ("HH:MM:SS#") and Dec ("sDD*MM:SS#")
+    - :GU#         status string ('n' = not tracking, 'N' = no goto in progress)
+    - :SrHH:MM:SS# / :SdsDD*MM:SS#  set target, reply '1'
+    - :MS#         goto the target, reply '0'
+    - :F<n>M<steps>#  move focuser n by steps, no reply
+    - :F<n>G#      focuser n position ("<steps>#")
+    - :F<n>Q#      stop focuser n, no reply
+
+    Unknown commands get no reply. Commands listed in `ignore` are swallowed
+    without reply, to test timeouts.
+    """
+
+    def __init__(self, reply_delay=0.0, ignore=(), slew_rate=None, focuser_rate=None):
+        """
+        Args:
+            reply_delay (float): Processing delay before each reply, in seconds.
+            ignore (iterable): Commands (e.g. ':GR#') that never get a reply.
+            slew_rate (float, optional): Goto speed in degrees per second. Gotos are instant by default.
+            focuser_rate (float or dict, optional): Focuser speed in steps per second, one value
+                or {focuser: rate}. Focuser moves are instant by default.
+        """
+        self.reply_delay = reply_delay
+        self.slew_rate = slew_rate
+        self.focuser_rate = focuser_rate
+        self.ignore = set(ignore)
+        self.ra = 0.0 # degrees
+        self.dec = 90.0
+        self.target = (0.0, 90.0)
+        self.focusers = {1: 0, 2: 0}
+        self.received = []
+        self._slew = None # (start time, start ra, start dec) of a goto in progress
+        self._focus_moves = {} # focuser -> (start time, start position, target)
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="FakeOnStep", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        buffer = b''
+        while self._running:
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                buffer += os.read(self._master, 1024)
+            except OSError:
+                break
+            while b'#' in buffer:
+                raw, buffer = buffer.split(b'#', 1)
+                # Anything before the leading ':' is line noise
+                cmd = raw[raw.find(b':'):].decode('ascii', errors='replace') + '#'
+                self.received.append(cmd)
+                if cmd in self.ignore:
+                    continue
+                reply = self.handle(cmd)
+                if reply is not None:
+                    if self.reply_delay:
+                        time.sleep(self.reply_delay)
+                    os.write(self._master, reply.encode('ascii'))
+
+    def handle(self, cmd):
+        """Returns the reply to a command, or None."""
+        body = cmd[1:-1]
+        self._update_slew()
+        self._update_focusers()
+        if body == 'GR':
+            return format_ra(self.ra) + '#'
+        if body == 'GD':
+            return format_dec(self.dec) + '#'
+        if body == 'GU':
+            return 'n#' if self._slew else 'nN#'
+        if body.startswith('Sr'):
+            self.target = (parse_ra(body[2:]), self.target[1])
+            return '1'
+        if body.startswith('Sd'):
+            self.target = (self.target[0], parse_dec(body[2:]))
+            return '1'
+        if body == 'MS':
+            if self.slew_rate:
+                self._slew = (time.monotonic(), self.ra, self.dec)
+            else:
+                self.ra, self.dec = self.target
+            return '0'
+        if body.startswith('F') and len(body) > 2 and body[1].isdigit():
+            n = int(body[1])
+            if body[2] == 'M':
+                target = self.focusers.get(n, 0) + int(body[3:])
+                if self._rate(n):
+                    self._focus_moves[n] = (time.monotonic(), self.focusers.get(n, 0), target)
+                else:
+                    self.focusers[n] = target
+                return None
+            if body[2] == 'Q':
+                self._focus_moves.pop(n, None)
+                return None
+            if body[2] == 'G':
+                return f"{self.focusers.get(n, 0)}#"
+        return None
+
+    def _update_slew(self):
+        """Moves both axes toward the target at slew_rate."""
+        if not self._slew:
+            return
+        start, ra0, dec0 = self._slew
+        step = (time.monotonic() - start) * self.slew_rate
+        d_ra = (self.target[0] - ra0 + 180.0) % 360.0 - 180.0
+        d_dec = self.target[1] - dec0
+        if step >= max(abs(d_ra), abs(d_dec)):
+            self.ra, self.dec = self.target
+            self._slew = None
+            return
+        self.ra = (ra0 + max(-step, min(step, d_ra))) % 360.0
+        self.dec = dec0 + max(-step, min(step, d_dec))
+
+    def _rate(self, n):
+        if isinstance(self.focuser_rate, dict):
+            return self.focuser_rate.get(n)
+        return self.focuser_rate
+
+    def _update_focusers(self):
+        """Moves the focusers toward their targets at focuser_rate."""
+        for n, (start, pos0, target) in list(self._focus_moves.items()):
+            step = int((time.monotonic() - start) * self._rate(n))
+            if step >= abs(target - pos0):
+                self.focusers[n] = target
+                del self._focus_moves[n]
+            else:
+                self.focusers[n] = pos0 + (step if target > pos0 else -step)
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,78 @@
+import time
+import numpy as np
+from stars import extract_stars
+from tracking import StarTracker
+
+class SettleDetector:
+    """
+    Decides when the mount has stopped moving after a slew by watching the frame stream.
+    Stars are matched between consecutive frames and the shift of the field is
+    measured. The mount counts as settled once the shift stays below a threshold
+    for a number of consecutive frame pairs.
+
+    The threshold is given in arcsec and converted to pixels with the pixel
+    scale; without a scale threshold_px is used. It is raised to noise_factor
+    times the measured noise of each shift (the star fit residual over the
+    square root of the matched stars), so a settled mount under poor seeing is
+    not mistaken for a moving one.
+    """
+
+    def __init__(self, threshold_arcsec=8.0, timeout=10.0, consecutive=2, max_stars=20,
+                 noise_factor=3.0, threshold_px=0.5):
+        """
+        Args:
+            threshold_arcsec (float): Largest frame-to-frame shift of a settled mount, in arcsec.
+            timeout (float): Give up waiting after this many seconds.
+            consecutive (int): Quiet frame pairs required in a row.
+            max_stars (int): Brightest stars matched per frame.
+            noise_factor (float): The threshold is at least this multiple of the measured
+                shift noise.
+            threshold_px (float): Threshold in pixels, used when no pixel scale is known.
+        """
+        self.threshold_arcsec = threshold_arcsec
+        self.threshold_px = threshold_px
+        self.timeout = timeout
+        self.consecutive = consecutive
+        self.max_stars = max_stars
+        self.noise_factor = noise_factor
+
+    def wait(self, capture, pixel_scale=None):
+        """
+        Captures frames until the field is steady.
+
+        Args:
+            capture (callable): Returns the next frame from the stream.
+            pixel_scale (float, optional): Pixel scale in arcsec/pixel. Without it
+                the threshold is threshold_px.
+
+        Returns:
+            dict: {'settled': bool, 'elapsed': seconds, 'jitter': [pixels per frame pair],
+            'frame': the last captured frame}. After a timeout 'settled' is False
+            and the last frame is returned anyway.
+        """
+        start = time.time()
+        limit = self.threshold_arcsec / pixel_scale if pixel_scale else self.threshold_px
+        tracker = StarTracker(min_matches=3)
+        jitter = []
+        quiet = 0
+        frame = capture()
+        tracker.reset(extract_stars(frame, max_stars=self.max_stars))
+
+        while True:
+            if time.time() - start > self.timeout:
+                return {'settled': False, 'elapsed': time.time() - start, 'jitter': jitter, 'frame': frame}
+            frame = capture()
+            stars = extract_stars(frame, max_stars=self.max_stars)
+            matched = tracker.track(stars)
+            if matched:
+                shift = abs(tracker.B + (tracker.A - 1) * complex(frame.shape[1] / 2.0, frame.shape[0] / 2.0))
+                jitter.append(float(shift))
+                threshold = max(limit, self.noise_factor * tracker.rms / np.sqrt(matched))
+            else:
+                # Field moved too far (or too few stars) to match: still moving
+                jitter.append(np.inf)
+                threshold = limit
+            quiet = quiet + 1 if jitter[-1] < threshold else 0
+            if quiet >= self.consecutive:
+                return {'settled': True, 'elapsed': time.time() - start, 'jitter': jitter, 'frame': frame}
+            tracker.reset(stars)
@@ -0,0 +1,242 @@
+import math
+import numpy as np
+from native_solver import radec_to_vec
+from catalog import StarCatalog
+
+class StarFieldSimulator:
+    """
+    Vectorized star field renderer for the simulated guide camera.
+    Catalog stars and procedurally generated background stars are projected
+    in one gnomonic projection with camera roll, then rendered as Gaussian
+    PSFs with magnitude-based flux, photon noise and sensor noise.
+
+    Procedural stars come from a spatial hash of the sky: each cell's stars
+    are seeded by the cell index, so the sky stays the same whichever way
+    the camera points.
+    """
+
+    def __init__(self, width=640, height=480, fov_deg=3.0, catalog=None,
+                 star_density=8.0, mag_range=(4.0, 10.0), cell_deg=1.0,
+                 psf_sigma=1.2, flux_zero_point=2.2e6, sky_level=10.0,
+                 read_noise=3.0, exposure=1.0, seed=0):
+        """
+        Args:
+            width, height (int): Sensor size in pixels.
+            fov_deg (float): Horizontal field of view in degrees.
+            catalog (StarCatalog | iterable, optional): Real stars, as a StarCatalog or
+                (ra, dec, mag) tuples in degrees. Each render cone-searches it for the field.
+            star_density (float): Procedural stars per square degree.
+            mag_range (tuple): Magnitude range of procedural stars.
+            cell_deg (float): Spatial hash cell size in degrees.
+            psf_sigma (float): Gaussian PSF sigma in pixels.
+            flux_zero_point (float): Total flux (ADU) of a magnitude 0 star per second.
+            sky_level (float): Sky background in ADU.
+            read_noise (float): Read noise in ADU.
+            exposure (float): Exposure time in seconds, scales star flux.
+            seed (int): Sky seed. The same seed always gives the same sky.
+        """
+        self.width = width
+        self.height = height
+        self.fov_deg = fov_deg
+        self.star_density = star_density
+        self.mag_range = mag_range
+        self.cell_deg = cell_deg
+        self.psf_sigma = psf_sigma
+        self.flux_zero_point = flux_zero_point
+        self.sky_level = sky_level
+        self.read_noise = read_noise
+        self.exposure = exposure
+        self.seed = seed
+
+        if not isinstance(catalog, StarCatalog):
+            catalog = StarCatalog.from_stars(catalog if catalog is not None else [])
+        self.catalog = catalog
+
+        self._cells = {}
+        self._rng = np.random.default_rng(seed)
+        self._noise_bank = None
+        # Stamp offsets around each star, shared by all renders
+        half = int(math.ceil(3.5 * psf_sigma))
+        self._offsets = np.arange(-half, half + 1)
+
+    @property
+    def catalog_vec(self):
+        """Unit vectors of all catalog stars (reads the whole catalog)."""
+        return np.asarray(self.catalog.stars['vec'])
+
+    @property
+    def catalog_mag(self):
+        """Magnitudes of all catalog stars (reads the whole catalog)."""
+        return np.asarray(self.catalog.stars['mag'], dtype=np.float64)
+
+    @property
+    def pixel_scale(self):
+        """Pixel scale in radians per pixel."""
+        return math.radians(self.fov_deg) / self.width
+
+    def stars_near(self, ra, dec, radius):
+        """
+        Returns all simulated stars (catalog and procedural) within radius of a point.
+
+        Args:
+            ra, dec (float): Centre in degrees.
+            radius (float): Cone radius in degrees.
+
+        Returns:
+            tuple: (ra, dec, mag) arrays in degrees.
+        """
+        center = radec_to_vec(ra, dec)
+        cos_r = math.cos(math.radians(radius))
+        ra_p, dec_p, mag_p, vec_p = self._procedural(ra, dec, radius)
+        cat = self.catalog.cone_search(ra, dec, radius)
+        proc = vec_p @ center > cos_r
+        return (np.concatenate([cat['ra'], ra_p[proc]]),
+                np.concatenate([cat['dec'], dec_p[proc]]),
+                np.concatenate([cat['mag'], mag_p[proc]]))
+
+    def project(self, ra, dec, roll, vec):
+        """
+        Projects stars onto the sensor.
+
+        Args:
+            ra, dec (float): Pointing in degrees.
+            roll (float): Camera roll in degrees.
+            vec (np.ndarray): (N, 3) unit vectors of the stars to project.
+
+        Returns:
+            tuple: (x, y, mask) pixel coordinates and a visibility mask.
+        """
+        ra0, dec0, roll = math.radians(ra), math.radians(dec), math.radians(roll)
+        east = np.array([-math.sin(ra0), math.cos(ra0), 0.0])
+        north = np.array([-math.sin(dec0) * math.cos(ra0), -math.sin(dec0) * math.sin(ra0), math.cos(dec0)])
+        center = np.array([math.cos(dec0) * math.cos(ra0), math.cos(dec0) * math.sin(ra0), math.sin(dec0)])
+
+        denom = vec @ center
+        front = denom > 0
+        denom = np.where(front, denom, 1.0)
+        xi = (vec @ east) / denom
+        eta = (vec @ north) / denom
+
+        # Apply roll, then convert to pixels with image y pointing down
+        cos_roll, sin_roll = math.cos(roll), math.sin(roll)
+        scale = 1.0 / self.pixel_scale
+        x = self.width / 2 + (xi * cos_roll - eta * sin_roll) * scale
+        y = self.height / 2 - (xi * sin_roll + eta * cos_roll) * scale
+        margin = self._offsets[-1]
+        visible = front & (x > -margin) & (x < self.width + margin) & (y > -margin) & (y < self.height + margin)
+        return x, y, visible
+
+    def render(self, ra, dec, roll=0.0):
+        """
+        Renders the star field seen at a pointing.
+
+        Args:
+            ra, dec (float): Pointing in degrees.
+            roll (float): Camera roll in degrees.
+
+        Returns:
+            np.ndarray: uint8 image of shape (height, width).
+        """
+        half_diag = 0.5 * math.degrees(self.pixel_scale) * math.hypot(self.width, self.height) * 1.05
+        _, _, mag_p, vec_p = self._procedural(ra, dec, half_diag)
+        cat = self.catalog.cone_search(ra, dec, half_diag)
+        vec = np.concatenate([cat['vec'], vec_p])
+        mag = np.concatenate([cat['mag'], mag_p])
+
+        x, y, visible = self.project(ra, dec, roll, vec)
+        img = self._background()
+        if np.any(visible):
+            self._add_stars(img, x[visible], y[visible], mag[visible])
+        np.clip(img, 0, 255, out=img)
+        return img.astype(np.uint8)
+
+    def _add_stars(self, img, x, y, mag):
+        """Adds normalized Gaussian PSF stamps with photon noise for all stars at once."""
+        flux = self.flux_zero_point * self.exposure * 10.0 ** (-0.4 * mag)
+        # Pixel centres sit at integer coordinates
+        ix = np.rint(x).astype(np.int64)
+        iy = np.rint(y).astype(np.int64)
+        cols = ix[:, None] + self._offsets[None, :]  # (N, S)
+        rows = iy[:, None] + self._offsets[None, :]
+        inv = 1.0 / (2.0 * self.psf_sigma ** 2)
+        # Separable PSF, each axis normalized so the stamp sums to the star's flux
+        gx = np.exp(-(cols - x[:, None]) ** 2 * inv)
+        gy = np.exp(-(rows - y[:, None]) ** 2 * inv)
+        gx /= gx.sum(axis=1, keepdims=True)
+        gy /= gy.sum(axis=1, keepdims=True)
+        stamps = flux[:, None, None] * gy[:, :, None] * gx[:, None, :]  # (N, S, S)
+        stamps += self._rng.standard_normal(stamps.shape) * np.sqrt(stamps)
+
+        r = np.broadcast_to(rows[:, :, None], stamps.shape)
+        c = np.broadcast_to(cols[:, None, :], stamps.shape)
+        inside = (r >= 0) & (r < self.height) & (c >= 0) & (c < self.width)
+        np.add.at(img.ravel(), r[inside] * self.width + c[inside], stamps[inside].astype(np.float32))
+
+    def _background(self):
+        """Returns sky plus noise, cut at a random offset from a pre-generated noise bank."""
+        pad = 64
+        if self._noise_bank is None:
+            sigma = math.sqrt(self.sky_level + self.read_noise ** 2)
+            self._noise_bank = (self.sky_level + sigma * self._rng.standard_normal(
+                (self.height + pad, self.width + pad))).astype(np.float32)
+        dy, dx = self._rng.integers(0, pad, size=2)
+        return self._noise_bank[dy:dy + self.height, dx:dx + self.width].copy()
+
+    def _procedural(self, ra, dec, radius):
+        """Collects procedural stars from every hash cell overlapping a cone."""
+        cell = self.cell_deg
+        n_bands = int(math.ceil(180.0 / cell))
+        b0 = max(0, int((dec - radius + 90.0) // cell))
+        b1 = min(n_bands - 1, int((dec + radius + 90.0) // cell))
+
+        parts = []
+        for band in range(b0, b1 + 1):
+            lo = band * cell - 90.0
+            hi = min(90.0, lo + cell)
+            n_ra = max(1, int(360.0 * math.cos(math.radians(0.5 * (lo + hi))) / cell))
+            max_abs = max(abs(lo), abs(hi))
+            if max_abs + radius >= 90.0:
+                cells = range(n_ra)
+            else:
+                d_ra = math.degrees(math.asin(min(1.0, math.sin(math.radians(radius)) / math.cos(math.radians(max_abs)))))
+                c0 = int(math.floor((ra - d_ra) % 360.0 / 360.0 * n_ra))
+                c1 = int(math.floor((ra + d_ra) % 360.0 / 360.0 * n_ra))
+                count = (c1 - c0) % n_ra + 1
+                cells = [(c0 + k) % n_ra for k in range(min(count, n_ra))]
+            for c in cells:
+                parts.append(self._cell(band, c, n_ra, lo, hi))
+
+        if not parts:
+            empty = np.zeros(0)
+            return empty, empty, empty, np.zeros((0, 3))
+        ra_p = np.concatenate([p[0] for p in parts])
+        dec_p = np.concatenate([p[1] for p in parts])
+        mag_p = np.concatenate([p[2] for p in parts])
+        vec_p = np.concatenate([p[3] for p in parts])
+        return ra_p, dec_p, mag_p, vec_p
+
+    def _cell(self, band, index, n_ra, dec_lo, dec_hi):
+        """Returns the (cached) procedural stars of one hash cell."""
+        key = (band, index)
+        stars = self._cells.get(key)
+        if stars is not None:
+            return stars
+        if len(self._cells) > 20000:
+            self._cells.clear()
+
+        rng = np.random.default_rng([self.seed, band, index])
+        ra_lo = 360.0 * index / n_ra
+        ra_hi = 360.0 * (index + 1) / n_ra
+        z_lo, z_hi = math.sin(math.radians(dec_lo)), math.sin(math.radians(dec_hi))
+        area = math.radians(ra_hi - ra_lo) * (z_hi - z_lo) * (180.0 / math.pi) ** 2
+        n = rng.poisson(self.star_density * area)
+
+        ra = rng.uniform(ra_lo, ra_hi, n)
+        dec = np.degrees(np.arcsin(rng.uniform(z_lo, z_hi, n)))
+        # Star counts grow roughly as 10^(0.45 m), sample magnitudes from that law
+        m0, m1 = self.mag_range
+        a, b = 10 ** (0.45 * m0), 10 ** (0.45 * m1)
+        mag = np.log10(a + rng.random(n) * (b - a)) / 0.45
+        stars = (ra, dec, mag, radec_to_vec(ra, dec))
+        self._cells[key] = stars
+        return stars
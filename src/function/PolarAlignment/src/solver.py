@@ -1,27 +1,144 @@
 import subprocess
 import os
-import configparser
 import math
+import tempfile
+import hashlib
+import time
+import collections
+import contextlib
+import logging
+import numpy as np
+import tracing
+from frame import Frame
+from frame_cache import remove_sidecars, remove_with_sidecars
+from native_solver import NativeSolver
+
+logger = logging.getLogger(__name__)
 
 class PlateSolver:
     """
-    Wrapper for ASTAP Plate Solver.
+    Plate solver front end.
+    Runs either the built-in native engine or the ASTAP wrapper.
+    With the native backend, ASTAP can be kept as a fallback.
     """
-    def __init__(self, executable="astap"):
+    BACKENDS = ("astap", "native")
+    
+    def __init__(self, executable="astap", work_dir=None, backend="astap",
+                 native_solver=None, catalog_path=None, fov_deg=3.0, fallback=True,
+                 cache_size=32, downsample=0):
+        """
+        Args:
+            executable (str): ASTAP executable name or path.
+            work_dir (str, optional): Directory for temporary files handed to ASTAP.
+                Defaults to the system temp directory.
+            backend (str): "astap" or "native".
+            native_solver (NativeSolver, optional): Prebuilt native engine.
+            catalog_path (str, optional): Catalog file to build the native engine from.
+            fov_deg (float): Camera field of view used when building the native engine.
+            fallback (bool): With the native backend, retry with ASTAP when native solving fails.
+            cache_size (int): Number of solutions kept in the LRU cache, keyed by image content.
+                0 disables the cache.
+            downsample (int): ASTAP downsample factor (-z), 0 lets ASTAP choose.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown solver backend '{backend}', expected one of {self.BACKENDS}")
         self.executable = executable
+        self.work_dir = work_dir
+        self.backend = backend
+        self.fallback = fallback
+        self.native = native_solver
+        if backend == "native" and self.native is None:
+            if catalog_path is None:
+                raise ValueError("The native backend needs a native_solver or a catalog_path")
+            self.native = NativeSolver.from_file(catalog_path, fov_deg=fov_deg)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self.downsample = downsample
+        self.timeout = 30.0 # ASTAP run time limit, seconds
+        self.cancel_event = None # Optional threading/multiprocessing Event; when set, a running ASTAP is killed
+        
+    def solve(self, image, search_radius=180, hint=None):
+        """
+        Solves the plate with the selected backend.
+        Solutions are cached by image content, so solving the same frame again is free.
+        Mock solutions are not cached: the same frame is solved for real once ASTAP is available.
+        
+        Args:
+            image (Frame | np.ndarray | str): In-memory frame or path to an image file.
+            search_radius (float): Search radius around the hint in degrees.
+            hint (dict, optional): Predicted {'ra', 'dec'} and optionally 'rotation' in degrees.
+            
+        Returns:
+            dict: {'ra': float, 'dec': float, 'rotation': float} in degrees,
+            with 'mock': True if it came from the mock fallback.
+            None if solving fails.
+        """
+        with tracing.span('solve', backend=self.backend, search_radius=search_radius,
+                          hinted=hint is not None) as span:
+            key = self._content_key(image) if self.cache_size > 0 else None
+            if key is not None and key in self._cache:
+                self._cache.move_to_end(key)
+                tracing.count('solve.cache_hit')
+                span.set(cached=True, solved=True)
+                return dict(self._cache[key])
+                
+            sol = self._solve_uncached(image, search_radius, hint)
+            tracing.count('solve.success' if sol is not None else 'solve.failure')
+            span.set(cached=False, solved=sol is not None, matches=sol.get('matches') if sol else None)
+            
+            if key is not None and sol is not None and not sol.get('mock'):
+                self._cache[key] = dict(sol)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return sol
         
-    def solve(self, image_path, search_radius=180):
+    def _solve_uncached(self, image, search_radius, hint):
+        if self.backend == "native":
+            sol = self.native.solve(image, search_radius, hint=hint)
+            if sol is not None or not self.fallback:
+                return sol
+            logger.warning("Native solver failed. Falling back to ASTAP.")
+            tracing.count('solve.fallback')
+            return self._solve_astap(image, search_radius, hint, mock_fallback=False)
+        return self._solve_astap(image, search_radius, hint)
+        
+    def _content_key(self, image):
+        """Hashes the pixel data (or file bytes) of an image for the solution cache."""
+        h = hashlib.blake2b(digest_size=16)
+        if isinstance(image, str):
+            if not os.path.exists(image):
+                return None
+            with open(image, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            return "file:" + h.hexdigest()
+        data = image.data if isinstance(image, Frame) else np.asarray(image)
+        h.update(str((data.shape, data.dtype.str)).encode())
+        h.update(np.ascontiguousarray(data))
+        return "array:" + h.hexdigest()
+        
+    def _solve_astap(self, image, search_radius=180, hint=None, mock_fallback=True):
         """
         Solves the plate using ASTAP.
         
         Args:
-            image_path (str): Path to the image file.
+            image (Frame | str): In-memory frame or path to an image file.
+                Frames are only written to disk (losslessly, as FITS) because
+                ASTAP needs a file.
             search_radius (float): Search radius in degrees.
+            hint (dict, optional): Predicted {'ra', 'dec'} passed to ASTAP as the search centre.
             
         Returns:
             dict: {'ra': float, 'dec': float, 'rotation': float} in degrees.
-            None if solving fails.
+            None if solving fails. Without mock_fallback, a missing or failing
+            ASTAP also returns None instead of a mock solution.
         """
+        if isinstance(image, Frame):
+            return self._solve_frame(image, search_radius, hint, mock_fallback)
+        if isinstance(image, np.ndarray):
+            return self._solve_frame(Frame(image), search_radius, hint, mock_fallback)
+            
+        image_path = image
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image not found: {image_path}")
             
@@ -31,16 +148,20 @@ class PlateSolver:
             self.executable,
             "-f", image_path,
             "-r", str(search_radius),
-            "-z", "0" 
+            "-z", str(self.downsample)
         ]
+        if hint is not None:
+            # ASTAP takes the centre as RA in hours and south pole distance in degrees
+            cmd += ["-ra", f"{hint['ra'] / 15.0:.6f}", "-spd", f"{hint['dec'] + 90.0:.6f}"]
         
-        print(f"Running solver: {' '.join(cmd)}")
+        logger.debug("Running solver: %s", ' '.join(cmd))
         
         try:
             # For testing/demo purposes, check if we are in a mock environment
             # If the image is a dummy generated one, ASTAP will fail.
             # We can mock the result if ASTAP is not installed or fails.
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if not self._run_astap(cmd):
+                return None # Cancelled
             
             # ASTAP writes results to file_path.ini or .wcs
             base_path = os.path.splitext(image_path)[0]
@@ -53,30 +174,87 @@ class PlateSolver:
                  # Parsing WCS is harder without library, but .ini is standard for ASTAP
                  pass
                  
-            # If failed, check stdout for errors
-            # print(result.stdout)
-            # print(result.stderr)
-            
+            if not mock_fallback:
+                return None
+            tracing.count('solve.mock')
             return self._mock_solve(image_path) # Fallback for demo
             
         except (subprocess.SubprocessError, FileNotFoundError):
-            print("ASTAP execution failed or not found. Using mock solver.")
+            if not mock_fallback:
+                logger.warning("ASTAP execution failed or not found.")
+                return None
+            logger.warning("ASTAP execution failed or not found. Using mock solver.")
+            tracing.count('solve.mock')
             return self._mock_solve(image_path)
 
+    def _run_astap(self, cmd):
+        """
+        Runs ASTAP until it exits, killing it on timeout or when cancel_event is set.
+
+        Returns:
+            bool: False if the run was cancelled.
+
+        Raises:
+            subprocess.TimeoutExpired: If ASTAP runs longer than self.timeout.
+        """
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                try:
+                    proc.wait(timeout=0.05)
+                    return True
+                except subprocess.TimeoutExpired:
+                    if self.cancel_event is not None and self.cancel_event.is_set():
+                        return False
+                    if time.monotonic() > deadline:
+                        raise subprocess.TimeoutExpired(cmd, self.timeout)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    def _solve_frame(self, frame, search_radius, hint=None, mock_fallback=True):
+        """
+        Writes a frame to a temporary FITS file for ASTAP and cleans up afterwards.
+        A frame the camera already wrote to its frame cache is solved in place,
+        held against eviction meanwhile; only ASTAP's sidecars are removed.
+        """
+        # Reuse the file if the camera already wrote this frame to disk
+        written = None
+        if frame.write_future is not None:
+            try:
+                written = frame.write_future.result()
+            except Exception as e:
+                logger.warning("Background frame write failed, writing a temporary copy: %s", e)
+        if written is not None:
+            with frame.cache.hold(written) if frame.cache is not None else contextlib.nullcontext():
+                if os.path.exists(written):
+                    try:
+                        return self._solve_astap(written, search_radius, hint, mock_fallback)
+                    finally:
+                        remove_sidecars(written)
+                
+
+        fd, path = tempfile.mkstemp(suffix=".fits", prefix="solve_", dir=self.work_dir)
+        os.close(fd)
+        try:
+            frame.save(path)
+            return self._solve_astap(path, search_radius, hint, mock_fallback)
+        finally:
+            remove_with_sidecars(path)
+            if frame.path == path:
+                frame.path = None
+
     def _parse_ini(self, ini_path):
         """Parses ASTAP .ini output."""
-        config = configparser.ConfigParser()
-        config.read(ini_path)
         try:
             # Structure usually [astap]
             # PLTSOLVED=1
             # CRVAL1=... (RA)
             # CRVAL2=... (Dec)
             # CROTA2=... (Rotation)
-            # Note: ASTAP ini might not have section headers, or use [astap]
-            # Python configparser needs a section. We might need to add one if missing.
-            
-            # Let's try reading raw lines
+            # ASTAP writes no section header, so the file is read as raw key=value lines
             data = {}
             with open(ini_path, 'r') as f:
                 for line in f:
@@ -91,10 +269,14 @@ class PlateSolver:
             dec = float(data.get('CRVAL2', 0))
             rotation = float(data.get('CROTA2', 0))
             
-            return {'ra': ra, 'dec': dec, 'rotation': rotation}
+            result = {'ra': ra, 'dec': dec, 'rotation': rotation}
+            if 'CDELT2' in data:
+                # Pixel scale in arcsec/pixel, needed to track stars between solves
+                result['scale'] = abs(float(data['CDELT2'])) * 3600.0
+            return result
             
         except Exception as e:
-            print(f"Error parsing solution: {e}")
+            logger.error("Error parsing solution: %s", e)
             return None
 
     def _mock_solve(self, image_path):
@@ -107,4 +289,4 @@ class PlateSolver:
         h = hash(image_path)
         ra = (h % 3600) / 10.0
         dec = 89.0 + (h % 100) / 100.0
-        return {'ra': ra, 'dec': dec, 'rotation': 0.0}
+        return {'ra': ra, 'dec': dec, 'rotation': 0.0, 'mock': True}
@@ -0,0 +1,279 @@
+import os
+import math
+import time
+import shutil
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import tracing
+from frame import Frame
+
+logger = logging.getLogger(__name__)
+
+class SolveStrategy:
+    """One way of solving a frame: a backend, a downsample factor and hinted or blind search."""
+
+    def __init__(self, name, backend="native", downsample=1, hinted=False, search_radius=None):
+        """
+        Args:
+            name (str): Reported as the winning strategy.
+            backend (str): "native" or "astap".
+            downsample (int): Binning factor. Native frames are binned before solving,
+                ASTAP gets it as -z (0 lets ASTAP choose).
+            hinted (bool): Search around the hint. Hinted strategies are skipped when
+                the solve has no hint; blind ones search the whole sky.
+            search_radius (float, optional): Hinted search radius in degrees. Defaults
+                to the radius passed to SolverPool.solve.
+        """
+        if backend not in ("native", "astap"):
+            raise ValueError(f"Unknown solver backend '{backend}'")
+        self.name = name
+        self.backend = backend
+        self.downsample = downsample
+        self.hinted = hinted
+        self.search_radius = search_radius
+
+    def __repr__(self):
+        return f"SolveStrategy({self.name!r}, {self.backend!r}, downsample={self.downsample}, hinted={self.hinted})"
+
+def default_strategies(native=True, astap=True):
+    """
+    Returns the standard strategy set: hinted and blind native solves at full
+    resolution, a blind native solve on 2x2 binned frames, and hinted and blind
+    ASTAP runs. Strategies are queued in list order, so with more strategies than
+    cores the cheap native ones start first.
+    """
+    strategies = []
+    if native:
+        strategies += [SolveStrategy("native-hinted", "native", hinted=True),
+                       SolveStrategy("native-blind", "native"),
+                       SolveStrategy("native-bin2-blind", "native", downsample=2)]
+    if astap:
+        strategies += [SolveStrategy("astap-hinted", "astap", downsample=0, hinted=True),
+                       SolveStrategy("astap-blind", "astap", downsample=2)]
+    return strategies
+
+def default_mp_context():
+    """
+    Returns the multiprocessing context for solver workers: 'forkserver' where
+    available, so workers do not inherit the camera and mount threads, else 'spawn'.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+class SolverPool:
+    """
+    Runs several solve strategies at once in a process pool and returns the
+    first verified solution.
+    A failed ASTAP attempt takes up to its full timeout, so running the
+    alternatives side by side turns the worst-case latency into the latency of
+    the fastest strategy that succeeds. The remaining strategies are cancelled:
+    queued ones are dropped, running ASTAP processes are killed and native
+    solves still running give up at their next check between verification
+    hypotheses, freeing their worker for the next solve. The pool never falls
+    back to a mock solution.
+
+    Has the same solve() interface as PlateSolver, so it can be handed to PolarAligner.
+    """
+
+    def __init__(self, strategies=None, native_solver=None, executable="astap", work_dir=None,
+                 max_workers=None, min_matches=6, mp_context=None):
+        """
+        Args:
+            strategies (list[SolveStrategy], optional): Defaults to default_strategies()
+                for the available backends (native if native_solver is given, ASTAP if
+                the executable is found).
+            native_solver (NativeSolver, optional): Engine for native strategies. It is
+                sent to each worker once, when the pool starts.
+            executable (str): ASTAP executable name or path.
+            work_dir (str, optional): Directory for the temporary files handed to ASTAP.
+            max_workers (int, optional): Worker processes, at most the number of cores.
+                Defaults to one per strategy.
+            min_matches (int): Matched stars a solution reporting 'matches' needs to be accepted.
+            mp_context (optional): multiprocessing context, see default_mp_context.
+
+        Raises:
+            ValueError: If there is no usable strategy.
+        """
+        if strategies is None:
+            strategies = default_strategies(native=native_solver is not None,
+                                            astap=shutil.which(executable) is not None)
+        strategies = [s for s in strategies if s.backend != "native" or native_solver is not None]
+        if not strategies:
+            raise ValueError("No usable solve strategy (native strategies need a native_solver)")
+        self.strategies = strategies
+        self.native = native_solver
+        self.executable = executable
+        self.work_dir = work_dir
+        self.max_workers = max(1, min(max_workers or len(strategies), os.cpu_count() or 1))
+        self.min_matches = min_matches
+        self.mp_context = mp_context or default_mp_context()
+        self.last_result = None # {'strategy', 'elapsed', 'attempts': {name: outcome}}
+        self._executor = None
+        self._cancelled = None # Shared id of the newest solve whose remaining attempts are cancelled
+        self._solve_id = 0
+
+    def start(self):
+        """Starts the worker processes (done on the first solve otherwise)."""
+        if self._executor is None:
+            self._cancelled = self.mp_context.Value('q', 0)
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=self.mp_context,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.native, self.executable, self.work_dir,
+                                                           self._cancelled))
+            # Workers start on demand; make them all load the engine now
+            for f in [self._executor.submit(_ping) for _ in range(self.max_workers)]:
+                f.result()
+        return self
+
+    def close(self):
+        """Cancels running attempts and stops the workers."""
+        if self._executor is not None:
+            self._cancelled.value = self._solve_id
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def solve(self, image, search_radius=180, hint=None, timeout=None):
+        """
+        Solves a frame with all applicable strategies in parallel.
+
+        Args:
+            image (Frame | np.ndarray): The frame to solve.
+            search_radius (float): Search radius around the hint in degrees.
+            hint (dict, optional): Predicted {'ra', 'dec'} and optionally 'rotation' in degrees.
+            timeout (float, optional): Give up after this many seconds.
+
+        Returns:
+            dict: The first verified solution, with 'strategy' naming the strategy
+            that found it. None if every strategy fails (or the timeout expires).
+            self.last_result records the winner, the elapsed time and the outcome
+            of each attempt.
+        """
+        self.start()
+        data = image.data if isinstance(image, Frame) else np.asarray(image)
+        self._solve_id += 1
+        solve_id = self._solve_id
+        start = time.perf_counter()
+        attempts = {}
+        futures = {}
+        for strategy in self.strategies:
+            if strategy.hinted and hint is None:
+                continue
+            radius = (strategy.search_radius or search_radius) if strategy.hinted else 180
+            f = self._executor.submit(_run_strategy, solve_id, strategy, data, radius,
+                                      hint if strategy.hinted else None)
+            futures[f] = (strategy, radius)
+            attempts[strategy.name] = 'running'
+
+        winner = None
+        with tracing.span('solve_pool', strategies=len(futures), hinted=hint is not None) as span:
+            pending = set(futures)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while pending and winner is None:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for f in done:
+                    strategy, radius = futures[f]
+                    try:
+                        sol = f.result()
+                    except Exception as e:
+                        logger.warning("Solve strategy %s failed: %s", strategy.name, e)
+                        attempts[strategy.name] = 'error'
+                        continue
+                    if winner is None and sol is not None and self._verified(sol, radius, hint if strategy.hinted else None):
+                        winner = dict(sol, strategy=strategy.name)
+                        attempts[strategy.name] = 'won'
+                    else:
+                        attempts[strategy.name] = 'failed' if sol is None else 'rejected'
+            # Stop the rest: queued attempts are dropped, running ones see the cancel flag
+            self._cancelled.value = solve_id
+            for f in pending:
+                f.cancel()
+                attempts[futures[f][0].name] = 'cancelled'
+            elapsed = time.perf_counter() - start
+            span.set(winner=winner['strategy'] if winner else None)
+
+        tracing.count(f"solve_pool.won.{winner['strategy']}" if winner else 'solve_pool.failure')
+        self.last_result = {'strategy': winner['strategy'] if winner else None, 'elapsed': elapsed,
+                            'attempts': attempts}
+        if winner:
+            logger.info("Solved by %s in %.2f s", winner['strategy'], elapsed)
+        return winner
+
+    def _verified(self, sol, radius, hint):
+        """Sanity checks a solution: finite position, enough matched stars, inside the hinted area."""
+        if not (math.isfinite(sol.get('ra', math.nan)) and math.isfinite(sol.get('dec', math.nan))):
+            return False
+        if sol.get('matches') is not None and sol['matches'] < self.min_matches:
+            return False
+        if hint is not None and radius < 180:
+            return _separation(sol['ra'], sol['dec'], hint['ra'], hint['dec']) <= radius
+        return True
+
+def _separation(ra1, dec1, ra2, dec2):
+    """Angular distance in degrees."""
+    ra1, dec1, ra2, dec2 = map(math.radians, (ra1, dec1, ra2, dec2))
+    c = math.sin(dec1) * math.sin(dec2) + math.cos(dec1) * math.cos(dec2) * math.cos(ra1 - ra2)
+    return math.degrees(math.acos(max(-1.0, min(1.0, c))))
+
+# Worker process state, set up once per process by _init_worker
+_worker = {}
+
+class _CancelFlag:
+    """Event-like view of the shared cancel counter for one solve."""
+
+    def __init__(self, cancelled, solve_id):
+        self.cancelled = cancelled
+        self.solve_id = solve_id
+
+    def is_set(self):
+        return self.cancelled.value >= self.solve_id
+
+def _init_worker(native, executable, work_dir, cancelled):
+    _worker['native'] = native
+    _worker['executable'] = executable
+    _worker['work_dir'] = work_dir
+    _worker['cancelled'] = cancelled
+
+def _ping():
+    return os.getpid()
+
+def _run_strategy(solve_id, strategy, data, search_radius, hint):
+    """Runs one strategy in a worker. Returns the solution or None."""
+    cancel = _CancelFlag(_worker['cancelled'], solve_id)
+    if cancel.is_set():
+        return None # Another strategy already won
+    if strategy.backend == "native":
+        factor = max(1, strategy.downsample)
+        native = _worker['native']
+        native.cancel_event = cancel # Checked between verification hypotheses
+        try:
+            sol = native.solve(_bin(data, factor), search_radius, hint=hint)
+        finally:
+            native.cancel_event = None
+        if sol is not None and factor > 1 and sol.get('scale'):
+            sol['scale'] /= factor # Report the scale of the full-resolution frame
+        return sol
+    from solver import PlateSolver
+    solver = PlateSolver(executable=_worker['executable'], work_dir=_worker['work_dir'],
+                         cache_size=0, downsample=strategy.downsample)
+    solver.cancel_event = cancel
+    return solver._solve_astap(Frame(data), search_radius, hint, mock_fallback=False)
+
+def _bin(data, factor):
+    """Averages factor x factor pixel blocks (edges that do not fill a block are dropped)."""
+    if factor == 1:
+        return data
+    h, w = data.shape[0] // factor * factor, data.shape[1] // factor * factor
+    binned = data[:h, :w].reshape(h // factor, factor, w // factor, factor, *data.shape[2:]).mean(axis=(1, 3))
+    return binned.astype(data.dtype)
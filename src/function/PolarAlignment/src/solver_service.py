@@ -0,0 +1,308 @@
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+import numpy as np
+import tracing
+from frame import Frame
+from solver_pool import default_mp_context
+
+logger = logging.getLogger(__name__)
+
+class SolverService:
+    """
+    Long-lived plate solver workers.
+    Each worker process builds its solver once (for the native backend that is
+    the catalog load and the triangle index) and then serves frames sent over
+    a pipe, so a solve only costs the matching work. With the ASTAP backend
+    the worker still runs the ASTAP binary per frame, but the frame hand-off,
+    temporary files and solution cache stay in the warm worker.
+
+    Jobs wait in a bounded queue: submit() blocks (or raises queue.Full) when
+    it is full, instead of letting frames pile up faster than they are solved.
+    Idle workers are pinged every health_interval; a worker that crashes, stops
+    answering or exceeds job_timeout is killed and restarted.
+
+    Has the same solve() interface as PlateSolver, so it can be handed to PolarAligner.
+    """
+
+    def __init__(self, solver_factory, workers=1, queue_size=4, job_timeout=60.0,
+                 health_interval=5.0, start_timeout=60.0, mp_context=None):
+        """
+        Args:
+            solver_factory (callable): Builds the solver in each worker, e.g.
+                functools.partial(PlateSolver, backend="native", catalog_path="catalog.npz").
+                Must be picklable.
+            workers (int): Number of worker processes.
+            queue_size (int): Jobs that may wait for a free worker.
+            job_timeout (float): Longest solve before the worker is restarted, seconds.
+            health_interval (float): Ping period of idle workers, seconds.
+            start_timeout (float): Longest worker start (solver construction), seconds.
+            mp_context (optional): multiprocessing context, see solver_pool.default_mp_context.
+        """
+        self.solver_factory = solver_factory
+        self.job_timeout = job_timeout
+        self.health_interval = health_interval
+        self.start_timeout = start_timeout
+        self.mp_context = mp_context or default_mp_context()
+        self.restarts = 0
+        self.completed = 0
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._ids = 0
+        self._lock = threading.Lock()
+        self._workers = [_Worker(self, i) for i in range(workers)]
+        self._started = False
+        self._closed = False
+
+    def start(self):
+        """
+        Starts the workers and waits until every solver is built.
+
+        Raises:
+            RuntimeError: If a solver cannot be built.
+            TimeoutError: If a worker does not start within start_timeout.
+        """
+        if not self._started:
+            self._started = True
+            for worker in self._workers:
+                worker.start()
+        return self
+
+    def close(self):
+        """Stops the workers once the queued jobs are done."""
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            if worker.thread is not None:
+                self._jobs.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def pids(self):
+        """Process ids of the running workers."""
+        return [w.process.pid for w in self._workers if w.process is not None]
+
+    @property
+    def queued(self):
+        """Number of jobs waiting for a worker."""
+        return self._jobs.qsize()
+
+    def submit(self, image, search_radius=180, hint=None, block=True, timeout=None):
+        """
+        Queues a frame for solving.
+
+        Args:
+            image (Frame | np.ndarray): The frame to solve.
+            search_radius (float): Search radius around the hint in degrees.
+            hint (dict, optional): Predicted {'ra', 'dec'} and optionally 'rotation' in degrees.
+            block (bool): Wait for room in the queue. Otherwise a full queue raises queue.Full.
+            timeout (float, optional): Longest wait for room in the queue.
+
+        Returns:
+            Future: Resolves to the solution dict or None. Fails with TimeoutError
+            if the solve exceeds job_timeout, RuntimeError if the worker crashed.
+
+        Raises:
+            queue.Full: If the queue stays full.
+            RuntimeError: If the service is closed.
+        """
+        if self._closed:
+            raise RuntimeError("Solver service is closed")
+        self.start()
+        data = image.data if isinstance(image, Frame) else np.asarray(image)
+        future = Future()
+        with self._lock:
+            self._ids += 1
+            job = (self._ids, data, search_radius, hint, future)
+        self._jobs.put(job, block, timeout)
+        return future
+
+    def solve(self, image, search_radius=180, hint=None):
+        """
+        Solves a frame on a worker and waits for the result.
+
+        Returns:
+            dict: The solution, None if solving failed, timed out or the worker crashed.
+        """
+        with tracing.span('solve_service', queued=self.queued) as span:
+            try:
+                sol = self.submit(image, search_radius, hint).result()
+            except (TimeoutError, RuntimeError) as e:
+                logger.warning("Solve failed: %s", e)
+                sol = None
+            span.set(solved=sol is not None)
+        return sol
+
+class _Worker:
+    """One worker process and the thread in this process that feeds it jobs."""
+
+    def __init__(self, service, index):
+        self.service = service
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.thread = None
+
+    def start(self):
+        self._spawn()
+        self.thread = threading.Thread(target=self._run, name=f"SolverWorker{self.index}", daemon=True)
+        self.thread.start()
+
+    def join(self):
+        if self.thread is not None:
+            self.thread.join()
+        self._stop()
+
+    def _spawn(self):
+        ctx = self.service.mp_context
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child, self.service.solver_factory),
+                                   name=f"SolverWorker{self.index}", daemon=True)
+        self.process.start()
+        child.close()
+        try:
+            reply = self._receive(self.service.start_timeout)
+        except (TimeoutError, RuntimeError):
+            self._kill()
+            raise
+        if reply[0] != 'ready':
+            self._kill()
+            raise RuntimeError(f"Solver worker failed to start: {reply[1]}")
+
+    def _restart(self, reason):
+        """Replaces the worker process. Returns False if the new one does not start either."""
+        logger.warning("Restarting solver worker %d: %s", self.index, reason)
+        tracing.count('solver_service.restart')
+        self._kill()
+        self.service.restarts += 1
+        try:
+            self._spawn()
+            return True
+        except (TimeoutError, RuntimeError) as e:
+            logger.error("Solver worker %d did not restart: %s", self.index, e)
+            return False
+
+    def _run(self):
+        jobs = self.service._jobs
+        while True:
+            try:
+                job = jobs.get(timeout=self.service.health_interval)
+            except queue.Empty:
+                self._check_health()
+                continue
+            if job is None:
+                return
+            job_id, data, search_radius, hint, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self.process is None and not self._restart("worker is down"):
+                future.set_exception(RuntimeError("Solver worker is down"))
+                continue
+            try:
+                self._send(('solve', job_id, data, search_radius, hint))
+                reply = self._receive(self.service.job_timeout)
+            except (TimeoutError, RuntimeError) as e:
+                future.set_exception(e)
+                self._restart(str(e))
+                continue
+            if reply[0] == 'ok':
+                self.service.completed += 1
+                future.set_result(reply[2])
+            else:
+                future.set_exception(RuntimeError(f"Solver error: {reply[2]}"))
+
+    def _check_health(self):
+        if self.process is None:
+            self._restart("worker is down")
+            return
+        try:
+            self._send(('ping',))
+            if self._receive(min(self.service.job_timeout, 10.0))[0] != 'pong':
+                raise RuntimeError("unexpected reply to ping")
+        except (TimeoutError, RuntimeError) as e:
+            self._restart(str(e))
+
+    def _receive(self, timeout):
+        """
+        Waits for the worker's reply.
+
+        Raises:
+            TimeoutError: If the worker does not answer in time.
+            RuntimeError: If the worker process died.
+        """
+        try:
+            ready = self.conn.poll(timeout)
+            if ready:
+                return self.conn.recv()
+        except (EOFError, OSError):
+            self._crashed()
+        raise TimeoutError(f"Solver worker did not answer within {timeout:.1f} s")
+
+    def _send(self, message):
+        """
+        Sends a request to the worker.
+
+        Raises:
+            RuntimeError: If the worker process died.
+        """
+        try:
+            self.conn.send(message)
+        except OSError:
+            self._crashed()
+
+    def _crashed(self):
+        self.process.join(1.0)
+        raise RuntimeError(f"Solver worker crashed (exit code {self.process.exitcode})")
+
+    def _stop(self):
+        if self.process is not None and self.process.is_alive():
+            try:
+                self.conn.send(('stop',))
+            except OSError:
+                pass
+            self.process.join(2.0)
+        self._kill()
+
+    def _kill(self):
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join()
+            self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def _serve(conn, solver_factory):
+    """Worker main loop: builds the solver once, then answers requests until 'stop'."""
+    try:
+        solver = solver_factory()
+    except Exception as e:
+        conn.send(('failed', repr(e)))
+        return
+    conn.send(('ready', os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return # The service went away
+        if message[0] == 'stop':
+            return
+        if message[0] == 'ping':
+            conn.send(('pong',))
+            continue
+        _, job_id, data, search_radius, hint = message
+        try:
+            conn.send(('ok', job_id, solver.solve(data, search_radius, hint=hint)))
+        except Exception as e:
+            conn.send(('error', job_id, repr(e)))
@@ -0,0 +1,154 @@
+import threading
+import time
+import collections
+import types
+from mount import parse_ra, parse_dec
+
+# Immutable telemetry snapshot. Angles in degrees, timestamp is the Unix time of the replies.
+MountState = collections.namedtuple('MountState', [
+    'timestamp',  # Unix time when the poll cycle completed
+    'seq',        # Poll cycle counter, increases by one per published snapshot
+    'ra',         # Current RA, degrees
+    'dec',        # Current Dec, degrees
+    'status',     # Raw :GU# status string
+    'slewing',    # True while a goto is in progress
+    'tracking',   # True while the mount tracks
+    'focusers',   # Read-only mapping focuser number -> position in steps
+])
+
+def parse_status(status):
+    """
+    Interprets an OnStep :GU# status string.
+
+    Returns:
+        tuple: (slewing, tracking) booleans. 'N' means no goto in progress, 'n' not tracking.
+    """
+    return 'N' not in status, 'n' not in status
+
+class MountTelemetry:
+    """
+    Polls the mount at a fixed rate and publishes the latest state.
+    Each cycle sends all queries at once (:GR#, :GD#, :GU# and the focuser
+    positions) through the mount's command engine and waits for the replies,
+    so one cycle costs a single round trip. Serial load is bounded by the
+    poll rate no matter how many consumers read the state.
+
+    Readers never take a lock: a new snapshot is an immutable MountState
+    that replaces the previous one with a single reference assignment.
+    """
+
+    def __init__(self, mount, rate_hz=5.0, focusers=(1, 2), timeout=1.0):
+        """
+        Args:
+            mount (OnStepMount): Connected mount.
+            rate_hz (float): Poll cycles per second.
+            focusers (tuple): Focuser numbers to poll (the alignment base axes).
+            timeout (float): Reply timeout per cycle in seconds.
+        """
+        self.mount = mount
+        self.interval = 1.0 / rate_hz
+        self.focusers = tuple(focusers)
+        self.timeout = timeout
+        self.errors = 0
+        self.last_error = None
+        self._state = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Starts the poll thread. Returns self."""
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._poll_loop, name="MountTelemetry", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the poll thread."""
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def latest(self):
+        """Returns the latest MountState, or None before the first successful poll. Never blocks."""
+        return self._state
+
+    def wait_for_update(self, seq=None, timeout=2.0):
+        """
+        Blocks until a snapshot newer than seq is published.
+
+        Args:
+            seq (int, optional): Sequence number already seen. Defaults to the current one.
+            timeout (float): Maximum wait in seconds.
+
+        Returns:
+            MountState: The new snapshot.
+
+        Raises:
+            TimeoutError: If no new snapshot arrives in time.
+        """
+        if seq is None:
+            seq = self._state.seq if self._state is not None else -1
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._state is None or self._state.seq <= seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    raise TimeoutError("No new mount telemetry")
+                self._cond.wait(remaining)
+            return self._state
+
+    def poll_once(self):
+        """
+        Runs one poll cycle and publishes the result.
+
+        Returns:
+            MountState: The new snapshot.
+
+        Raises:
+            TimeoutError: If the mount does not answer.
+            ValueError: If a reply cannot be parsed.
+        """
+        commands = [":GR#", ":GD#", ":GU#"] + [f":F{n}G#" for n in self.focusers]
+        futures = [self.mount.submit_cmd(cmd, timeout=self.timeout) for cmd in commands]
+        replies = [f.result() for f in futures]
+        status = replies[2]
+        slewing, tracking = parse_status(status)
+        seq = self._state.seq + 1 if self._state is not None else 0
+        state = MountState(
+            timestamp=time.time(),
+            seq=seq,
+            ra=parse_ra(replies[0]),
+            dec=parse_dec(replies[1]),
+            status=status,
+            slewing=slewing,
+            tracking=tracking,
+            focusers=types.MappingProxyType({n: int(r) for n, r in zip(self.focusers, replies[3:])}),
+        )
+        with self._cond:
+            self._state = state
+            self._cond.notify_all()
+        return state
+
+    def _poll_loop(self):
+        next_poll = time.monotonic()
+        while self._running:
+            try:
+                self.poll_once()
+            except (TimeoutError, ValueError, ConnectionError) as e:
+                # Keep the last good snapshot, consumers can check its age
+                self.errors += 1
+                self.last_error = e
+            next_poll += self.interval
+            delay = next_poll - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_poll = time.monotonic()
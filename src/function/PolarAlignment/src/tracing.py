@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import threading
+import contextvars
+import itertools
+
+class Span:
+    """One timed operation. Attributes can be added while it runs with set()."""
+
+    __slots__ = ('name', 'attrs', 'start', 'end', 'span_id', 'parent_id', 'thread')
+
+    def __init__(self, name, attrs, span_id, parent_id):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        """Duration in seconds, None while running."""
+        return None if self.end is None else self.end - self.start
+
+    def to_dict(self):
+        return {'name': self.name, 'id': self.span_id, 'parent': self.parent_id, 'thread': self.thread,
+                'start': self.start, 'duration': self.duration, 'attrs': self.attrs}
+
+class _NullSpan:
+    """Shared span of the disabled tracer: entering, leaving and set() do nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class NullTracer:
+    """Tracer that records nothing. The default, so instrumentation costs one call when tracing is off."""
+
+    enabled = False
+
+    def span(self, name, **attrs):
+        return _NULL_SPAN
+
+    def count(self, name, n=1):
+        pass
+
+    def close(self):
+        pass
+
+class Tracer:
+    """
+    Records timed spans and counters.
+    Spans nest: a span started inside another one (in the same thread or asyncio
+    task) records it as its parent. Finished spans are kept in memory and, for the
+    'jsonl' format, appended to the output file as they finish, one JSON object
+    per line. The 'chrome' format writes a Chrome trace (chrome://tracing,
+    Perfetto) with all spans and the final counters when the tracer is closed.
+    """
+
+    enabled = True
+
+    def __init__(self, path=None, format='jsonl'):
+        """
+        Args:
+            path (str, optional): Output file. Without it spans are only kept in memory.
+            format (str): 'jsonl' or 'chrome'.
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        if format not in ('jsonl', 'chrome'):
+            raise ValueError(f"Unknown trace format '{format}', expected 'jsonl' or 'chrome'")
+        self.path = path
+        self.format = format
+        self.spans = []
+        self.counters = {}
+        self._ids = itertools.count(1)
+        self._current = contextvars.ContextVar(f"span_{id(self)}", default=None)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._file = open(path, 'w') if path is not None and format == 'jsonl' else None
+
+    def span(self, name, **attrs):
+        """
+        Returns a context manager timing the block as a span.
+
+        Args:
+            name (str): Phase name, e.g. 'solve'.
+            **attrs: Attributes recorded with the span.
+        """
+        return _SpanContext(self, name, attrs)
+
+    def count(self, name, n=1):
+        """Adds n to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """
+        Returns:
+            dict: {span name: {'count', 'total', 'max'}} with durations in seconds.
+        """
+        result = {}
+        for span in self.spans:
+            s = result.setdefault(span.name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            s['count'] += 1
+            s['total'] += span.duration
+            s['max'] = max(s['max'], span.duration)
+        return result
+
+    def _finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+            if self._file is not None:
+                record = span.to_dict()
+                record['start'] -= self._origin
+                self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+
+    def close(self):
+        """Writes the counters (jsonl) or the whole trace (chrome) and closes the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps({'counters': self.counters}) + "\n")
+                self._file.close()
+                self._file = None
+            elif self.path is not None and self.format == 'chrome':
+                with open(self.path, 'w') as f:
+                    json.dump(self._chrome_trace(), f, default=str)
+
+    def _chrome_trace(self):
+        pid = os.getpid()
+        events = [{'name': s.name, 'ph': 'X', 'pid': pid, 'tid': s.thread,
+                   'ts': (s.start - self._origin) * 1e6, 'dur': s.duration * 1e6, 'args': s.attrs}
+                  for s in self.spans]
+        end = max(((s.end - self._origin) * 1e6 for s in self.spans), default=0.0)
+        events += [{'name': name, 'ph': 'C', 'pid': pid, 'tid': 0, 'ts': end, 'args': {name: value}}
+                   for name, value in self.counters.items()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+class _SpanContext:
+    __slots__ = ('tracer', 'name', 'attrs', 'span', 'token')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        tracer = self.tracer
+        parent = tracer._current.get()
+        self.span = Span(self.name, self.attrs, next(tracer._ids), parent.span_id if parent else None)
+        self.token = tracer._current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.attrs['error'] = exc_type.__name__
+        self.tracer._current.reset(self.token)
+        self.tracer._finish(self.span)
+        return False
+
+_tracer = NullTracer()
+
+def get_tracer():
+    """Returns the process-wide tracer (a NullTracer unless tracing was enabled)."""
+    return _tracer
+
+def set_tracer(tracer):
+    """
+    Installs the process-wide tracer. None disables tracing.
+
+    Returns:
+        The previous tracer.
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer if tracer is not None else NullTracer()
+    return previous
+
+def span(name, **attrs):
+    """Span on the process-wide tracer, see Tracer.span."""
+    return _tracer.span(name, **attrs)
+
+def count(name, n=1):
+    """Counter increment on the process-wide tracer."""
+    _tracer.count(name, n)
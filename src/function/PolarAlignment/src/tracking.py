@@ -0,0 +1,123 @@
+import math
+import numpy as np
+from native_solver import radec_to_vec, vec_to_radec, tangent_basis, _fit_similarity
+
+class StarTracker:
+    """
+    Frame-to-frame star tracking against an anchor frame.
+    The anchor's stars are predicted into each new frame with the last
+    known transform, the remaining shift is found by voting over all
+    predicted/detected star pairs, and a similarity transform
+    (shift, rotation, scale) is fitted to the matched stars. Matching
+    always goes back to the anchor, so errors do not accumulate.
+    """
+
+    def __init__(self, match_radius=3.0, vote_bin=4.0, max_shift=60.0, min_matches=5):
+        """
+        Args:
+            match_radius (float): Star match radius after voting, in pixels.
+            vote_bin (float): Bin size of the translation vote, in pixels.
+            max_shift (float): Largest frame-to-frame motion that can be followed, in pixels.
+            min_matches (int): Matched stars needed to keep tracking.
+        """
+        self.match_radius = match_radius
+        self.vote_bin = vote_bin
+        self.max_shift = max_shift
+        self.min_matches = min_matches
+        self._ref = None
+        self.A = 1 + 0j
+        self.B = 0j
+        self.rms = None
+
+    @property
+    def has_anchor(self):
+        return self._ref is not None
+
+    def reset(self, stars):
+        """
+        Sets the anchor stars and resets the transform to identity.
+
+        Args:
+            stars (np.ndarray): Structured array with 'x' and 'y' fields (STAR_DTYPE).
+        """
+        self._ref = stars['x'] + 1j * stars['y']
+        self.A = 1 + 0j
+        self.B = 0j
+        self.rms = None
+
+    def track(self, stars):
+        """
+        Finds the anchor stars in a new frame.
+
+        Args:
+            stars (np.ndarray): Stars detected in the new frame (STAR_DTYPE).
+
+        Returns:
+            int: Number of matched stars, or 0 if tracking is lost. On success
+            the anchor-to-frame transform is available as (A, B): z' = A * z + B,
+            and the RMS residual of the matched stars (pixels) as rms.
+        """
+        if self._ref is None or len(stars) < self.min_matches:
+            return 0
+        cur = stars['x'] + 1j * stars['y']
+        pred = self.A * self._ref + self.B
+
+        # Vote for the residual shift over all pairs within reach
+        diff = cur[None, :] - pred[:, None]
+        near = np.abs(diff) < self.max_shift
+        if not np.any(near):
+            return 0
+        d = diff[near]
+        bins = np.round(d.real / self.vote_bin).astype(np.int64) * 100003 + np.round(d.imag / self.vote_bin).astype(np.int64)
+        values, counts = np.unique(bins, return_counts=True)
+        peak = values[np.argmax(counts)]
+        in_peak = bins == peak
+        shift = d[np.abs(d - d[in_peak].mean()) < self.vote_bin].mean()
+
+        # Nearest detected star for every predicted anchor star
+        dist = np.abs(diff - shift)
+        nearest = np.argmin(dist, axis=1)
+        ok = dist[np.arange(len(pred)), nearest] < self.match_radius
+        # A detected star may only match one anchor star
+        idx = nearest[ok]
+        ok[np.flatnonzero(ok)[np.bincount(idx, minlength=len(cur))[idx] > 1]] = False
+        if ok.sum() < self.min_matches:
+            return 0
+
+        src = np.column_stack([self._ref[ok].real, self._ref[ok].imag])
+        dst = np.column_stack([cur[nearest[ok]].real, cur[nearest[ok]].imag])
+        A, B, rms = _fit_similarity(src, dst)
+        if not rms < self.match_radius:
+            return 0
+        self.A, self.B, self.rms = A, B, rms
+        return int(ok.sum())
+
+    def to_anchor(self, x, y):
+        """Maps a pixel of the current frame back to anchor frame pixels."""
+        z = (complex(x, y) - self.B) / self.A
+        return z.real, z.imag
+
+def pixel_to_radec(solution, x, y, width, height):
+    """
+    Converts a pixel of a solved frame to RA/Dec.
+    Uses the solution's centre, rotation, scale and parity in the same
+    convention as NativeSolver (y up, rotation = -angle of the pixel-to-sky transform).
+
+    Args:
+        solution (dict): Plate solution with 'ra', 'dec', 'rotation' and 'scale' (arcsec/px).
+        x, y (float): Pixel coordinates.
+        width, height (int): Image size.
+
+    Returns:
+        tuple: (ra, dec) in degrees.
+    """
+    z = complex(x - width / 2.0, height / 2.0 - y)
+    if solution.get('parity') == 'mirrored':
+        z = z.conjugate()
+    A = math.radians(solution['scale'] / 3600.0) * np.exp(-1j * math.radians(solution.get('rotation') or 0.0))
+    w = A * z
+    center = radec_to_vec(solution['ra'], solution['dec'])
+    east, north = tangent_basis(center)
+    v = center + w.real * east + w.imag * north
+    ra, dec = vec_to_radec(v / np.linalg.norm(v))
+    return float(ra), float(dec)
@@ -0,0 +1,14 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+@pytest.fixture(scope="session")
+def iers_cache(tmp_path_factory):
+    """IERS cache directory for aligners built by the tests, outside the source tree."""
+    from iers_manager import setup_iers
+    cache_dir = str(tmp_path_factory.mktemp("iers"))
+    # Seed it from the bundled table up front, so no test starts a download
+    setup_iers(cache_dir, download_if_missing=False)
+    return cache_dir
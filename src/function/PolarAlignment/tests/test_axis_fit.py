@@ -0,0 +1,100 @@
+import sys
+import os
+import math
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from axis_fit import AxisEstimator, _altaz_to_vec
+
+def circle_points(axis_alt, axis_az, radius, angles, noise_arcsec=0.0, seed=0):
+    """Alt/Az of points on a small circle around an axis, with optional Gaussian noise."""
+    rng = np.random.default_rng(seed)
+    axis = _altaz_to_vec(axis_alt, axis_az)
+    u = np.cross(axis, [0.0, 0.0, 1.0])
+    u /= np.linalg.norm(u)
+    w = np.cross(axis, u)
+    r = math.radians(radius)
+    points = []
+    for a in np.radians(angles):
+        v = math.cos(r) * axis + math.sin(r) * (math.cos(a) * u + math.sin(a) * w)
+        v += rng.normal(0, math.radians(noise_arcsec / 3600.0), 3)
+        v /= np.linalg.norm(v)
+        points.append((math.degrees(math.asin(v[2])), math.degrees(math.atan2(v[1], v[0])) % 360.0))
+    return points
+
+def off_circle(point, axis_alt, axis_az, shift_deg):
+    """Moves a point radially away from the axis, off the circle it lies on."""
+    a = _altaz_to_vec(axis_alt, axis_az)
+    v = _altaz_to_vec(*point)
+    t = v - (a @ v) * a
+    t /= np.linalg.norm(t)
+    theta = math.acos(a @ v) + math.radians(shift_deg)
+    v = math.cos(theta) * a + math.sin(theta) * t
+    return math.degrees(math.asin(v[2])), math.degrees(math.atan2(v[1], v[0])) % 360.0
+
+def axis_error_arcsec(estimator, alt, az):
+    cos = float(np.clip(estimator.axis @ _altaz_to_vec(alt, az), -1, 1))
+    return math.degrees(math.acos(cos)) * 3600.0
+
+def test_three_points_recover_axis():
+    estimator = AxisEstimator()
+    for alt, az in circle_points(40.0, 1.5, 1.0, [0, 30, 60]):
+        assert estimator.add(alt, az)
+    assert axis_error_arcsec(estimator, 40.0, 1.5) < 0.01
+    assert math.isfinite(estimator.uncertainty_arcsec())
+
+def test_uncertainty_shrinks_and_matches_error():
+    estimator = AxisEstimator(point_sigma_arcsec=5.0)
+    uncertainties = []
+    for alt, az in circle_points(39.0, 359.0, 2.0, np.arange(0, 300, 30), noise_arcsec=5.0, seed=1):
+        estimator.add(alt, az)
+        uncertainties.append(estimator.uncertainty_arcsec())
+    assert all(math.isinf(u) for u in uncertainties[:2])
+    assert uncertainties[-1] < uncertainties[2]
+    assert axis_error_arcsec(estimator, 39.0, 359.0) < 4 * uncertainties[-1]
+
+def test_outlier_rejected():
+    points = circle_points(40.0, 2.0, 1.0, np.arange(0, 240, 30), noise_arcsec=2.0, seed=2)
+    points[4] = off_circle(points[4], 40.0, 2.0, 0.2)
+    estimator = AxisEstimator(point_sigma_arcsec=2.0)
+    accepted = [estimator.add(alt, az) for alt, az in points]
+    assert accepted[4] is False
+    assert estimator.rejected == 1
+    assert axis_error_arcsec(estimator, 40.0, 2.0) < 30.0
+
+def test_early_outlier_recovered_by_reseed():
+    points = circle_points(40.0, 2.0, 1.0, np.arange(0, 300, 30), noise_arcsec=2.0, seed=3)
+    points[1] = off_circle(points[1], 40.0, 2.0, 0.2)
+    estimator = AxisEstimator(point_sigma_arcsec=2.0)
+    for alt, az in points:
+        estimator.add(alt, az)
+    # The bad point was among the first three, so it could only be dropped by a re-seed
+    assert estimator.count == len(points) - 1
+    assert axis_error_arcsec(estimator, 40.0, 2.0) < 10.0
+
+def test_coincident_points_fall_back_to_mean():
+    estimator = AxisEstimator()
+    for _ in range(3):
+        estimator.add(39.9, 0.5)
+    alt, az = estimator.axis_altaz()
+    assert alt == pytest.approx(39.9, abs=1e-6)
+    assert az == pytest.approx(0.5, abs=1e-6)
+    # The mean pointing is only a fallback, the axis itself is unknown
+    assert math.isinf(estimator.uncertainty_arcsec())
+
+@pytest.mark.parametrize("radius, step", [(0.15, 30.0), (0.4, 15.0)])
+def test_short_arcs_are_fitted(radius, step):
+    estimator = AxisEstimator(point_sigma_arcsec=10.0)
+    for alt, az in circle_points(40.0, 1.0, radius, [0, step, 2 * step]):
+        estimator.add(alt, az)
+    assert axis_error_arcsec(estimator, 40.0, 1.0) < 0.1
+    # Short arcs pin the axis down only loosely
+    assert 30.0 < estimator.uncertainty_arcsec() < math.inf
+
+def test_nearly_straight_arc_has_no_uncertainty_bound():
+    estimator = AxisEstimator(point_sigma_arcsec=10.0)
+    for alt, az in circle_points(40.0, 1.0, 0.05, [0, 15, 30]):
+        estimator.add(alt, az)
+    assert math.isinf(estimator.uncertainty_arcsec())
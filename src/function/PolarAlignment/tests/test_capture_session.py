@@ -0,0 +1,100 @@
+import sys
+import os
+import time
+import threading
+import pytest
+import numpy as np
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from camera import CaptureSession, GuideCamera
+from frame_cache import FrameCache
+
+class CountingReader:
+    """Fake device returning frames filled with an increasing counter."""
+    def __init__(self, period=0.005):
+        self.period = period
+        self.reading = False
+        self.count = 0
+        self.released = False
+
+    def read(self):
+        self.reading = True
+        time.sleep(self.period)
+        self.reading = False
+        self.count += 1
+        return True, np.full((4, 4), self.count, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+class FakeCapture(CountingReader):
+    """Stand-in for cv2.VideoCapture that records property writes."""
+    instances = []
+
+    def __init__(self, device_id):
+        super().__init__()
+        self.props = []
+        FakeCapture.instances.append(self)
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        self.props.append((prop, value, threading.current_thread().name, self.reading))
+        return True
+
+def test_next_frame_after_skips_stale_frames():
+    reader = CountingReader()
+    with CaptureSession(reader.read, reader.release, buffer_size=4) as session:
+        first_ts, first = session.next_frame_after(0.0)
+        t = time.time()
+        ts, frame = session.next_frame_after(t)
+        assert ts > t
+        assert frame[0, 0] > first[0, 0]
+        assert len(session._buffer) <= 4
+    assert reader.released
+
+def test_session_reports_reader_failure():
+    session = CaptureSession(lambda: (False, None), max_failures=2)
+    with pytest.raises(RuntimeError):
+        session.next_frame_after(time.time(), timeout=1.0)
+    session.close()
+
+def test_settings_applied_once_per_session(monkeypatch, tmp_path):
+    FakeCapture.instances = []
+    monkeypatch.setattr(cv2, "VideoCapture", FakeCapture)
+    camera = GuideCamera(device_id=0, frame_cache=FrameCache(str(tmp_path)))
+    camera.gain = 5
+    camera.exposure = 10
+
+    camera.capture_frame(filename="session_a.png")
+    camera.capture_frame(filename="session_b.png")
+
+    assert len(FakeCapture.instances) == 1
+    assert len(FakeCapture.instances[0].props) == 3
+    camera.close_session()
+    assert FakeCapture.instances[0].released
+
+def test_settings_change_is_applied_by_the_reader(monkeypatch):
+    FakeCapture.instances = []
+    monkeypatch.setattr(cv2, "VideoCapture", FakeCapture)
+    camera = GuideCamera(device_id=0)
+    session = camera.open_session()
+    cap = FakeCapture.instances[0]
+    session.next_frame_after(0.0)
+
+    camera.set_gain(7)
+    session.next_frame_after(time.time())
+    camera.close_session()
+
+    assert cap.props == [(cv2.CAP_PROP_GAIN, 7, "CaptureSession", False)]
+
+def test_simulated_session_is_reused():
+    camera = GuideCamera(device_id=999)
+    session = camera.open_session()
+    assert camera.open_session() is session
+    ts, frame = session.next_frame_after(time.time())
+    assert frame.shape == (480, 640)
+    camera.close_session()
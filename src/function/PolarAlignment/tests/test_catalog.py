@@ -0,0 +1,97 @@
+import sys
+import os
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from catalog import StarCatalog
+from native_solver import NativeSolver, radec_to_vec
+from simulator import StarFieldSimulator
+from cli import main
+
+@pytest.fixture(scope="module")
+def sky():
+    rng = np.random.default_rng(3)
+    n = 200000
+    ra = rng.uniform(0.0, 360.0, n)
+    dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n)))
+    mag = rng.uniform(2.0, 12.0, n)
+    return ra, dec, mag, StarCatalog.build(ra, dec, mag)
+
+def brute_force(ra, dec, center_ra, center_dec, radius):
+    return np.flatnonzero(radec_to_vec(ra, dec) @ radec_to_vec(center_ra, center_dec) >= np.cos(np.radians(radius)))
+
+@pytest.mark.parametrize("ra0, dec0, radius", [(10.0, 20.0, 3.0), (359.8, -5.0, 3.0), (0.1, 40.0, 2.0),
+                                               (120.0, 88.5, 3.0), (300.0, -89.9, 1.0), (45.0, 70.0, 25.0)])
+def test_cone_search_matches_brute_force(sky, ra0, dec0, radius):
+    ra, dec, mag, catalog = sky
+    found = catalog.cone_search(ra0, dec0, radius)
+    expected = brute_force(ra, dec, ra0, dec0, radius)
+    assert len(found) == len(expected)
+    assert np.allclose(np.sort(found['mag']), np.sort(mag[expected].astype(np.float32)))
+
+def test_cone_search_reads_only_the_cone(sky):
+    catalog = sky[3]
+    rows = sum(b - a for a, b in catalog.cone_ranges(200.0, 30.0, 1.5))
+    assert rows < 0.002 * len(catalog)
+
+def test_magnitude_cut_and_brightest(sky):
+    catalog = sky[3]
+    faint_cut = catalog.cone_search(80.0, -30.0, 3.0, mag_limit=6.0)
+    assert len(faint_cut) and faint_cut['mag'].max() <= 6.0
+    brightest = catalog.cone_search(80.0, -30.0, 3.0, max_stars=5)
+    assert len(brightest) == 5
+    assert np.all(np.diff(brightest['mag']) >= 0)
+    assert brightest['mag'][0] == faint_cut['mag'].min()
+    assert np.all(catalog.brighter_than(2.5)['mag'] <= 2.5)
+
+def test_saved_catalog_is_memory_mapped(sky, tmp_path):
+    ra, dec, mag, catalog = sky
+    path = str(tmp_path / "stars.npy")
+    catalog.save(path)
+    opened = StarCatalog.open(path)
+    assert isinstance(opened.stars, np.memmap)
+    assert len(opened) == len(catalog)
+    assert np.array_equal(opened.cone_search(5.0, 5.0, 2.0), catalog.cone_search(5.0, 5.0, 2.0))
+
+def test_build_from_csv(tmp_path):
+    path = tmp_path / "stars.csv"
+    path.write_text("ra,dec,mag\n10.0,45.0,5.0\n10.5,45.2,6.0\n200.0,-10.0,4.0\n")
+    catalog = StarCatalog.from_file(str(path))
+    assert len(catalog) == 3
+    assert len(catalog.cone_search(10.2, 45.1, 1.0)) == 2
+
+def test_identify(sky):
+    ra, dec, mag, catalog = sky
+    pick = brute_force(ra, dec, 150.0, 10.0, 1.5)[:5]
+    rows, sep = catalog.identify(ra[pick] + 1e-3, dec[pick], max_sep_arcsec=10.0)
+    assert np.allclose(rows['ra'], ra[pick])
+    assert np.all(sep < 4.0)
+    _, sep = catalog.identify([150.0], [10.0], max_sep_arcsec=0.01)
+    assert np.isinf(sep[0])
+
+def test_simulator_and_native_solver_share_catalog():
+    # Freeze the procedural polar sky into a catalog; the simulator then only renders catalog stars
+    catalog = StarCatalog.build(*StarFieldSimulator(seed=7).stars_near(0.0, 90.0, 8.0))
+    sim = StarFieldSimulator(catalog=catalog, star_density=0.0, seed=1)
+    engine = NativeSolver.from_catalog(catalog, 0.0, 90.0, 6.0, fov_deg=3.0)
+    sol = engine.solve(sim.render(100.0, 87.5, 20.0))
+    assert sol is not None
+    assert np.degrees(np.arccos(radec_to_vec(sol['ra'], sol['dec']) @ radec_to_vec(100.0, 87.5))) < 0.01
+
+def test_simulator_accepts_star_tuples():
+    stars = [(10.0, 45.0, 6.0), (10.5, 45.2, 7.0)]
+    from_tuples = StarFieldSimulator(catalog=stars, star_density=0.0, seed=2)
+    from_catalog = StarFieldSimulator(catalog=StarCatalog.from_stars(stars), star_density=0.0, seed=2)
+    assert np.array_equal(from_tuples.render(10.2, 45.1), from_catalog.render(10.2, 45.1))
+
+def test_cli_build_and_query(tmp_path, capsys):
+    source = tmp_path / "stars.csv"
+    source.write_text("ra,dec,mag\n10.0,45.0,5.0\n10.5,45.2,6.0\n200.0,-10.0,4.0\n")
+    output = str(tmp_path / "stars.npy")
+    assert main(["catalog", "build", str(source), output]) == 0
+    assert main(["catalog", "query", output, "10.2", "45.1", "1.0", "--max-stars", "1"]) == 0
+    out = capsys.readouterr().out
+    assert "3 stars written" in out
+    assert "10.00000" in out and "1 stars" in out
@@ -0,0 +1,41 @@
+import sys
+import os
+import subprocess
+import pytest
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(SRC)
+
+from cli import main
+
+def test_mount_position_mock(capsys):
+    assert main(["mount", "position", "--mock"]) == 0
+    assert "RA 0.0000 deg, Dec 90.0000 deg" in capsys.readouterr().out
+
+def test_move_base_mock(capsys):
+    assert main(["mount", "move-base", "--mock", "120", "-40"]) == 0
+    assert "alt 120 steps, az -40 steps" in capsys.readouterr().out
+
+def test_mount_command_skips_heavy_imports():
+    out = subprocess.run([sys.executable, "-X", "importtime", SRC, "mount", "position", "--mock"],
+                         capture_output=True, text=True, check=True)
+    assert "Dec 90.0000" in out.stdout
+    imported = {line.rsplit('|', 1)[-1].strip() for line in out.stderr.splitlines() if '|' in line}
+    assert "mount" in imported
+    for heavy in ("cv2", "astropy", "numpy", "requests"):
+        assert heavy not in imported
+
+def test_usage_error():
+    with pytest.raises(SystemExit):
+        main(["mount"])
+
+@pytest.mark.parametrize("argv", [
+    ["align", "--mock", "--backend", "native"],
+    ["align", "--mock", "--pool", "--backend", "astap"],
+    ["align", "--mock", "--pool", "--workers", "2"],
+])
+def test_align_rejects_invalid_solver_options(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+    assert exc.value.code == 2
+    assert "--" in capsys.readouterr().err
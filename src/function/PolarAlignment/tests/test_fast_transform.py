@@ -0,0 +1,80 @@
+import sys
+import os
+import pytest
+import numpy as np
+import erfa
+import astropy.units as u
+from astropy.coordinates import SkyCoord, EarthLocation, AltAz
+from astropy.time import Time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from iers_manager import setup_iers
+from fast_transform import FastAltAz
+from aligner import PolarAligner
+
+# Largest allowed difference to astropy, in arcsec
+TOLERANCE_ARCSEC = 0.01
+
+LOCATION = EarthLocation(lat=39.9*u.deg, lon=116.4*u.deg, height=50*u.m)
+
+@pytest.fixture(scope="module", autouse=True)
+def iers_table(iers_cache):
+    setup_iers(iers_cache)
+
+def separation_arcsec(alt1, az1, alt2, az2):
+    return SkyCoord(az1*u.deg, alt1*u.deg, frame='altaz').separation(
+        SkyCoord(az2*u.deg, alt2*u.deg, frame='altaz')).arcsec
+
+@pytest.mark.parametrize("pressure", [0.0, 1013.25])
+def test_matches_astropy(pressure):
+    rng = np.random.default_rng(3)
+    ra = rng.uniform(0, 360, 300)
+    dec = rng.uniform(-40, 90, 300)
+    timestamps = 1.76e9 + rng.uniform(0, 5 * 86400, 300)
+    frame = AltAz(obstime=Time(timestamps, format='unix'), location=LOCATION, pressure=pressure*u.hPa,
+                  temperature=10*u.deg_C, relative_humidity=0.5, obswl=0.55*u.um)
+    expected = SkyCoord(ra=ra*u.deg, dec=dec*u.deg).transform_to(frame)
+
+    fast = FastAltAz.from_location(LOCATION, pressure_hpa=pressure, temperature_c=10.0,
+                                   humidity=0.5, wavelength_um=0.55)
+    alt, az = fast.transform(ra, dec, timestamps)
+    above = expected.alt.deg > 5.0 # Refraction models differ near the horizon
+    sep = separation_arcsec(alt, az, expected.alt.deg, expected.az.deg)
+    assert sep[above].max() < TOLERANCE_ARCSEC
+
+def test_node_parameters_reused(monkeypatch):
+    fast = FastAltAz.from_location(LOCATION)
+    calls = []
+    original = erfa.apco13
+    monkeypatch.setattr(erfa, "apco13", lambda *args: calls.append(len(args[0])) or original(*args))
+    for k in range(20):
+        fast.transform([10.0], [89.0], [1.76e9 + 30.0 + k])
+    assert calls == [1]
+    # A batch only computes the nodes it has not seen yet
+    fast.transform([10.0, 20.0], [89.0, 88.0], [1.76e9 + 40.0, 1.76e9 + 900.0])
+    assert calls == [1, 1]
+
+def test_to_icrs_inverts_transform():
+    rng = np.random.default_rng(5)
+    ra = rng.uniform(0, 360, 200)
+    dec = rng.uniform(-40, 90, 200)
+    timestamps = 1.76e9 + rng.uniform(0, 86400, 200)
+    fast = FastAltAz.from_location(LOCATION, pressure_hpa=1013.25)
+    alt, az = fast.transform(ra, dec, timestamps)
+    above = alt > 15.0 # ERFA's inverse refraction is approximate near the horizon
+    ra2, dec2 = fast.to_icrs(alt, az, timestamps)
+    sep = SkyCoord(ra*u.deg, dec*u.deg).separation(SkyCoord(ra2*u.deg, dec2*u.deg)).arcsec
+    assert sep[above].max() < TOLERANCE_ARCSEC
+
+def test_aligner_fast_backend(iers_cache):
+    reference = PolarAligner(None, None, None, cache_dir=iers_cache)
+    fast = PolarAligner(None, None, None, cache_dir=iers_cache, transform_backend="fast")
+    ra, dec = np.array([10.0, 120.0, 250.0]), np.array([89.0, 88.5, 87.0])
+    timestamps = 1.7e9 + np.array([0.0, 600.0, 1200.0])
+    alt, az = fast._icrs_to_altaz(ra, dec, timestamps)
+    alt_ref, az_ref = reference._icrs_to_altaz(ra, dec, timestamps)
+    assert separation_arcsec(alt, az, alt_ref, az_ref).max() < TOLERANCE_ARCSEC
+
+    with pytest.raises(ValueError):
+        PolarAligner(None, None, None, cache_dir=iers_cache, transform_backend="pyephem")
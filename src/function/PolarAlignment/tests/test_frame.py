@@ -0,0 +1,62 @@
+import sys
+import os
+import pytest
+import numpy as np
+import cv2
+from astropy.io import fits
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from frame import Frame, FrameWriter
+from camera import GuideCamera
+from solver import PlateSolver
+
+def make_frame():
+    data = (np.arange(48 * 64) % 251).astype(np.uint8).reshape(48, 64)
+    return Frame(data, timestamp=1700000000.0, exposure=100.0, gain=10.0)
+
+def test_frame_shares_pixels_read_only():
+    data = np.zeros((8, 8), dtype=np.uint8)
+    frame = Frame(data)
+    assert np.shares_memory(frame.data, data)
+    with pytest.raises(ValueError):
+        frame.data[0, 0] = 1
+
+def test_frame_rejects_lossy_format(tmp_path):
+    with pytest.raises(ValueError):
+        make_frame().save(str(tmp_path / "frame.jpg"))
+
+def test_frame_roundtrip_is_lossless(tmp_path):
+    frame = make_frame()
+    png = frame.save(str(tmp_path / "frame.png"))
+    assert np.array_equal(cv2.imread(png, cv2.IMREAD_GRAYSCALE), frame.data)
+
+    path = frame.save(str(tmp_path / "frame.fits"))
+    with fits.open(path) as hdul:
+        assert np.array_equal(hdul[0].data, frame.data)
+        assert hdul[0].header['EXPTIME'] == 100.0
+        assert hdul[0].header['GAIN'] == 10.0
+
+def test_background_writer(tmp_path):
+    writer = FrameWriter()
+    frame = make_frame()
+    future = writer.submit(frame, str(tmp_path / "bg.fits"))
+    assert future.result(timeout=5) == frame.path
+    assert os.path.exists(frame.path)
+    writer.close()
+
+def test_capture_returns_frame_in_memory():
+    camera = GuideCamera(device_id=999)
+    camera.set_exposure(100.0)
+    frame = camera.capture_frame()
+    assert isinstance(frame, Frame)
+    assert frame.shape == (480, 640)
+    assert frame.exposure == 100.0
+    assert frame.path is None
+    camera.close_session()
+
+def test_solver_cleans_up_temporary_frame_file(tmp_path):
+    solver = PlateSolver(executable="astap-not-installed", work_dir=str(tmp_path))
+    sol = solver.solve(make_frame())
+    assert set(sol) >= {'ra', 'dec', 'rotation'}
+    assert os.listdir(tmp_path) == []
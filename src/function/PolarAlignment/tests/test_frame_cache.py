@@ -0,0 +1,116 @@
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import frame_cache
+from frame import Frame
+from frame_cache import FrameCache, remove_with_sidecars
+from camera import GuideCamera
+from solver import PlateSolver
+
+FAKE_ASTAP = """#!{python}
+import os, sys
+args = sys.argv[1:]
+base = os.path.splitext(args[args.index("-f") + 1])[0]
+with open(base + ".ini", "w") as f:
+    f.write("PLTSOLVED=1\\nCRVAL1=12.5\\nCRVAL2=88.25\\nCROTA2=3.0\\n")
+open(base + ".wcs", "w").close()
+"""
+
+def make_frame(value=0):
+    return Frame(np.full((32, 32), value, dtype=np.uint8), timestamp=1700000000.0)
+
+def frame_files(directory):
+    return sorted(f for f in os.listdir(directory) if f.startswith("frame_"))
+
+def test_ids_are_unique_and_monotonic(tmp_path):
+    cache = FrameCache(str(tmp_path))
+    paths = [cache.add(make_frame(), ".png").result(timeout=5) for _ in range(5)]
+    assert len(set(paths)) == 5
+    assert paths == sorted(paths)
+    # A second cache on the same directory continues after the existing ids
+    other = FrameCache(str(tmp_path))
+    assert other.add(make_frame(), ".png").result(timeout=5) > paths[-1]
+    assert len(frame_files(tmp_path)) == 6
+    cache.close()
+    other.close()
+
+def test_same_name_never_overwrites(tmp_path):
+    cache = FrameCache(str(tmp_path))
+    a = cache.add(make_frame(1), ".png", name="capture").result(timeout=5)
+    b = cache.add(make_frame(2), ".png", name="capture").result(timeout=5)
+    assert a != b and a.endswith("_capture.png")
+    cache.close()
+
+def test_byte_budget_evicts_least_recently_used(tmp_path):
+    size = os.path.getsize(make_frame().save(str(tmp_path / "probe.fits")))
+    cache = FrameCache(str(tmp_path / "frames"), max_bytes=3 * size)
+    paths = [cache.add(make_frame(i)).result(timeout=5) for i in range(3)]
+    cache.touch(paths[0])
+    cache.add(make_frame(3)).result(timeout=5)
+    cache.close()
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[0]) and os.path.exists(paths[2])
+    assert cache.total_bytes <= 3 * size
+    assert cache.evicted == 1
+
+def test_age_limit_and_held_frames(tmp_path):
+    cache = FrameCache(str(tmp_path), max_age=60.0)
+    old, held = [cache.add(make_frame(i)).result(timeout=5) for i in range(2)]
+    with cache.hold(held):
+        assert cache.evict(now=time.time() + 120.0) == 1
+        assert not os.path.exists(old) and os.path.exists(held)
+    assert cache.evict(now=time.time() + 120.0) == 1
+    assert frame_files(tmp_path) == []
+    cache.close()
+
+def test_leftover_frames_are_adopted(tmp_path):
+    cache = FrameCache(str(tmp_path))
+    path = cache.add(make_frame()).result(timeout=5)
+    cache.close()
+    (tmp_path / "finals2000A.all").write_text("not a frame")
+    restarted = FrameCache(str(tmp_path), max_bytes=0)
+    assert not os.path.exists(path) and restarted.evicted == 1
+    assert os.path.exists(tmp_path / "finals2000A.all")
+
+def test_interrupted_writes_and_deletes_are_cleaned_up(tmp_path):
+    old = time.time() - 2 * frame_cache.STALE_AFTER
+    for name in ("frame_00000001.fits.part.fits", "frame_00000002_live.png.part.png"):
+        (tmp_path / name).write_text("partial")
+        os.utime(tmp_path / name, (old, old))
+    (tmp_path / "frame_00000003.fits.part.fits").write_text("still being written")
+    (tmp_path / ".frame_00000004.fits.1234.del").write_text("deleted")
+    FrameCache(str(tmp_path))
+    assert os.listdir(tmp_path) == ["frame_00000003.fits.part.fits"]
+
+def test_eviction_removes_sidecars(tmp_path):
+    path = make_frame().save(str(tmp_path / "frame_00000001.fits"))
+    for ext in (".ini", ".wcs"):
+        (tmp_path / f"frame_00000001{ext}").write_text("x")
+    remove_with_sidecars(path)
+    assert os.listdir(tmp_path) == []
+
+def test_ram_location(tmp_path, monkeypatch):
+    monkeypatch.setattr(frame_cache, "RAM_ROOT", str(tmp_path / "shm"))
+    cache = FrameCache(str(tmp_path / "disk"), ram=True)
+    assert cache.directory == str(tmp_path / "disk") # No RAM directory: stays on disk
+    os.mkdir(tmp_path / "shm")
+    cache = FrameCache(str(tmp_path / "disk"), ram=True)
+    assert cache.directory.startswith(str(tmp_path / "shm"))
+
+def test_camera_saves_into_cache_and_solver_cleans_sidecars(tmp_path):
+    astap = tmp_path / "astap"
+    astap.write_text(FAKE_ASTAP.format(python=sys.executable))
+    astap.chmod(0o755)
+    cache = FrameCache(str(tmp_path / "frames"))
+    camera = GuideCamera(device_id=999, frame_cache=cache)
+    frame = make_frame()
+    path = camera.save_frame(frame, "polar.fits").result(timeout=5)
+    sol = PlateSolver(executable=str(astap), fallback=False).solve(frame)
+    assert sol['ra'] == 12.5
+    # ASTAP's .ini/.wcs are gone, the cached frame stays
+    assert frame_files(tmp_path / "frames") == [os.path.basename(path)]
+    cache.close()
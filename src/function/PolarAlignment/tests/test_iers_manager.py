@@ -0,0 +1,203 @@
+import sys
+import os
+import glob
+import time
+import shutil
+import hashlib
+import threading
+import http.server
+import pytest
+import numpy as np
+from astropy.time import Time
+from astropy.utils import iers
+import astropy_iers_data
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from iers_manager import IERSManager, setup_iers
+
+BUNDLED = os.path.join(os.path.dirname(astropy_iers_data.__file__), 'data', 'finals2000A.all')
+TIMES = Time(['2019-03-01', '2024-07-15', '2026-10-17'])
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    shutil.copy(BUNDLED, tmp_path / "finals2000A.all")
+    return str(tmp_path)
+
+def test_sidecar_matches_parsed_table(cache_dir, monkeypatch):
+    parsed = IERSManager().ensure(cache_dir)
+    sidecars = glob.glob(os.path.join(cache_dir, "finals2000A.all.*.npy"))
+    assert len(sidecars) == 1
+
+    # A new process starts with an empty manager and maps the sidecar
+    monkeypatch.setattr(iers.IERS_A, 'open', lambda *a, **k: pytest.fail("parsed again"))
+    loaded = IERSManager().ensure(cache_dir)
+    assert loaded is not parsed
+    assert iers.earth_orientation_table.get() is loaded
+    assert loaded.meta['predictive_mjd'] == parsed.meta['predictive_mjd']
+    np.testing.assert_array_equal(loaded.ut1_utc(TIMES), parsed.ut1_utc(TIMES))
+    np.testing.assert_array_equal(loaded.ut1_utc(TIMES, return_status=True)[1],
+                                  parsed.ut1_utc(TIMES, return_status=True)[1])
+    for got, want in zip(loaded.pm_xy(TIMES) + loaded.dcip_xy(TIMES), parsed.pm_xy(TIMES) + parsed.dcip_xy(TIMES)):
+        np.testing.assert_array_equal(got, want)
+
+def test_stale_sidecars_removed(cache_dir):
+    path = os.path.join(cache_dir, "finals2000A.all")
+    np.save(path + ".0123456789abcdef.npy", np.zeros(1)) # Left over from an older file version
+    IERSManager().ensure(cache_dir)
+    sidecars = glob.glob(path + ".*.npy")
+    assert len(sidecars) == 1 and "0123456789abcdef" not in sidecars[0]
+
+def test_reload_skips_parse(cache_dir, monkeypatch):
+    manager = IERSManager()
+    table = manager.ensure(cache_dir)
+    # Touching the file without changing it, or calling again, keeps the loaded table
+    os.utime(os.path.join(cache_dir, "finals2000A.all"))
+    monkeypatch.setattr(iers.IERS_A, 'open', lambda *a, **k: pytest.fail("parsed again"))
+    assert manager.ensure(cache_dir) is table
+    assert manager.ensure(cache_dir) is table
+
+def test_changed_file_gets_new_sidecar(cache_dir):
+    manager = IERSManager()
+    path = os.path.join(cache_dir, "finals2000A.all")
+    first = manager.ensure(cache_dir)
+    old = glob.glob(path + ".*.npy")
+    # Drop the last (predicted) rows, as if a different release were downloaded
+    with open(path) as f:
+        lines = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines(lines[:-200])
+    table = manager.ensure(cache_dir)
+    assert table is not first and len(table) < len(first)
+    new = glob.glob(path + ".*.npy")
+    assert len(new) == 1 and new != old
+
+def test_setup_iers_uses_process_manager(cache_dir):
+    assert setup_iers(cache_dir) is IERSManager.instance().table
+    assert setup_iers(cache_dir) is IERSManager.instance().table
+
+class IERSServer:
+    """Local stand-in for the IERS data center, with ETag / Last-Modified support."""
+
+    def __init__(self, body, delay=0.0):
+        self.body = body
+        self.delay = delay
+        self.requests = [] # (method, If-None-Match, If-Modified-Since, status)
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.delay)
+                etag = '"%s"' % hashlib.sha1(server.body).hexdigest()
+                modified = 'Sat, 17 Oct 2026 00:00:00 GMT'
+                status = 304 if self.headers.get('If-None-Match') == etag else 200
+                server.requests.append((self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'), status))
+                self.send_response(status)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', modified)
+                if status == 200:
+                    self.send_header('Content-Length', str(len(server.body)))
+                    self.end_headers()
+                    self.wfile.write(server.body)
+                else:
+                    self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/finals2000A.all"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def stale_cache(cache_dir):
+    # A cached file with the last 200 rows missing, last touched 30 days ago
+    path = os.path.join(cache_dir, "finals2000A.all")
+    with open(path) as f:
+        lines = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines(lines[:-200])
+    old = time.time() - 30 * 86400
+    os.utime(path, (old, old))
+    return cache_dir
+
+def test_stale_table_served_while_refreshing(stale_cache):
+    with open(BUNDLED, 'rb') as f:
+        server = IERSServer(f.read(), delay=1.0)
+    try:
+        manager = IERSManager()
+        manager.url = server.url
+        start = time.perf_counter()
+        stale = manager.ensure(stale_cache)
+        assert time.perf_counter() - start < 0.9 # Did not wait for the slow server
+        assert iers.earth_orientation_table.get() is stale
+
+        assert manager.wait_for_refresh(timeout=10.0) == 'updated'
+        fresh = iers.earth_orientation_table.get()
+        assert fresh is manager.table and len(fresh) > len(stale)
+        path = os.path.join(stale_cache, "finals2000A.all")
+        assert _read(path) == server.body
+        assert not glob.glob(path + ".*.download")
+
+        # The next refresh is conditional and only restarts the age clock
+        old = time.time() - 30 * 86400
+        os.utime(path, (old, old))
+        assert manager.refresh(path) == 'not-modified'
+        assert server.requests[-1][0] is not None and server.requests[-1][1] is not None
+        assert server.requests[-1][2] == 304
+        assert time.time() - os.path.getmtime(path) < 60
+        assert manager.table is fresh
+    finally:
+        server.close()
+
+def test_reseeded_table_is_not_revalidated(stale_cache):
+    with open(BUNDLED, 'rb') as f:
+        server = IERSServer(f.read())
+    try:
+        manager = IERSManager()
+        manager.url = server.url
+        manager.ensure(stale_cache)
+        assert manager.wait_for_refresh(timeout=10.0) == 'updated'
+        path = os.path.join(stale_cache, "finals2000A.all")
+        assert os.path.exists(path + ".http.json")
+
+        # The cached file is lost: the bundled copy must be downloaded over, not revalidated
+        os.remove(path)
+        manager = IERSManager()
+        manager.url = server.url
+        manager.ensure(stale_cache)
+        assert manager.wait_for_refresh(timeout=10.0) == 'updated'
+        assert server.requests[-1][0] is None and server.requests[-1][2] == 200
+    finally:
+        server.close()
+
+def test_invalid_download_keeps_table(stale_cache):
+    server = IERSServer(b"<html>Service unavailable</html>")
+    try:
+        manager = IERSManager()
+        manager.url = server.url
+        table = manager.ensure(stale_cache)
+        before = _read(os.path.join(stale_cache, "finals2000A.all"))
+        assert manager.wait_for_refresh(timeout=10.0) == 'failed'
+        assert manager.table is table
+        assert _read(os.path.join(stale_cache, "finals2000A.all")) == before
+    finally:
+        server.close()
+
+def test_offline_startup_does_not_wait(tmp_path):
+    manager = IERSManager()
+    manager.url = "http://127.0.0.1:9/finals2000A.all" # Nothing listens on the discard port
+    start = time.perf_counter()
+    table = manager.ensure(str(tmp_path)) # No cached file yet: starts from the bundled copy
+    assert time.perf_counter() - start < 5.0
+    assert len(table) > 0
+    assert manager.wait_for_refresh(timeout=35.0) == 'failed'
+    assert manager.table is table
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
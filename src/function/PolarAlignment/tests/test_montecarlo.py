@@ -0,0 +1,72 @@
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from montecarlo import make_scenarios, run_scenario, run_sweep, summarize, save_results, load_results, RESULT_DTYPE
+from cli import main
+
+def test_scenarios_are_reproducible():
+    a = make_scenarios(50, seed=4, start=1.76e9)
+    b = make_scenarios(50, seed=4, start=1.76e9)
+    assert np.array_equal(a, b)
+    assert np.all(np.hypot(a['alt_error'], a['az_error']) <= 120.0)
+    assert set(a['points']) <= {3, 4, 5}
+
+def test_noise_free_alignment_recovers_the_axis(iers_cache):
+    scenarios = make_scenarios(10, seed=1, noise=(0.0, 0.0), offset=(1.0, 3.0), ra_steps=(45.0,), start=1.76e9)
+    results = run_sweep(scenarios, workers=1, cache_dir=iers_cache)
+    assert results['ok'].all()
+    assert results['residual'].max() < 0.1
+    assert np.allclose(results['fit_alt_error'], scenarios['alt_error'], atol=0.01)
+    # The base is moved against the error (1000 steps per degree)
+    assert np.allclose(results['alt_steps'], -scenarios['alt_error'] / 60.0 * 1000, atol=2)
+
+def test_solver_noise_shows_in_residual(iers_cache):
+    scenario = make_scenarios(1, seed=2, noise=(20.0, 20.0), offset=(2.0, 2.0), ra_steps=(60.0,),
+                              points=(5,), start=1.76e9)[0]
+    result = run_scenario(scenario, iers_cache)
+    assert result['ok'] and result['solves'] == 5
+    assert 0.5 < result['residual'] < 200.0
+
+def test_sweep_has_no_sleeps(iers_cache):
+    scenarios = make_scenarios(20, seed=3, start=1.76e9)
+    start = time.perf_counter()
+    results = run_sweep(scenarios, workers=1, cache_dir=iers_cache)
+    assert time.perf_counter() - start < 10.0
+    # Simulated slews would take far longer than the scenario runtime
+    assert results['runtime'].max() < 1.0
+
+def test_process_pool_matches_inline_run(iers_cache):
+    scenarios = make_scenarios(12, seed=5, start=1.76e9)
+    inline = run_sweep(scenarios, workers=1, cache_dir=iers_cache)
+    pooled = run_sweep(scenarios, workers=2, chunk_size=4, cache_dir=iers_cache)
+    assert np.array_equal(pooled['id'], scenarios['id'])
+    assert np.allclose(pooled['residual'], inline['residual'])
+
+def test_results_round_trip_and_summary(tmp_path, iers_cache):
+    results = run_sweep(make_scenarios(6, seed=6, start=1.76e9), workers=1, cache_dir=iers_cache)
+    results['ok'][0] = False
+    for name in ("results.npz", "results.csv"):
+        path = str(tmp_path / name)
+        save_results(results, path)
+        loaded = load_results(path)
+        assert loaded.dtype == RESULT_DTYPE
+        assert np.array_equal(loaded['ok'], results['ok'])
+        # Seeds and start times survive exactly, so any saved scenario can be rerun
+        assert np.array_equal(loaded['seed'], results['seed'])
+        for name in ('start', 'residual', 'lat', 'noise'):
+            assert np.array_equal(loaded[name], results[name], equal_nan=True)
+    stats = summarize(results)
+    assert stats['scenarios'] == 6 and stats['failed'] == 1
+    assert stats['median'] == np.median(results['residual'][1:])
+    assert sum(s['scenarios'] for s in summarize(results, by='points').values()) == 6
+
+def test_cli_simulate(tmp_path, capsys, iers_cache):
+    output = str(tmp_path / "sweep.npz")
+    assert main(["simulate", "--scenarios", "8", "--workers", "1", "--output", output,
+                 "--cache-dir", iers_cache]) == 0
+    assert len(load_results(output)) == 8
+    assert "Results written" in capsys.readouterr().out
@@ -0,0 +1,213 @@
+import sys
+import os
+import time
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from mount import OnStepMount, reply_kind, format_ra, format_dec, parse_ra, parse_dec
+from onstep_sim import FakeOnStep
+from telemetry import MountTelemetry, parse_status
+
+@pytest.fixture
+def fake_mount():
+    fake = FakeOnStep()
+    mount = OnStepMount(port=fake.port)
+    mount.connect()
+    assert not mount.mock
+    yield fake, mount
+    mount.disconnect()
+    fake.close()
+
+def test_reply_kinds():
+    assert reply_kind(":GR#") == 'string'
+    assert reply_kind(":F1G#") == 'string'
+    assert reply_kind(":Sr12:00:00#") == 'char'
+    assert reply_kind(":MS#") == 'char'
+    assert reply_kind(":F1M100#") == 'none'
+    assert reply_kind(":Q#") == 'none'
+
+def test_sexagesimal_round_trip():
+    assert parse_ra(format_ra(187.5)) == pytest.approx(187.5, abs=1 / 240.0)
+    assert parse_dec(format_dec(-12.3456)) == pytest.approx(-12.3456, abs=1 / 3600.0)
+    assert parse_dec("+89*30:00") == pytest.approx(89.5)
+    assert parse_ra("06:30.0") == pytest.approx(97.5)
+
+def test_round_trip_not_limited_by_sleep(fake_mount):
+    fake, mount = fake_mount
+    fake.ra, fake.dec = 187.5, 45.25
+    start = time.perf_counter()
+    for _ in range(20):
+        assert mount._send_cmd(":GR#") == "12:30:00"
+    assert (time.perf_counter() - start) / 20 < 0.05
+    assert mount._send_cmd(":GD#") == "+45*15:00"
+
+def test_pipelined_queries_match_their_replies(fake_mount):
+    fake, mount = fake_mount
+    fake.ra, fake.dec = 15.0, -30.0
+    futures = [mount.submit_cmd(cmd) for cmd in [":GR#", ":GD#", ":F1M25#", ":F1G#", ":Sr02:00:00#", ":GU#"] * 5]
+    replies = [f.result(timeout=2.0) for f in futures]
+    assert replies[:6] == ["01:00:00", "-30*00:00", None, "25", "1", "nN"]
+    assert replies[-3] == "125"
+
+def test_timeout_then_resync():
+    with FakeOnStep(ignore=[":GU#"]) as fake:
+        mount = OnStepMount(port=fake.port)
+        mount.connect()
+        try:
+            with pytest.raises(TimeoutError):
+                mount._send_cmd(":GU#", timeout=0.2)
+            assert mount._send_cmd(":GR#") == "00:00:00"
+        finally:
+            mount.disconnect()
+
+def test_goto_through_fake(fake_mount):
+    fake, mount = fake_mount
+    assert mount._send_cmd(":Sr06:00:00#") == "1"
+    assert mount._send_cmd(":Sd+80*00:00#") == "1"
+    assert mount._send_cmd(":MS#") == "0"
+    assert (fake.ra, fake.dec) == pytest.approx((90.0, 80.0))
+
+def test_mock_mode():
+    mount = OnStepMount(mock=True)
+    assert mount.connect() is True
+    assert mount._send_cmd(":MS#") == "0"
+    assert mount._send_cmd(":Sr06:00:00#") == "1"
+    assert mount._send_cmd(":Q#") is None
+    assert mount.get_position() == (0.0, 90.0)
+    mount.slew_ra_relative(30)
+    assert mount.submit_cmd(":GR#").result() == "02:00:00"
+    assert mount.get_position() == (30.0, 90.0)
+
+def test_get_position_parses_replies(fake_mount):
+    fake, mount = fake_mount
+    fake.ra, fake.dec = 123.25, -45.5
+    ra, dec = mount.get_position()
+    assert ra == pytest.approx(123.25, abs=1 / 240.0)
+    assert dec == pytest.approx(-45.5, abs=1 / 3600.0)
+
+def test_slew_ra_relative_waits_for_goto():
+    with FakeOnStep(slew_rate=100.0) as fake:
+        fake.ra, fake.dec = 10.0, 88.0
+        mount = OnStepMount(port=fake.port)
+        mount.connect()
+        try:
+            start = time.monotonic()
+            mount.slew_ra_relative(30.0)
+            assert time.monotonic() - start >= 0.25
+            assert mount.get_position() == pytest.approx((40.0, 88.0), abs=1e-3)
+        finally:
+            mount.disconnect()
+
+def test_status_flags():
+    assert parse_status("nN") == (False, False)
+    assert parse_status("n") == (True, False)
+    assert parse_status("Np") == (False, True)
+
+def test_telemetry_publishes_snapshots(fake_mount):
+    fake, mount = fake_mount
+    fake.ra, fake.dec = 90.0, 45.0
+    telemetry = mount.start_telemetry(rate_hz=20.0)
+    first = telemetry.wait_for_update()
+    fake.focusers[2] = 150
+    later = telemetry.wait_for_update(first.seq + 2)
+    assert later.seq > first.seq
+    assert later.timestamp > first.timestamp
+    assert later.ra == pytest.approx(90.0) and later.dec == pytest.approx(45.0)
+    assert later.focusers[2] == 150
+    assert not later.slewing
+    with pytest.raises(TypeError):
+        later.focusers[2] = 0
+    # Readers get the cached snapshot without touching the serial line
+    sent = len(fake.received)
+    for _ in range(100):
+        assert mount.state() is not None
+    assert len(fake.received) - sent < 20
+
+def test_telemetry_bounds_bus_load(fake_mount):
+    fake, mount = fake_mount
+    telemetry = mount.start_telemetry(rate_hz=10.0, focusers=())
+    telemetry.wait_for_update()
+    sent = len(fake.received)
+    time.sleep(0.5)
+    cycles = (len(fake.received) - sent) / 3
+    assert 3 <= cycles <= 7
+
+def test_telemetry_survives_timeouts():
+    with FakeOnStep(ignore=[":GU#"]) as fake:
+        mount = OnStepMount(port=fake.port)
+        mount.connect()
+        try:
+            telemetry = MountTelemetry(mount, rate_hz=20.0, timeout=0.1).start()
+            deadline = time.monotonic() + 5.0
+            while telemetry.errors < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert telemetry.latest() is None
+            assert telemetry.errors >= 2
+            assert isinstance(telemetry.last_error, TimeoutError)
+            telemetry.stop()
+        finally:
+            mount.disconnect()
+
+@pytest.fixture
+def base_mount():
+    fake = FakeOnStep(focuser_rate={1: 1000.0, 2: 500.0})
+    mount = OnStepMount(port=fake.port)
+    mount.connect()
+    yield fake, mount
+    mount.disconnect()
+    fake.close()
+
+def test_move_base_runs_axes_concurrently(base_mount):
+    fake, mount = base_mount
+    start = time.monotonic()
+    result = mount.move_base(300, -200).result(timeout=5.0)
+    wall = time.monotonic() - start
+    assert fake.focusers == {1: 300, 2: -200}
+    assert result['alt'] == 300 and result['az'] == -200
+    # 0.3 s for alt and 0.4 s for az: the correction takes the slower axis, not the sum
+    assert result['elapsed']['alt'] == pytest.approx(0.3, abs=0.1)
+    assert result['elapsed']['az'] == pytest.approx(0.4, abs=0.1)
+    assert wall < 0.6
+
+def test_move_base_with_telemetry(base_mount):
+    fake, mount = base_mount
+    mount.start_telemetry(rate_hz=20.0)
+    result = mount.move_base(0, 150).result(timeout=5.0)
+    assert fake.focusers == {1: 0, 2: 150}
+    assert result['elapsed']['alt'] == 0.0
+    assert mount.state().focusers[2] == 150
+
+def test_move_base_backlash(base_mount):
+    fake, mount = base_mount
+    mount.backlash_steps = {1: 20, 2: 0}
+    mount.move_base(100, 100).result(timeout=5.0)
+    mount.move_base(100, 100).result(timeout=5.0)
+    # Reversing the alt axis takes up the slack first
+    result = mount.move_base(-50, -50).result(timeout=5.0)
+    assert result['alt'] == -70 and result['az'] == -50
+    assert fake.focusers == {1: 130, 2: 150}
+
+def test_move_base_timeout_stops_axis():
+    with FakeOnStep(focuser_rate={1: 1000.0, 2: 10.0}) as fake:
+        mount = OnStepMount(port=fake.port)
+        mount.connect()
+        try:
+            future = mount.move_base(100, 100, timeout=(1.0, 0.3))
+            with pytest.raises(TimeoutError, match="az axis"):
+                future.result(timeout=5.0)
+            assert ":F2Q#" in fake.received
+            stopped = fake.focusers[2]
+            time.sleep(0.2)
+            fake.handle(":F2G#")
+            assert fake.focusers[2] == stopped < 100
+            assert fake.focusers[1] == 100
+        finally:
+            mount.disconnect()
+
+def test_move_base_mock():
+    mount = OnStepMount(mock=True)
+    future = mount.move_base(40, -10)
+    assert future.done()
+    assert future.result()['alt'] == 40
+    assert mount.submit_cmd(":F2G#").result() == "-10"
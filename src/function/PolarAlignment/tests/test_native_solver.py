@@ -0,0 +1,120 @@
+import sys
+import os
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import solver as solver_module
+from native_solver import NativeSolver, radec_to_vec
+from camera import GuideCamera
+from solver import PlateSolver
+from simulator import StarFieldSimulator
+
+def angular_sep(ra1, dec1, ra2, dec2):
+    return np.degrees(np.arccos(np.clip(radec_to_vec(ra1, dec1) @ radec_to_vec(ra2, dec2), -1, 1)))
+
+@pytest.fixture(scope="module")
+def sky():
+    """Simulated polar cap sky, the native engine built on it and a camera rendering it."""
+    sim = StarFieldSimulator(seed=7)
+    ra, dec, mag = sim.stars_near(0.0, 90.0, 6.5)
+    engine = NativeSolver(ra, dec, mag, fov_deg=3.0)
+    camera = GuideCamera(device_id=999)
+    camera.simulator = sim
+    return ra, dec, mag, engine, camera
+
+@pytest.mark.parametrize("ra0, dec0, roll", [(10.0, 88.0, 0.0), (200.0, 87.0, 30.0), (0.0, 89.0, 250.0)])
+def test_native_solve_recovers_pointing(sky, ra0, dec0, roll):
+    _, _, _, engine, camera = sky
+    camera.set_simulation_pointing(ra0, dec0, roll)
+    sol = engine.solve(camera._render_dummy_frame())
+
+    assert sol is not None
+    assert angular_sep(sol['ra'], sol['dec'], ra0, dec0) < 0.01
+    assert abs((sol['rotation'] - roll + 180) % 360 - 180) < 0.1
+    assert sol['parity'] == 'normal'
+    assert sol['scale'] == pytest.approx(3.0 * 3600 / 640, rel=0.01)
+
+def test_native_solve_mirrored_image(sky):
+    _, _, _, engine, camera = sky
+    camera.set_simulation_pointing(45.0, 87.5, 10.0)
+    sol = engine.solve(camera._render_dummy_frame()[:, ::-1])
+    assert sol is not None
+    assert sol['parity'] == 'mirrored'
+    assert angular_sep(sol['ra'], sol['dec'], 45.0, 87.5) < 0.01
+
+def test_native_solve_blank_image_fails(sky):
+    engine = sky[3]
+    assert engine.solve(np.zeros((480, 640), dtype=np.uint8)) is None
+
+def test_plate_solver_native_backend_without_subprocess(sky, monkeypatch):
+    _, _, _, engine, camera = sky
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("native backend must not start a subprocess")
+    monkeypatch.setattr(solver_module.subprocess, "run", no_subprocess)
+
+    solver = PlateSolver(backend="native", native_solver=engine)
+    camera.set_simulation_pointing(300.0, 88.5, 0.0)
+    sol = solver.solve(camera._render_dummy_frame())
+    assert angular_sep(sol['ra'], sol['dec'], 300.0, 88.5) < 0.01
+
+def test_plate_solver_native_failure_without_fallback(sky):
+    solver = PlateSolver(backend="native", native_solver=sky[3], fallback=False)
+    assert solver.solve(np.zeros((480, 640), dtype=np.uint8)) is None
+
+def test_native_solver_from_csv(sky, tmp_path):
+    ra, dec, mag, _, _ = sky
+    path = tmp_path / "catalog.csv"
+    np.savetxt(path, np.column_stack([ra, dec, mag])[:200], delimiter=",", header="ra,dec,mag", comments="")
+    engine = NativeSolver.from_file(str(path), fov_deg=3.0)
+    assert len(engine.ra) == 200
+    assert np.all(np.diff(engine.mag) >= 0)
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        PlateSolver(backend="nope")
+
+def test_hinted_solve_matches_blind_solve(sky):
+    _, _, _, engine, camera = sky
+    camera.set_simulation_pointing(120.0, 87.0, 40.0)
+    img = camera._render_dummy_frame()
+    blind = engine.solve(img)
+    hinted = engine.solve(img, search_radius=2.0, hint={'ra': 121.0, 'dec': 87.3, 'rotation': 45.0})
+    assert hinted is not None
+    assert angular_sep(hinted['ra'], hinted['dec'], blind['ra'], blind['dec']) < 1e-3
+
+def test_hint_restricts_search(sky):
+    _, _, _, engine, camera = sky
+    camera.set_simulation_pointing(120.0, 87.0, 40.0)
+    img = camera._render_dummy_frame()
+    # Right place, wrong roll
+    assert engine.solve(img, search_radius=2.0, hint={'ra': 120.0, 'dec': 87.0, 'rotation': 130.0}) is None
+    # Wrong place
+    assert engine.solve(img, search_radius=1.0, hint={'ra': 300.0, 'dec': 86.0}) is None
+
+def test_solution_cache_by_content(sky):
+    _, _, _, engine, camera = sky
+    calls = []
+    class CountingEngine:
+        def solve(self, image, search_radius=180, hint=None):
+            calls.append(search_radius)
+            return engine.solve(image, search_radius, hint=hint)
+
+    solver = PlateSolver(backend="native", native_solver=CountingEngine(), cache_size=2)
+    camera.set_simulation_pointing(60.0, 88.0, 0.0)
+    img = camera._render_dummy_frame()
+    first = solver.solve(img)
+    again = solver.solve(img.copy())
+    assert again == first
+    assert len(calls) == 1
+
+    solver.solve(np.zeros((4, 4), dtype=np.uint8))
+    solver.solve(np.ones((4, 4), dtype=np.uint8))
+    assert len(solver._cache) <= 2
+
+def test_mock_solutions_are_not_cached(tmp_path):
+    solver = PlateSolver(executable=str(tmp_path / "no-astap"), work_dir=str(tmp_path))
+    img = np.zeros((4, 4), dtype=np.uint8)
+    assert solver.solve(img)['mock'] is True
+    assert len(solver._cache) == 0
@@ -0,0 +1,58 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from settle import SettleDetector
+from simulator import StarFieldSimulator
+from frame import Frame
+
+SCALE = 3.0 * 3600 / 640  # arcsec/pixel of the default simulator
+
+def vibrating_stream(amplitudes):
+    """Frames of a field that is displaced in Dec by the given amplitudes (arcsec), then holds still."""
+    sim = StarFieldSimulator(seed=3)
+    amplitudes = list(amplitudes)
+    def capture():
+        offset = amplitudes.pop(0) if amplitudes else 0.0
+        return Frame(sim.render(80.0, 88.0 + offset / 3600.0, 0.0))
+    return capture
+
+def test_settles_when_vibration_decays():
+    # Damped oscillation, alternating sign, halving every frame
+    amplitudes = [80.0 * (-0.5) ** k for k in range(10)]
+    detector = SettleDetector(threshold_arcsec=3.0, consecutive=2)
+    result = detector.wait(vibrating_stream(amplitudes), SCALE)
+
+    assert result['settled'] is True
+    assert result['jitter'][0] > 3.0 / SCALE
+    assert all(j < 3.0 / SCALE for j in result['jitter'][-2:])
+    # Settles once the swing drops below the threshold, long before the stream holds still
+    assert len(result['jitter']) < len(amplitudes)
+    assert result['frame'] is not None
+
+def test_times_out_while_drifting():
+    drift = [25.0 * k for k in range(1000)]
+    detector = SettleDetector(threshold_arcsec=3.0, timeout=0.3)
+    result = detector.wait(vibrating_stream(drift), SCALE)
+    assert result['settled'] is False
+    assert result['elapsed'] >= 0.3
+    assert min(result['jitter']) > 3.0 / SCALE
+
+def test_pixel_threshold_without_pixel_scale():
+    amplitudes = [80.0 * (-0.5) ** k for k in range(10)]
+    strict = SettleDetector(threshold_arcsec=3.0, threshold_px=0.05).wait(vibrating_stream(amplitudes))
+    loose = SettleDetector(threshold_arcsec=3.0, threshold_px=2.0).wait(vibrating_stream(amplitudes))
+    assert strict['settled'] and loose['settled']
+    assert len(loose['jitter']) < len(strict['jitter'])
+
+def test_threshold_rises_to_centroid_noise():
+    # A still field seen through heavy sensor noise: the measured shifts are pure centroid noise
+    sim = StarFieldSimulator(read_noise=40.0, seed=5)
+    capture = lambda: Frame(sim.render(80.0, 88.0, 0.0))
+    still = SettleDetector(threshold_px=0.001, timeout=1.0).wait(capture)
+    assert still['settled'] is True
+
+    fixed = SettleDetector(threshold_px=0.001, timeout=1.0, noise_factor=0.0).wait(capture)
+    assert fixed['settled'] is False
+    assert min(fixed['jitter']) > 0.001
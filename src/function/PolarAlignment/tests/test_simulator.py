@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from simulator import StarFieldSimulator
+from stars import extract_stars
+from camera import GuideCamera
+
+def test_sky_is_consistent_across_pointings_and_instances():
+    a = StarFieldSimulator(seed=3)
+    b = StarFieldSimulator(seed=3)
+    near = a.stars_near(120.0, 60.0, 1.0)
+    # Visit other parts of the sky first, the hash must not depend on history
+    b.render(10.0, -30.0)
+    wide = b.stars_near(120.4, 60.2, 3.0)
+    assert len(near[0]) > 0
+    assert set(np.round(near[0], 9)) <= set(np.round(wide[0], 9))
+    other = StarFieldSimulator(seed=4).stars_near(120.0, 60.0, 1.0)
+    assert not np.array_equal(np.sort(other[0]), np.sort(near[0]))
+
+def test_star_flux_and_position():
+    sim = StarFieldSimulator(catalog=[(10.0, 45.0, 6.0)], star_density=0.0, sky_level=0.0, read_noise=0.0)
+    x, y, visible = sim.project(10.05, 45.02, 15.0, sim.catalog_vec)
+    img = sim._background()
+    sim._add_stars(img, x[visible], y[visible], sim.catalog_mag[visible])
+
+    expected = sim.flux_zero_point * 10 ** (-0.4 * 6.0)
+    assert img.sum() == pytest.approx(expected, rel=0.02)
+    star = extract_stars(img)[0]
+    assert star['x'] == pytest.approx(x[0], abs=0.05)
+    assert star['y'] == pytest.approx(y[0], abs=0.05)
+
+def test_roll_rotates_field_about_centre():
+    sim = StarFieldSimulator(catalog=[(0.5, 0.0, 6.0)], star_density=0.0)
+    x0, y0, _ = sim.project(0.0, 0.0, 0.0, sim.catalog_vec)
+    x1, y1, _ = sim.project(0.0, 0.0, 90.0, sim.catalog_vec)
+    # A star east of centre moves to the top of the frame after +90 deg roll
+    assert y0[0] == pytest.approx(sim.height / 2)
+    assert x1[0] == pytest.approx(sim.width / 2)
+    assert y1[0] < sim.height / 2
+
+def test_render_throughput():
+    sim = StarFieldSimulator()
+    sim.render(0.0, 89.0)
+    start = time.perf_counter()
+    for i in range(100):
+        img = sim.render(i * 0.1, 89.0, i)
+    rate = 100 / (time.perf_counter() - start)
+    assert img.shape == (480, 640) and img.dtype == np.uint8
+    assert rate > 100
+
+def test_camera_renders_in_memory():
+    camera = GuideCamera(device_id=999)
+    camera.set_simulation_pointing(37.95, 89.26, 0.0)
+    img = camera._render_dummy_frame()
+    assert img.shape == (480, 640)
+    # Polaris is in the built-in catalog and lands near the frame centre
+    assert extract_stars(img)[0]['peak'] > 100
@@ -0,0 +1,114 @@
+import sys
+import os
+import time
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from native_solver import NativeSolver
+from simulator import StarFieldSimulator
+import multiprocessing
+from solver_pool import SolverPool, SolveStrategy, default_strategies, _bin, _init_worker, _run_strategy
+
+FAKE_ASTAP = """#!{python}
+import os, sys, time
+args = sys.argv[1:]
+path = args[args.index("-f") + 1]
+if {solve}:
+    with open(os.path.splitext(path)[0] + ".ini", "w") as f:
+        f.write("PLTSOLVED=1\\nCRVAL1=12.5\\nCRVAL2=88.25\\nCROTA2=3.0\\nCDELT2=0.003\\n")
+else:
+    time.sleep(30)
+"""
+
+@pytest.fixture(scope="module")
+def sky():
+    sim = StarFieldSimulator(seed=7)
+    engine = NativeSolver(*sim.stars_near(0.0, 90.0, 6.5), fov_deg=3.0)
+    return sim, engine
+
+def fake_astap(tmp_path, solve):
+    path = tmp_path / "astap"
+    path.write_text(FAKE_ASTAP.format(python=sys.executable, solve=solve))
+    path.chmod(0o755)
+    return str(path)
+
+def test_default_strategies():
+    names = [s.name for s in default_strategies(astap=False)]
+    assert names == ["native-hinted", "native-blind", "native-bin2-blind"]
+    assert all(s.backend == "astap" for s in default_strategies(native=False))
+    with pytest.raises(ValueError):
+        SolverPool(strategies=[SolveStrategy("n", "native")])
+
+def test_bin_averages_blocks():
+    data = np.arange(24, dtype=np.uint16).reshape(4, 6)
+    binned = _bin(data, 2)
+    assert binned.shape == (2, 3)
+    assert binned[0, 0] == (0 + 1 + 6 + 7) // 4
+
+def test_pool_caps_workers_to_cores(sky):
+    strategies = [SolveStrategy(f"s{i}") for i in range(4 * (os.cpu_count() or 1))]
+    assert SolverPool(strategies, native_solver=sky[1]).max_workers == os.cpu_count()
+
+def test_pool_returns_first_verified_solution_and_kills_the_rest(sky, tmp_path):
+    sim, engine = sky
+    image = sim.render(40.0, 88.0, 15.0)
+    strategies = [SolveStrategy("native-blind", "native"), SolveStrategy("astap-blind", "astap")]
+    start = time.monotonic()
+    with SolverPool(strategies, native_solver=engine, executable=fake_astap(tmp_path, False),
+                    work_dir=str(tmp_path)) as pool:
+        sol = pool.solve(image)
+        assert sol['strategy'] == "native-blind"
+        assert abs(sol['dec'] - 88.0) < 0.01
+        assert pool.last_result['attempts'] == {"native-blind": 'won', "astap-blind": 'cancelled'}
+    # The hanging ASTAP run was killed instead of waited for
+    assert time.monotonic() - start < 15.0
+    assert not list(tmp_path.glob("solve_*"))
+
+def test_pool_falls_through_to_astap(sky, tmp_path):
+    strategies = [SolveStrategy("native-blind", "native"), SolveStrategy("astap-blind", "astap")]
+    with SolverPool(strategies, native_solver=sky[1], executable=fake_astap(tmp_path, True),
+                    work_dir=str(tmp_path)) as pool:
+        sol = pool.solve(np.zeros((240, 320), dtype=np.uint8))
+    assert sol['strategy'] == "astap-blind"
+    assert sol['ra'] == 12.5 and sol['dec'] == 88.25
+
+def test_pool_skips_hinted_strategies_without_hint_and_checks_hint_radius(sky):
+    sim, engine = sky
+    image = sim.render(200.0, 87.0, 0.0)
+    strategies = [SolveStrategy("hinted", "native", hinted=True, search_radius=3.0)]
+    with SolverPool(strategies, native_solver=engine) as pool:
+        assert pool.solve(image) is None
+        assert pool.last_result['attempts'] == {}
+        sol = pool.solve(image, hint={'ra': 201.0, 'dec': 87.2})
+        assert sol['strategy'] == "hinted"
+        # A solution far from the hint is not trusted
+        assert not pool._verified({'ra': 20.0, 'dec': 80.0, 'matches': 20}, 3.0, {'ra': 201.0, 'dec': 87.2})
+        assert not pool._verified({'ra': 200.0, 'dec': 87.0, 'matches': 2}, 180, None)
+
+def test_losing_native_solve_stops_at_cancel(sky):
+    sim, engine = sky
+    image = sim.render(40.0, 88.0, 15.0)
+    cancelled = multiprocessing.Value('q', 0)
+    _init_worker(engine, "astap", None, cancelled)
+    strategy = SolveStrategy("native-blind", "native")
+    assert _run_strategy(1, strategy, image, 180, None) is not None
+
+    class CancelAfterStart:
+        # Set once the solve is under way, as when another strategy wins meanwhile
+        def __init__(self):
+            self.checks = 0
+        def is_set(self):
+            self.checks += 1
+            return True
+    flag = CancelAfterStart()
+    engine.cancel_event = flag
+    try:
+        assert engine.solve(image) is None
+    finally:
+        engine.cancel_event = None
+    assert flag.checks == 1
+    # The worker's solver is left without a cancel flag for the next solve
+    assert _run_strategy(2, strategy, image, 180, None) is not None
+    assert engine.cancel_event is None
@@ -0,0 +1,110 @@
+import sys
+import os
+import time
+import queue
+import functools
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from native_solver import NativeSolver
+from simulator import StarFieldSimulator
+from solver import PlateSolver
+from solver_service import SolverService
+
+class ScriptedSolver:
+    """Solver whose behaviour is chosen by the hint: crash, hang, raise or answer."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.solves = 0
+
+    def solve(self, image, search_radius=180, hint=None):
+        action = (hint or {}).get('action')
+        if action == 'crash':
+            os._exit(3)
+        if action == 'hang':
+            time.sleep(60)
+        if action == 'raise':
+            raise ValueError("bad frame")
+        time.sleep(self.delay)
+        self.solves += 1
+        return {'ra': float(image.mean()), 'dec': 89.0, 'pid': os.getpid(), 'solves': self.solves}
+
+class BrokenSolver:
+    def __init__(self):
+        raise OSError("catalog missing")
+
+def test_workers_stay_warm():
+    with SolverService(ScriptedSolver, workers=1) as service:
+        first = service.solve(np.full((4, 4), 3, dtype=np.uint8))
+        second = service.solve(np.full((4, 4), 5, dtype=np.uint8))
+    assert first['ra'] == 3.0 and second['ra'] == 5.0
+    assert first['pid'] == second['pid']
+    assert second['solves'] == 2 # Same solver object, built once
+
+def test_native_backend_behind_service():
+    sim = StarFieldSimulator(seed=7)
+    engine = NativeSolver(*sim.stars_near(0.0, 90.0, 6.5), fov_deg=3.0)
+    factory = functools.partial(PlateSolver, backend="native", native_solver=engine, fallback=False)
+    with SolverService(factory, workers=2) as service:
+        futures = [service.submit(sim.render(ra, 88.0, 0.0)) for ra in (30.0, 150.0, 270.0)]
+        sols = [f.result(timeout=30) for f in futures]
+    assert [round(s['ra']) for s in sols] == [30, 150, 270]
+
+def test_crashed_worker_is_restarted():
+    with SolverService(ScriptedSolver, workers=1) as service:
+        pid = service.pids[0]
+        image = np.zeros((4, 4), dtype=np.uint8)
+        with pytest.raises(RuntimeError, match="crashed"):
+            service.submit(image, hint={'action': 'crash'}).result(timeout=30)
+        assert service.solve(image, hint={'action': 'crash'}) is None
+        assert service.solve(image)['pid'] not in (pid, None)
+        assert service.restarts == 2
+
+def test_hanging_solve_times_out_and_worker_restarts():
+    with SolverService(ScriptedSolver, workers=1, job_timeout=0.5) as service:
+        image = np.zeros((4, 4), dtype=np.uint8)
+        with pytest.raises(TimeoutError):
+            service.submit(image, hint={'action': 'hang'}).result(timeout=30)
+        assert service.solve(image)['solves'] == 1
+        assert service.restarts == 1
+
+def test_solver_errors_keep_the_worker():
+    with SolverService(ScriptedSolver, workers=1) as service:
+        image = np.zeros((4, 4), dtype=np.uint8)
+        with pytest.raises(RuntimeError, match="bad frame"):
+            service.submit(image, hint={'action': 'raise'}).result(timeout=30)
+        assert service.solve(image)['solves'] == 1
+        assert service.restarts == 0
+
+def test_health_check_replaces_dead_idle_worker():
+    with SolverService(ScriptedSolver, workers=1, health_interval=0.1) as service:
+        old = service.pids[0]
+        os.kill(old, 9)
+        deadline = time.monotonic() + 10.0
+        while service.restarts == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert service.restarts == 1
+        assert service.pids and service.pids[0] != old
+        assert service.solve(np.zeros((4, 4), dtype=np.uint8)) is not None
+
+def test_full_queue_applies_backpressure():
+    factory = functools.partial(ScriptedSolver, delay=0.5)
+    with SolverService(factory, workers=1, queue_size=1) as service:
+        image = np.zeros((4, 4), dtype=np.uint8)
+        running = service.submit(image)
+        deadline = time.monotonic() + 5.0
+        while service.queued and time.monotonic() < deadline:
+            time.sleep(0.01) # Wait for the worker to take the first job
+        queued = service.submit(image)
+        with pytest.raises(queue.Full):
+            service.submit(image, block=False)
+        assert running.result(timeout=10) and queued.result(timeout=10)
+
+def test_broken_factory_fails_start():
+    service = SolverService(BrokenSolver)
+    with pytest.raises(RuntimeError, match="catalog missing"):
+        service.start()
+    service.close()
@@ -0,0 +1,61 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from stars import StarExtractor, extract_stars, estimate_background
+from frame import Frame
+
+def synthetic_field(width=640, height=480, n=40, seed=0):
+    """Gaussian stars at sub-pixel positions on a sloped, noisy background."""
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(10, width - 10, n)
+    ys = rng.uniform(10, height - 10, n)
+    amps = rng.uniform(80, 200, n)
+    yy, xx = np.mgrid[0:height, 0:width]
+    img = 20.0 + 0.02 * xx + 0.01 * yy + rng.normal(0, 3.0, (height, width))
+    for x, y, a in zip(xs, ys, amps):
+        x0, x1 = int(x) - 6, int(x) + 7
+        y0, y1 = int(y) - 6, int(y) + 7
+        img[y0:y1, x0:x1] += a * np.exp(-((xx[y0:y1, x0:x1] - x) ** 2 + (yy[y0:y1, x0:x1] - y) ** 2) / (2 * 1.5 ** 2))
+    return img.astype(np.float32), xs, ys
+
+def nearest_errors(stars, xs, ys):
+    d = np.hypot(stars['x'][:, None] - xs[None, :], stars['y'][:, None] - ys[None, :])
+    return d.min(axis=1)
+
+def test_background_follows_gradient():
+    img, _, _ = synthetic_field(n=0)
+    background, sigma = estimate_background(img, cell=32)
+    assert np.abs(background - img).mean() < 3.0
+    assert 2.0 < sigma < 4.0
+
+def test_subpixel_centroids():
+    img, xs, ys = synthetic_field()
+    stars = extract_stars(img)
+    errors = nearest_errors(stars, xs, ys)
+    assert len(stars) >= 38
+    assert np.median(errors) < 0.1
+    assert np.all(np.diff(stars['flux']) <= 0)
+
+def test_tiled_matches_single_pass():
+    img, xs, ys = synthetic_field(width=1000, height=700, n=120, seed=3)
+    single = StarExtractor(tile_size=4096).extract(img)
+    tiled_extractor = StarExtractor(tile_size=256, overlap=16, workers=4)
+    tiled = tiled_extractor.extract(img)
+    tiled_extractor.close()
+
+    assert len(tiled) == len(single)
+    a = np.sort(np.round(single['x'] + 1000 * np.round(single['y']), 1))
+    b = np.sort(np.round(tiled['x'] + 1000 * np.round(tiled['y']), 1))
+    assert np.allclose(a, b, atol=0.2)
+
+def test_accepts_frame_and_limits_count():
+    img, _, _ = synthetic_field()
+    frame = Frame(np.clip(img, 0, 255).astype(np.uint8))
+    stars = extract_stars(frame, max_stars=5)
+    assert len(stars) == 5
+
+def test_empty_image():
+    assert len(extract_stars(np.zeros((64, 64), dtype=np.uint8))) == 0
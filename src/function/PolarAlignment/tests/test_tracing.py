@@ -0,0 +1,143 @@
+import sys
+import os
+import json
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import tracing
+from tracing import Tracer, NullTracer
+from camera import GuideCamera
+from mount import OnStepMount
+from solver import PlateSolver
+from aligner import PolarAligner
+
+class MockMount(OnStepMount):
+    def __init__(self):
+        super().__init__(mock=True)
+        self.ra_angle = 0.0
+
+    def slew_ra_relative(self, degrees):
+        self.ra_angle += degrees
+
+class MockSolver:
+    def __init__(self, fail_hinted=False):
+        self.fail_hinted = fail_hinted
+
+    def solve(self, image, search_radius=180, hint=None):
+        if hint is not None and self.fail_hinted:
+            tracing.count('solve.failure')
+            return None
+        tracing.count('solve.success')
+        return {'ra': 0.0, 'dec': 89.0, 'rotation': 0.0}
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    previous = tracing.set_tracer(tracer)
+    yield tracer
+    tracing.set_tracer(previous)
+
+def test_spans_nest_and_record_attributes(tracer):
+    with tracing.span('outer', a=1) as outer:
+        with tracing.span('inner') as inner:
+            inner.set(stars=12)
+    assert [s.name for s in tracer.spans] == ['inner', 'outer']
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+    assert inner.attrs == {'stars': 12}
+    assert outer.duration >= inner.duration >= 0.0
+
+def test_span_records_errors(tracer):
+    with pytest.raises(RuntimeError):
+        with tracing.span('solve'):
+            raise RuntimeError("no stars")
+    assert tracer.spans[0].attrs['error'] == 'RuntimeError'
+
+def test_counters_and_summary(tracer):
+    tracing.count('solve.success')
+    tracing.count('solve.success', 2)
+    for _ in range(3):
+        with tracing.span('capture'):
+            pass
+    assert tracer.counters == {'solve.success': 3}
+    assert tracer.summary()['capture']['count'] == 3
+
+def test_jsonl_output(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(str(path))
+    with tracer.span('capture', exposure=0.5):
+        pass
+    tracer.count('solve.fallback')
+    tracer.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines[0]['name'] == 'capture'
+    assert lines[0]['attrs'] == {'exposure': 0.5}
+    assert lines[-1] == {'counters': {'solve.fallback': 1}}
+
+def test_chrome_output(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path), format='chrome')
+    with tracer.span('solve', backend='native'):
+        pass
+    tracer.count('solve.success')
+    tracer.close()
+    events = json.loads(path.read_text())['traceEvents']
+    assert events[0]['ph'] == 'X' and events[0]['name'] == 'solve'
+    assert events[0]['args'] == {'backend': 'native'}
+    assert events[1]['ph'] == 'C' and events[1]['args'] == {'solve.success': 1}
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError):
+        Tracer(format='xml')
+
+def test_disabled_tracer_records_nothing():
+    previous = tracing.set_tracer(None)
+    try:
+        assert isinstance(tracing.get_tracer(), NullTracer)
+        first = tracing.span('capture', exposure=1.0)
+        with first as span:
+            span.set(stars=3)
+        assert tracing.span('solve') is first # One shared no-op object, no allocation per span
+        tracing.count('solve.success')
+    finally:
+        tracing.set_tracer(previous)
+
+def test_solver_records_solves_and_cache_hits(tracer):
+    class Engine:
+        def solve(self, image, search_radius=180, hint=None):
+            return {'ra': 1.0, 'dec': 88.0, 'matches': 9} if image.any() else None
+
+    solver = PlateSolver(backend="native", native_solver=Engine(), fallback=False, cache_size=4)
+    image = np.ones((8, 8), dtype=np.uint8)
+    solver.solve(image)
+    solver.solve(image)
+    solver.solve(np.zeros((8, 8), dtype=np.uint8), search_radius=5.0, hint={'ra': 0.0, 'dec': 89.0})
+    spans = [s for s in tracer.spans if s.name == 'solve']
+    assert [s.attrs['cached'] for s in spans] == [False, True, False]
+    assert spans[0].attrs['matches'] == 9 and spans[0].attrs['backend'] == 'native'
+    assert spans[2].attrs['hinted'] is True and spans[2].attrs['solved'] is False
+    assert tracer.counters == {'solve.success': 1, 'solve.cache_hit': 1, 'solve.failure': 1}
+
+def test_alignment_records_phases(tracer, iers_cache):
+    mount = MockMount()
+    camera = GuideCamera(device_id=999)
+    aligner = PolarAligner(camera, MockSolver(fail_hinted=True), mount, cache_dir=iers_cache,
+                           settle_time=0.0, settle_threshold=None)
+    try:
+        assert aligner.run_alignment() is True
+    finally:
+        camera.close_session()
+
+    names = [s.name for s in tracer.spans]
+    for phase in ('alignment', 'slew', 'settle', 'capture', 'transform', 'fit', 'move'):
+        assert phase in names
+    root = next(s for s in tracer.spans if s.name == 'alignment')
+    assert all(s.parent_id is not None for s in tracer.spans if s is not root)
+    captures = [s for s in tracer.spans if s.name == 'capture']
+    assert all('exposure' in s.attrs for s in captures)
+    move = next(s for s in tracer.spans if s.name == 'move')
+    assert move.attrs['alt_steps'] == aligner.adjustment['alt']
+    assert tracer.counters['solve.retry_blind'] == 2
+    assert tracer.counters['solve.success'] == 3
@@ -0,0 +1,126 @@
+import sys
+import os
+import math
+import time
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from tracking import StarTracker, pixel_to_radec
+from stars import STAR_DTYPE
+from native_solver import NativeSolver, radec_to_vec
+from simulator import StarFieldSimulator
+from camera import GuideCamera
+from solver import PlateSolver
+from aligner import PolarAligner, _rotation_matrix
+from axis_fit import _altaz_to_vec
+
+def make_stars(xy):
+    stars = np.zeros(len(xy), dtype=STAR_DTYPE)
+    stars['x'], stars['y'] = xy[:, 0], xy[:, 1]
+    return stars
+
+def angular_sep_arcsec(ra1, dec1, ra2, dec2):
+    cos = np.clip(radec_to_vec(ra1, dec1) @ radec_to_vec(ra2, dec2), -1, 1)
+    return math.degrees(math.acos(cos)) * 3600.0
+
+def test_tracker_follows_shift_and_rotation():
+    rng = np.random.default_rng(0)
+    ref = rng.uniform(0, 600, (30, 2))
+    tracker = StarTracker()
+    tracker.reset(make_stars(ref))
+
+    total = 1 + 0j, 0j
+    for step in range(5):
+        # Small rotation and a 15 px shift per frame, with a few stars lost and gained
+        A = np.exp(1j * math.radians(0.3 * (step + 1)))
+        B = complex(15.0 * (step + 1), -8.0 * (step + 1))
+        moved = A * (ref[:, 0] + 1j * ref[:, 1]) + B
+        xy = np.column_stack([moved.real, moved.imag])[3:]
+        xy = np.vstack([xy, rng.uniform(0, 600, (3, 2))])
+        assert tracker.track(make_stars(xy)) >= 25
+        total = A, B
+    assert tracker.A == pytest.approx(total[0], abs=1e-6)
+    assert tracker.B == pytest.approx(total[1], abs=1e-3)
+    x, y = tracker.to_anchor(*xy[0])
+    assert (x, y) == pytest.approx(tuple(ref[3]), abs=1e-3)
+
+def test_tracker_reports_loss():
+    rng = np.random.default_rng(1)
+    tracker = StarTracker()
+    tracker.reset(make_stars(rng.uniform(0, 600, (30, 2))))
+    assert tracker.track(make_stars(rng.uniform(0, 600, (30, 2)))) == 0
+
+def test_pixel_to_radec_inverts_simulator_projection():
+    sim = StarFieldSimulator()
+    ra, dec, roll = 40.0, 88.0, 25.0
+    stars = radec_to_vec(np.array([40.5, 38.0, 45.0]), np.array([88.3, 87.6, 88.0]))
+    x, y, _ = sim.project(ra, dec, roll, stars)
+    sol = {'ra': ra, 'dec': dec, 'rotation': roll, 'scale': math.degrees(sim.pixel_scale) * 3600.0}
+    for k, (ra_k, dec_k) in enumerate([(40.5, 88.3), (38.0, 87.6), (45.0, 88.0)]):
+        got = pixel_to_radec(sol, x[k], y[k], sim.width, sim.height)
+        assert angular_sep_arcsec(*got, ra_k, dec_k) < 0.01
+
+@pytest.mark.parametrize("dalt, daz", [(0.2, 0.0), (0.0, -0.3), (0.1, 0.25)])
+def test_base_rotation_recovers_adjustment(dalt, daz):
+    axis = _altaz_to_vec(39.0, 1.0)
+    camera = _altaz_to_vec(39.5, 2.0)
+    pivot = np.array([math.sin(math.radians(1.0)), -math.cos(math.radians(1.0)), 0.0])
+    true = _rotation_matrix([0.0, 0.0, 1.0], math.radians(daz)) @ _rotation_matrix(pivot, math.radians(dalt))
+    found = PolarAligner._base_rotation(None, camera, true @ camera, axis)
+    moved = found @ axis
+    assert math.degrees(math.asin(moved[2])) == pytest.approx(39.0 + dalt, abs=1e-3)
+    assert math.degrees(math.atan2(moved[1], moved[0])) == pytest.approx(1.0 + daz, abs=1e-3)
+
+@pytest.fixture(scope="module")
+def live_rig():
+    sim = StarFieldSimulator(seed=7)
+    engine = NativeSolver(*sim.stars_near(30.0, 88.0, 4.0), fov_deg=3.0)
+    camera = GuideCamera(device_id=999)
+    camera.simulator = sim
+    yield camera, engine
+    camera.close_session()
+
+def test_live_mode_tracks_without_solving_every_frame(live_rig, iers_cache):
+    camera, engine = live_rig
+    calls = []
+    class CountingSolver:
+        def solve(self, image, search_radius=180, hint=None):
+            calls.append(hint)
+            return engine.solve(image, search_radius, hint=hint)
+
+    aligner = PolarAligner(camera, CountingSolver(), None, cache_dir=iers_cache)
+    alt, az = aligner._icrs_to_altaz([30.0], [88.0], [time.time()])
+    aligner._reference = (_altaz_to_vec(alt[0], az[0]), _altaz_to_vec(39.0, 1.0))
+
+    # The base moves the field a little every frame, then jumps out of tracking range
+    path = [(30.0 + 0.3 * k, 88.0 + 0.01 * k) for k in range(8)] + [(33.0, 87.0), (33.0, 87.0)]
+    statuses = []
+    original_capture = camera.capture_frame
+    def capture(filename=None, exposure_time=1.0):
+        ra, dec = path[len(statuses)]
+        camera.set_simulation_pointing(ra, dec, 10.0)
+        return original_capture(filename, exposure_time)
+    camera.capture_frame = capture
+    try:
+        aligner.run_live(callback=statuses.append, max_frames=len(path))
+    finally:
+        camera.capture_frame = original_capture
+
+    assert [s['resolved'] for s in statuses] == [True] + [False] * 7 + [True, False]
+    assert len(calls) == 2
+    assert calls[1] is not None  # re-solve hinted by the last tracked pointing
+    for (ra, dec), status in zip(path, statuses):
+        assert status['tracked']
+        assert angular_sep_arcsec(status['ra'], status['dec'], ra, dec) < 5.0
+    assert aligner.live_status is statuses[-1]
+    # The first frame is the reference pointing, so the axis has not moved yet
+    assert statuses[0]['axis_alt'] == pytest.approx(39.0, abs=0.01)
+    assert statuses[0]['axis_az'] == pytest.approx(1.0, abs=0.01)
+
+def test_live_mode_requires_measurement(live_rig, iers_cache):
+    camera, engine = live_rig
+    aligner = PolarAligner(camera, PlateSolver(backend="native", native_solver=engine), None, cache_dir=iers_cache)
+    with pytest.raises(RuntimeError):
+        aligner.run_live(max_frames=1)